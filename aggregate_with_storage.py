@@ -1,10 +1,13 @@
 from log_aggregator import LogAggregator
-from log_storage import LogStorage
+from log_storage import LogStorage, LogWriter
 from datetime import datetime, timedelta
 
 # Initialize components
 aggregator = LogAggregator(aws_region='us-east-1')
-storage = LogStorage('logs.db')
+# Message bodies are compressed with per-source zstd dictionaries
+storage = LogStorage('logs.db', compress_messages=True)
+# Entries are written by a background thread while the next source is collected
+writer = LogWriter(storage).start()
 
 # Define log sources
 local_logs = [
@@ -27,6 +30,7 @@ if local_logs:
         is_json=False
     )
     all_logs.extend(local_entries)
+    writer.submit(local_entries)
     print(f"Collected {len(local_entries)} local log entries")
 
 # Collect cloud logs
@@ -37,6 +41,7 @@ if cloud_logs:
         hours_back=24
     )
     all_logs.extend(cloud_entries)
+    writer.submit(cloud_entries)
     print(f"Collected {len(list(cloud_entries))} cloud log entries")
 
 # Print sample of logs before storage
@@ -44,17 +49,14 @@ print("\nSample of logs to be stored:")
 for log in all_logs[:2]:
     print(f"Log entry: {log}")
 
-# Store logs in SQLite
+# Wait for the writer to finish storing logs in SQLite
 print(f"\nStoring {len(all_logs)} logs...")
-storage.store_logs(all_logs)
-print("Storage complete")
+writer.close()
+print(f"Storage complete: {writer.stats}")
 
 # Verify storage
-with storage._get_connection() as conn:
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM logs")
-    log_count = cursor.fetchone()[0]
-    print(f"\nTotal logs in database: {log_count}")
+log_count = storage.count_logs()
+print(f"\nTotal logs in database: {log_count}")
 
 # Query example
 recent_logs = storage.query_logs(
@@ -9,10 +9,6 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from app.models import Base
-from app.models.credentials import Credential
-from app.models.users import User
-
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -22,9 +18,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-target_metadata = Base.metadata
+# logs.db is managed with raw SQL in these revisions. The ORM models (users,
+# credentials) live in the auth database; see the [auth] section and alembic_auth/
+target_metadata = None
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -0,0 +1,58 @@
+"""Log rollup tables and incremental auto-vacuum
+
+Revision ID: 5d9a7e3b2f60
+Revises: e4b83a6f0c12
+Create Date: 2026-10-19 15:48:52.102937
+
+"""
+import sqlite3
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d9a7e3b2f60'
+down_revision: Union[str, None] = 'e4b83a6f0c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rollup tables as of this revision
+GRANULARITIES = ('minute', 'hour')
+
+
+def _set_auto_vacuum(mode: str) -> None:
+    # Changing auto_vacuum on an existing file needs a full VACUUM, which
+    # cannot run inside a transaction and rewrites the whole database once
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        conn = sqlite3.connect(bind.engine.url.database, timeout=20.0, isolation_level=None)
+        try:
+            conn.execute(f'PRAGMA auto_vacuum={mode}')
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+
+
+def upgrade() -> None:
+    # One row per bucket (start in epoch ms), source and level; logs without
+    # a level are counted under level_id 0
+    for granularity in GRANULARITIES:
+        op.execute(f'''
+            CREATE TABLE IF NOT EXISTS log_rollups_{granularity} (
+                bucket INTEGER NOT NULL,
+                source_id INTEGER NOT NULL,
+                level_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (bucket, source_id, level_id)
+            ) WITHOUT ROWID
+        ''')
+    # Rollups fill in on the first compaction run
+    _set_auto_vacuum('INCREMENTAL')
+
+
+def downgrade() -> None:
+    for granularity in GRANULARITIES:
+        op.execute(f'DROP TABLE IF EXISTS log_rollups_{granularity}')
+    op.execute("DELETE FROM log_sequence WHERE name = 'rollups'")
+    _set_auto_vacuum('NONE')
@@ -0,0 +1,88 @@
+"""Contentless full-text indexes fed with rendered messages
+
+Revision ID: 7c4e1b9a3d58
+Revises: d3a95c7e18b2
+Create Date: 2026-10-19 23:14:52.208716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+try:
+    import zstandard
+except ImportError:  # only needed for compressed messages
+    zstandard = None
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1b9a3d58'
+down_revision: Union[str, None] = 'd3a95c7e18b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Message encoding as of this revision: a template is space-separated tokens
+# where WILDCARD stands for the next parameter, params are joined by
+# PARAM_SEPARATOR, and a compressed body is a magicless zstd frame
+WILDCARD = '<*>'
+PARAM_SEPARATOR = '\x1f'
+
+
+class MessageRenderer:
+    """log_message(message, template_id, params, dict_id) for the migration's connection."""
+
+    def __init__(self, cursor):
+        self.templates = {
+            row_id: template.split(' ') for row_id, template in cursor.execute('SELECT id, template FROM templates')
+        }
+        self.dictionaries = dict(cursor.execute('SELECT id, dict FROM compression_dicts').fetchall())
+        self.decompressors = {}
+
+    def decompress(self, data, dict_id):
+        if dict_id not in self.decompressors:
+            if zstandard is None:
+                raise RuntimeError('Reading compressed messages requires zstandard (pip install zstandard)')
+            self.decompressors[dict_id] = zstandard.ZstdDecompressor(
+                dict_data=zstandard.ZstdCompressionDict(self.dictionaries[dict_id]),
+                format=zstandard.FORMAT_ZSTD1_MAGICLESS
+            )
+        return self.decompressors[dict_id].decompress(data).decode('utf-8')
+
+    def __call__(self, message, template_id, params, dict_id):
+        if dict_id is not None:
+            if template_id is None:
+                message = self.decompress(message, dict_id)
+            else:
+                params = self.decompress(params, dict_id)
+        if template_id is None:
+            return message
+        values = iter(params.split(PARAM_SEPARATOR) if params is not None else ())
+        return ' '.join(next(values) if token == WILDCARD else token for token in self.templates[template_id])
+
+
+def reindex(content: str) -> None:
+    """Recreate every partition's logs_fts_<name> with the given content option, filled with full messages."""
+    cursor = op.get_bind().connection.cursor()
+    try:
+        cursor.connection.create_function('log_message', 4, MessageRenderer(cursor), deterministic=True)
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions')]
+        for name in partitions:
+            cursor.execute(f'DROP TABLE IF EXISTS logs_fts_{name}')
+            cursor.execute(f'CREATE VIRTUAL TABLE logs_fts_{name} USING fts5(message, {content.format(name=name)})')
+            cursor.execute(f'''
+                INSERT INTO logs_fts_{name} (rowid, message)
+                SELECT id, log_message(message, template_id, params, dict_id) FROM logs_{name}
+            ''')
+    finally:
+        cursor.close()
+
+
+def upgrade() -> None:
+    # The old indexes read text back from logs_<name>.message, which is empty
+    # for templated logs and zstd bytes for compressed ones, so 'rebuild'
+    # indexed the wrong text. Contentless indexes only hold what is inserted.
+    reindex("content=''")
+
+
+def downgrade() -> None:
+    reindex("content='logs_{name}', content_rowid='id'")
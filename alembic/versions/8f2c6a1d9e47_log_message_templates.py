@@ -0,0 +1,74 @@
+"""Log message templates
+
+Revision ID: 8f2c6a1d9e47
+Revises: 5d9a7e3b2f60
+Create Date: 2026-10-19 17:05:36.412871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c6a1d9e47'
+down_revision: Union[str, None] = '5d9a7e3b2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Message encoding as of this revision: a template is space-separated tokens
+# where WILDCARD stands for the next parameter, and params are joined by
+# PARAM_SEPARATOR
+WILDCARD = '<*>'
+PARAM_SEPARATOR = '\x1f'
+
+
+def render(template: str, params) -> str:
+    values = iter(params.split(PARAM_SEPARATOR) if params is not None else ())
+    return ' '.join(next(values) if token == WILDCARD else token for token in template.split(' '))
+
+
+def upgrade() -> None:
+    # Existing logs keep their full messages; only new ones are templated
+    cursor = op.get_bind().connection.cursor()
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS templates (
+                id INTEGER PRIMARY KEY,
+                cluster_id INTEGER,
+                template TEXT NOT NULL UNIQUE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_templates_cluster ON templates(cluster_id)')
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions')]
+        for name in partitions:
+            columns = {row[1] for row in cursor.execute(f'PRAGMA table_info(logs_{name})')}
+            if 'template_id' not in columns:
+                cursor.execute(f'ALTER TABLE logs_{name} ADD COLUMN template_id INTEGER')
+            if 'params' not in columns:
+                cursor.execute(f'ALTER TABLE logs_{name} ADD COLUMN params TEXT')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_logs_{name}_template_ts ON logs_{name}(template_id, ts)')
+    finally:
+        cursor.close()
+
+
+def downgrade() -> None:
+    cursor = op.get_bind().connection.cursor()
+    try:
+        templates = dict(cursor.execute('SELECT id, template FROM templates').fetchall())
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions')]
+        for name in partitions:
+            # Write the full text of templated messages back to the message column
+            rows = cursor.execute(
+                f'SELECT id, template_id, params FROM logs_{name} WHERE template_id IS NOT NULL'
+            ).fetchall()
+            cursor.executemany(
+                f'UPDATE logs_{name} SET message = ?, template_id = NULL, params = NULL WHERE id = ?',
+                [(render(templates[template_id], params), log_id) for log_id, template_id, params in rows]
+            )
+            cursor.execute(f'DROP INDEX IF EXISTS idx_logs_{name}_template_ts')
+            cursor.execute(f'ALTER TABLE logs_{name} DROP COLUMN template_id')
+            cursor.execute(f'ALTER TABLE logs_{name} DROP COLUMN params')
+        cursor.execute('DROP TABLE templates')
+    finally:
+        cursor.close()
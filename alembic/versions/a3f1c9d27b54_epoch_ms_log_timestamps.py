@@ -0,0 +1,201 @@
+"""Epoch-ms log timestamps, level dictionary and composite indexes
+
+Revision ID: a3f1c9d27b54
+Revises: 14e4f0fc695f
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+import sqlite3
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d27b54'
+down_revision: Union[str, None] = '14e4f0fc695f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The schema and conversion below are frozen as of this revision; they must
+# not follow later changes to log_storage
+BATCH_SIZE = 50000
+
+LEVELS = ('DEBUG', 'INFO', 'NOTICE', 'WARNING', 'ERROR', 'CRITICAL')
+
+TIMESTAMP_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%b/%Y:%H:%M:%S %z',
+    '%b %d %H:%M:%S',
+)
+
+
+def to_epoch_ms(value):
+    """Epoch milliseconds of a legacy timestamp (naive is local time), or None."""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (int, float)):
+        return int(value if value > 1e11 else value * 1000)
+    text = str(value).strip()
+    try:
+        return int(datetime.fromisoformat(text).timestamp() * 1000)
+    except ValueError:
+        pass
+    try:
+        return to_epoch_ms(float(text))
+    except ValueError:
+        pass
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if parsed.year == 1900:  # syslog timestamps carry no year
+            parsed = parsed.replace(year=datetime.now().year)
+        return int(parsed.timestamp() * 1000)
+    return None
+
+
+def migrate_logs(conn: sqlite3.Connection) -> None:
+    """
+    Copy logs into `logs_new` in id order, one transaction per batch, then
+    swap the tables in a final short transaction that also picks up rows
+    written meanwhile. An interrupted run resumes from the last copied id.
+    Unparseable timestamps are stored as 0 with the original text kept in
+    log_metadata under `raw_timestamp`.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS levels (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.executemany('INSERT OR IGNORE INTO levels (name) VALUES (?)', [(level,) for level in LEVELS])
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS logs_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            level_id INTEGER,
+            message TEXT NOT NULL,
+            FOREIGN KEY (source_id) REFERENCES sources(id),
+            FOREIGN KEY (level_id) REFERENCES levels(id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs_new(ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_source_ts ON logs_new(source_id, ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_level_ts ON logs_new(level_id, ts)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_metadata (
+            log_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            FOREIGN KEY (log_id) REFERENCES logs(id),
+            PRIMARY KEY (log_id, key)
+        )
+    ''')
+    conn.commit()
+    level_ids = {name: level_id for level_id, name in cursor.execute('SELECT id, name FROM levels')}
+
+    def copy_batch(after_id, limit):
+        query = 'SELECT id, source_id, timestamp, level, message FROM logs WHERE id > ? ORDER BY id'
+        params = [after_id]
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        rows = cursor.execute(query, params).fetchall()
+        converted = []
+        raw_timestamps = []
+        for log_id, source_id, timestamp, level, message in rows:
+            ts = to_epoch_ms(timestamp)
+            if ts is None:
+                ts = 0
+                raw_timestamps.append((log_id, 'raw_timestamp', str(timestamp)))
+            level_id = None
+            if level:
+                level = level.upper()
+                level_id = level_ids.get(level)
+                if level_id is None:
+                    cursor.execute('INSERT OR IGNORE INTO levels (name) VALUES (?)', (level,))
+                    cursor.execute('SELECT id FROM levels WHERE name = ?', (level,))
+                    level_id = level_ids[level] = cursor.fetchone()[0]
+            converted.append((log_id, source_id or 0, ts, level_id, message))
+        cursor.executemany(
+            'INSERT INTO logs_new (id, source_id, ts, level_id, message) VALUES (?, ?, ?, ?, ?)',
+            converted
+        )
+        cursor.executemany(
+            'INSERT OR REPLACE INTO log_metadata (log_id, key, value) VALUES (?, ?, ?)',
+            raw_timestamps
+        )
+        return len(rows), rows[-1][0] if rows else after_id
+
+    last_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM logs_new').fetchone()[0]
+    copied = 0
+    while True:
+        cursor.execute('BEGIN IMMEDIATE')
+        count, last_id = copy_batch(last_id, BATCH_SIZE)
+        conn.commit()
+        copied += count
+        if count:
+            print(f"Migrated {copied} logs (up to id {last_id})")
+        if count < BATCH_SIZE:
+            break
+
+    # Cut over: pick up rows written during the copy, then swap the tables
+    cursor.execute('BEGIN IMMEDIATE')
+    count, last_id = copy_batch(last_id, None)
+    copied += count
+    cursor.execute('DROP TABLE logs')
+    cursor.execute('ALTER TABLE logs_new RENAME TO logs')
+    conn.commit()
+    print(f"Logs table migrated: {copied} rows copied")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('logs')}
+    if 'timestamp' not in columns:
+        return
+
+    # The backfill commits batch by batch on its own connection, so step out of
+    # alembic's transaction and let writers keep going between batches
+    with op.get_context().autocommit_block():
+        conn = sqlite3.connect(bind.engine.url.database, timeout=20.0)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            migrate_logs(conn)
+        finally:
+            conn.close()
+
+
+def downgrade() -> None:
+    op.execute('''
+        CREATE TABLE logs_legacy (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_id INTEGER NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            level TEXT,
+            message TEXT NOT NULL,
+            FOREIGN KEY (source_id) REFERENCES sources(id)
+        )
+    ''')
+    op.execute('''
+        INSERT INTO logs_legacy (id, source_id, timestamp, level, message)
+        SELECT l.id, l.source_id,
+               strftime('%Y-%m-%dT%H:%M:%f', l.ts / 1000.0, 'unixepoch', 'localtime'),
+               v.name, l.message
+        FROM logs l
+        LEFT JOIN levels v ON l.level_id = v.id
+    ''')
+    op.execute('DROP TABLE logs')
+    op.execute('ALTER TABLE logs_legacy RENAME TO logs')
+    op.create_index('idx_logs_timestamp', 'logs', ['timestamp'], unique=False)
+    op.create_index('idx_logs_level', 'logs', ['level'], unique=False)
+    op.drop_table('levels')
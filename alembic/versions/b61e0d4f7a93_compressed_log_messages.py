@@ -0,0 +1,82 @@
+"""Per-source zstd dictionaries for compressed log messages
+
+Revision ID: b61e0d4f7a93
+Revises: 8f2c6a1d9e47
+Create Date: 2026-10-19 19:21:07.530148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+try:
+    import zstandard
+except ImportError:  # only needed to downgrade a database with compressed messages
+    zstandard = None
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61e0d4f7a93'
+down_revision: Union[str, None] = '8f2c6a1d9e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def decompressor(dict_data: bytes) -> 'zstandard.ZstdDecompressor':
+    # Bodies are magicless zstd frames compressed with a per-source dictionary
+    return zstandard.ZstdDecompressor(
+        dict_data=zstandard.ZstdCompressionDict(dict_data),
+        format=zstandard.FORMAT_ZSTD1_MAGICLESS
+    )
+
+
+def upgrade() -> None:
+    # Existing logs stay uncompressed; dictionaries are trained as new logs arrive
+    cursor = op.get_bind().connection.cursor()
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS compression_dicts (
+                id INTEGER PRIMARY KEY,
+                source_id INTEGER NOT NULL,
+                created_at INTEGER NOT NULL,
+                dict BLOB NOT NULL,
+                FOREIGN KEY (source_id) REFERENCES sources(id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_compression_dicts_source ON compression_dicts(source_id, id)')
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions')]
+        for name in partitions:
+            columns = {row[1] for row in cursor.execute(f'PRAGMA table_info(logs_{name})')}
+            if 'dict_id' not in columns:
+                cursor.execute(f'ALTER TABLE logs_{name} ADD COLUMN dict_id INTEGER')
+    finally:
+        cursor.close()
+
+
+def downgrade() -> None:
+    cursor = op.get_bind().connection.cursor()
+    try:
+        decompressors = {}
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions')]
+        for name in partitions:
+            # Store every compressed body (params if templated, else message) as plain text again
+            rows = cursor.execute(
+                f'SELECT id, template_id, message, params, dict_id FROM logs_{name} WHERE dict_id IS NOT NULL'
+            ).fetchall()
+            if rows and zstandard is None:
+                raise RuntimeError('Decompressing messages requires zstandard (pip install zstandard)')
+            updates = []
+            for log_id, template_id, message, params, dict_id in rows:
+                if dict_id not in decompressors:
+                    data = cursor.execute('SELECT dict FROM compression_dicts WHERE id = ?', (dict_id,)).fetchone()[0]
+                    decompressors[dict_id] = decompressor(data)
+                if template_id is None:
+                    message = decompressors[dict_id].decompress(message).decode('utf-8')
+                else:
+                    params = decompressors[dict_id].decompress(params).decode('utf-8')
+                updates.append((message, params, log_id))
+            cursor.executemany(f'UPDATE logs_{name} SET message = ?, params = ?, dict_id = NULL WHERE id = ?', updates)
+            cursor.execute(f'ALTER TABLE logs_{name} DROP COLUMN dict_id')
+        cursor.execute('DROP TABLE compression_dicts')
+    finally:
+        cursor.close()
@@ -0,0 +1,37 @@
+"""Full-text index over log messages
+
+Revision ID: c7e20b5d41f9
+Revises: a3f1c9d27b54
+Create Date: 2026-10-19 11:03:27.540118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e20b5d41f9'
+down_revision: Union[str, None] = 'a3f1c9d27b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # External-content index: only the index is stored, rows are read back
+    # from logs by rowid (the log id)
+    if sa.inspect(op.get_bind()).has_table('logs_fts'):
+        return
+    op.execute('''
+        CREATE VIRTUAL TABLE logs_fts USING fts5(
+            message,
+            content='logs',
+            content_rowid='id'
+        )
+    ''')
+    op.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute('DROP TABLE IF EXISTS logs_fts')
@@ -0,0 +1,176 @@
+"""Per-partition log fingerprints for deduplicated ingest
+
+Revision ID: d3a95c7e18b2
+Revises: b61e0d4f7a93
+Create Date: 2026-10-19 21:02:44.906315
+
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Sequence, Union
+
+from alembic import op
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # only needed to fingerprint archived partitions
+    pa = None
+
+try:
+    import zstandard
+except ImportError:  # only needed for compressed messages
+    zstandard = None
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a95c7e18b2'
+down_revision: Union[str, None] = 'b61e0d4f7a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Fingerprints must match what ingest computed when this revision was
+# written, so the hash and message encoding are spelled out here
+BATCH_SIZE = 50000
+WILDCARD = '<*>'
+PARAM_SEPARATOR = '\x1f'
+
+
+def fingerprint(name: str, source_type: str, stream, timestamp, message: str) -> int:
+    """64-bit blake2b of source, stream, timestamp and message, as a signed SQLite INTEGER."""
+    key = '\0'.join((name, source_type, stream or '', str(timestamp), message))
+    digest = hashlib.blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def render(template: str, params) -> str:
+    values = iter(params.split(PARAM_SEPARATOR) if params is not None else ())
+    return ' '.join(next(values) if token == WILDCARD else token for token in template.split(' '))
+
+
+def create_fingerprint_table(cursor: sqlite3.Cursor, partition: str) -> None:
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS log_fingerprints_{partition} (fingerprint INTEGER PRIMARY KEY)')
+
+
+def backfill_partition(cursor: sqlite3.Cursor, partition: str) -> int:
+    """Fingerprint the logs stored in a partition; returns how many were read."""
+    templates = dict(cursor.execute('SELECT id, template FROM templates').fetchall())
+    decompressors = {}
+    insert_cursor = cursor.connection.cursor()
+    cursor.execute(f'''
+        SELECT s.name, s.type,
+               (SELECT value FROM log_metadata_{partition} m WHERE m.log_id = l.id AND m.key = 'stream'),
+               l.ts,
+               (SELECT value FROM log_metadata_{partition} m WHERE m.log_id = l.id AND m.key = 'raw_timestamp'),
+               l.message, l.template_id, l.params, l.dict_id
+        FROM logs_{partition} l
+        JOIN sources s ON l.source_id = s.id
+    ''')
+    read = 0
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            return read
+        fingerprints = []
+        for name, source_type, stream, ts, raw_timestamp, message, template_id, params, dict_id in rows:
+            if dict_id is not None:
+                if zstandard is None:
+                    raise RuntimeError('Reading compressed messages requires zstandard (pip install zstandard)')
+                if dict_id not in decompressors:
+                    data = insert_cursor.execute('SELECT dict FROM compression_dicts WHERE id = ?', (dict_id,)).fetchone()[0]
+                    decompressors[dict_id] = zstandard.ZstdDecompressor(
+                        dict_data=zstandard.ZstdCompressionDict(data),
+                        format=zstandard.FORMAT_ZSTD1_MAGICLESS
+                    )
+                body = decompressors[dict_id].decompress(message if template_id is None else params).decode('utf-8')
+                message, params = (body, params) if template_id is None else (message, body)
+            if template_id is not None:
+                message = render(templates[template_id], params)
+            timestamp = raw_timestamp if raw_timestamp is not None else ts
+            fingerprints.append((fingerprint(name, source_type, stream, timestamp, message),))
+        insert_cursor.executemany(
+            f'INSERT OR IGNORE INTO log_fingerprints_{partition} (fingerprint) VALUES (?)',
+            fingerprints
+        )
+        read += len(rows)
+
+
+def backfill_archive(cursor: sqlite3.Cursor, partition: str, path: str) -> int:
+    """Fingerprint the logs in an archived partition's Parquet file; returns how many were read."""
+    columns = ['source_name', 'source_type', 'ts', 'message', 'metadata']
+    read = 0
+    for batch in pq.ParquetFile(path).iter_batches(BATCH_SIZE, columns=columns):
+        fingerprints = []
+        for name, source_type, ts, message, metadata in zip(
+            batch.column(0).to_pylist(),
+            batch.column(1).to_pylist(),
+            pc.cast(batch.column(2), pa.int64()).to_pylist(),
+            batch.column(3).to_pylist(),
+            batch.column(4).to_pylist()
+        ):
+            metadata = json.loads(metadata) if metadata else {}
+            timestamp = metadata.get('raw_timestamp', ts)
+            fingerprints.append((fingerprint(name, source_type, metadata.get('stream'), timestamp, message),))
+        cursor.executemany(
+            f'INSERT OR IGNORE INTO log_fingerprints_{partition} (fingerprint) VALUES (?)',
+            fingerprints
+        )
+        read += batch.num_rows
+    return read
+
+
+def upgrade() -> None:
+    # Existing logs are fingerprinted too, so collecting their window again
+    # does not store them twice. One transaction per partition, on its own
+    # connection, so writers are only held up for one partition at a time.
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        conn = sqlite3.connect(bind.engine.url.database, timeout=20.0)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            cursor = conn.cursor()
+            partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions ORDER BY start_ts')]
+            for name in partitions:
+                cursor.execute('BEGIN IMMEDIATE')
+                create_fingerprint_table(cursor, name)
+                count = backfill_partition(cursor, name)
+                conn.commit()
+                print(f"Fingerprinted {count} logs in partition {name}")
+
+            # Archived days keep their fingerprints too; files live in LogStorage's default archive dir
+            archive_dir = f'{os.path.splitext(bind.engine.url.database)[0]}_archive'
+            has_archives = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_archives'"
+            ).fetchone()
+            archives = cursor.execute('SELECT name, path FROM log_archives').fetchall() if has_archives else []
+            if archives and pa is None:
+                print("pyarrow is not installed; archived partitions were not fingerprinted")
+                archives = []
+            for name, path in archives:
+                partition = name.split('-')[0]
+                cursor.execute('BEGIN IMMEDIATE')
+                create_fingerprint_table(cursor, partition)
+                count = backfill_archive(cursor, partition, os.path.join(archive_dir, path))
+                conn.commit()
+                print(f"Fingerprinted {count} archived logs in {name}")
+        finally:
+            conn.close()
+
+
+def downgrade() -> None:
+    cursor = op.get_bind().connection.cursor()
+    try:
+        # Live and archived partitions alike
+        tables = [
+            row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'log_fingerprints_%'"
+            )
+        ]
+        for table in tables:
+            cursor.execute(f'DROP TABLE {table}')
+    finally:
+        cursor.close()
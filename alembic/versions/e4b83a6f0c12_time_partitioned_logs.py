@@ -0,0 +1,227 @@
+"""Time-partitioned log tables
+
+Revision ID: e4b83a6f0c12
+Revises: c7e20b5d41f9
+Create Date: 2026-10-19 13:26:08.774310
+
+"""
+import sqlite3
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b83a6f0c12'
+down_revision: Union[str, None] = 'c7e20b5d41f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows moved per transaction
+BATCH_SIZE = 50000
+
+# Partitions as they were first laid out: one per UTC day, with the logs
+# schema of the epoch-ms revision
+PARTITION_WIDTH = 24 * 60 * 60 * 1000
+PARTITION_NAME_FORMAT = 'p%Y%m%d'
+
+
+def create_logs_table(cursor: sqlite3.Cursor, table: str, index_prefix: str, autoincrement: bool) -> None:
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY{' AUTOINCREMENT' if autoincrement else ''},
+            source_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            level_id INTEGER,
+            message TEXT NOT NULL,
+            FOREIGN KEY (source_id) REFERENCES sources(id),
+            FOREIGN KEY (level_id) REFERENCES levels(id)
+        )
+    ''')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_ts ON {table}(ts)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_source_ts ON {table}(source_id, ts)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_level_ts ON {table}(level_id, ts)')
+
+
+def create_fts_table(cursor: sqlite3.Cursor, table: str, content: str) -> None:
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+            message,
+            content='{content}',
+            content_rowid='id'
+        )
+    ''')
+
+
+def create_partition(cursor: sqlite3.Cursor, ts: int) -> tuple:
+    """Create and register the partition holding `ts`; returns (name, start_ts, end_ts)."""
+    start_ts = ts - ts % PARTITION_WIDTH
+    end_ts = start_ts + PARTITION_WIDTH
+    name = datetime.fromtimestamp(start_ts / 1000, timezone.utc).strftime(PARTITION_NAME_FORMAT)
+    create_logs_table(cursor, f'logs_{name}', f'idx_logs_{name}', autoincrement=False)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS log_metadata_{name} (
+            log_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            FOREIGN KEY (log_id) REFERENCES logs_{name}(id),
+            PRIMARY KEY (log_id, key)
+        )
+    ''')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_log_metadata_{name}_key ON log_metadata_{name}(key)')
+    create_fts_table(cursor, f'logs_fts_{name}', f'logs_{name}')
+    cursor.execute(
+        'INSERT OR IGNORE INTO log_partitions (name, start_ts, end_ts) VALUES (?, ?, ?)',
+        (name, start_ts, end_ts)
+    )
+    return name, start_ts, end_ts
+
+
+def migrate_to_partitions(conn: sqlite3.Connection) -> None:
+    """
+    Move logs into daily partitions in id order, one transaction per batch,
+    deleting them from `logs` as they go, so an interrupted run carries on
+    with what is left. The final transaction moves the rows written
+    meanwhile and drops logs, log_metadata and logs_fts. Log ids are kept.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_partitions (
+            name TEXT PRIMARY KEY,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_sequence (
+            name TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+    ''')
+    conn.commit()
+    partitions = {}
+
+    def move_batch(limit):
+        query = 'SELECT id, source_id, ts, level_id, message FROM logs ORDER BY id'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        rows = cursor.execute(query).fetchall()
+        if not rows:
+            return 0, 0
+        first_id, last_id = rows[0][0], rows[-1][0]
+        metadata = {}
+        for log_id, key, value in cursor.execute(
+            'SELECT log_id, key, value FROM log_metadata WHERE log_id BETWEEN ? AND ?',
+            (first_id, last_id)
+        ):
+            metadata.setdefault(log_id, []).append((log_id, key, value))
+
+        groups = {}
+        for row in rows:
+            day = row[2] // PARTITION_WIDTH
+            if day not in partitions:
+                partitions[day] = create_partition(cursor, row[2])
+            log_rows, metadata_rows = groups.setdefault(partitions[day][0], ([], []))
+            log_rows.append(tuple(row))
+            metadata_rows.extend(metadata.get(row[0], ()))
+        for name, (log_rows, metadata_rows) in groups.items():
+            cursor.executemany(
+                f'INSERT INTO logs_{name} (id, source_id, ts, level_id, message) VALUES (?, ?, ?, ?, ?)',
+                log_rows
+            )
+            cursor.executemany(
+                f'INSERT INTO logs_fts_{name} (rowid, message) VALUES (?, ?)',
+                [(row[0], row[4]) for row in log_rows]
+            )
+            cursor.executemany(
+                f'INSERT INTO log_metadata_{name} (log_id, key, value) VALUES (?, ?, ?)',
+                metadata_rows
+            )
+
+        cursor.execute('DELETE FROM log_metadata WHERE log_id <= ?', (last_id,))
+        cursor.execute('DELETE FROM logs WHERE id <= ?', (last_id,))
+        cursor.execute('''
+            INSERT INTO log_sequence (name, seq) VALUES ('logs', ?)
+            ON CONFLICT(name) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        ''', (last_id,))
+        return len(rows), last_id
+
+    moved = 0
+    while True:
+        cursor.execute('BEGIN IMMEDIATE')
+        count, last_id = move_batch(BATCH_SIZE)
+        conn.commit()
+        moved += count
+        if count:
+            print(f"Partitioned {moved} logs (up to id {last_id})")
+        if count < BATCH_SIZE:
+            break
+
+    # Cut over: move rows written meanwhile, then drop the old tables
+    cursor.execute('BEGIN IMMEDIATE')
+    count, _ = move_batch(None)
+    moved += count
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'logs'")
+    row = cursor.fetchone()
+    if row:
+        cursor.execute('''
+            INSERT INTO log_sequence (name, seq) VALUES ('logs', ?)
+            ON CONFLICT(name) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        ''', (row[0],))
+    cursor.execute('DROP TABLE IF EXISTS logs_fts')
+    cursor.execute('DROP TABLE IF EXISTS log_metadata')
+    cursor.execute('DROP TABLE logs')
+    conn.commit()
+    print(f"Logs partitioned by day: {moved} rows moved")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('logs'):
+        return
+
+    # Same as the epoch-ms migration: batches commit on their own connection
+    with op.get_context().autocommit_block():
+        conn = sqlite3.connect(bind.engine.url.database, timeout=20.0)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            migrate_to_partitions(conn)
+        finally:
+            conn.close()
+
+
+def downgrade() -> None:
+    cursor = op.get_bind().connection.cursor()
+    try:
+        create_logs_table(cursor, 'logs', 'idx_logs', autoincrement=True)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS log_metadata (
+                log_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                FOREIGN KEY (log_id) REFERENCES logs(id),
+                PRIMARY KEY (log_id, key)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metadata_key ON log_metadata(key)')
+
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM log_partitions ORDER BY start_ts')]
+        for name in partitions:
+            cursor.execute(f'''
+                INSERT INTO logs (id, source_id, ts, level_id, message)
+                SELECT id, source_id, ts, level_id, message FROM logs_{name}
+            ''')
+            cursor.execute(f'INSERT INTO log_metadata SELECT log_id, key, value FROM log_metadata_{name}')
+            cursor.execute(f'DROP TABLE IF EXISTS logs_fts_{name}')
+            cursor.execute(f'DROP TABLE IF EXISTS log_metadata_{name}')
+            cursor.execute(f'DROP TABLE IF EXISTS logs_{name}')
+            cursor.execute('DELETE FROM log_partitions WHERE name = ?', (name,))
+
+        create_fts_table(cursor, 'logs_fts', 'logs')
+        cursor.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+        cursor.execute('DROP TABLE log_partitions')
+        cursor.execute('DROP TABLE log_sequence')
+    finally:
+        cursor.close()
@@ -1,15 +1,20 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import schemas
-from .database import get_db
+from .database import get_async_db
 from .models.users import User
+from .services.cache_service import token_cache, TOKEN_CACHE_TTL
 
 # Security configuration
 SECRET_KEY = "your-secret-key-keep-it-secret"  # In production, use environment variable
@@ -35,7 +40,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    # Tokens already verified are served from memory until they expire
+    cache_key = ("token", hashlib.sha256(token.encode()).hexdigest())
+    cached_user = token_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -50,13 +65,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await get_user_by_username(db, token_data.username)
     if user is None:
         raise credentials_exception
+
+    ttl = min(int(payload.get("exp", 0) - time.time()), TOKEN_CACHE_TTL)
+    if ttl > 0:
+        # Detach so the cached user outlives this request's session
+        db.expunge(user)
+        token_cache.set(cache_key, user, ttl=ttl)
     return user
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not user or not await run_in_threadpool(verify_password, password, user.hashed_password):
         return False
     return user
\ No newline at end of file
@@ -1,19 +1,75 @@
-from sqlalchemy import create_engine
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./logs.db"
+# Users and credentials live in their own file so auth never waits on log ingest locks
+AUTH_DB_PATH = os.getenv("AUTH_DB_PATH", "./auth.db")
+LEGACY_DB_PATH = "./logs.db"
+
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{AUTH_DB_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{AUTH_DB_PATH}"
+
+DB_POOL_SIZE = int(os.getenv("AUTH_DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("AUTH_DB_MAX_OVERFLOW", 10))
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Async engine used by the API handlers
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
+
+async def create_auth_tables() -> None:
+    """Create any missing auth tables. Schema changes go through `alembic -n auth`."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+def copy_legacy_auth_data(tables=("users", "credentials")) -> None:
+    """
+    One-off copy of users/credentials from logs.db into the auth database.
+
+    Only runs while the auth tables are still empty, so it is safe to call on every start.
+    """
+    if not os.path.exists(LEGACY_DB_PATH) or os.path.abspath(LEGACY_DB_PATH) == os.path.abspath(AUTH_DB_PATH):
+        return
+
+    conn = sqlite3.connect(AUTH_DB_PATH)
+    try:
+        if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]:
+            return
+        conn.execute("ATTACH DATABASE ? AS legacy", (LEGACY_DB_PATH,))
+        legacy_tables = {
+            row[0] for row in conn.execute("SELECT name FROM legacy.sqlite_master WHERE type = 'table'")
+        }
+        for table in tables:
+            if table not in legacy_tables:
+                continue
+            columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+            legacy_columns = {row[1] for row in conn.execute(f"PRAGMA legacy.table_info({table})")}
+            shared = ", ".join(c for c in columns if c in legacy_columns)
+            conn.execute(f"INSERT OR IGNORE INTO main.{table} ({shared}) SELECT {shared} FROM legacy.{table}")
+        conn.commit()
+        conn.execute("DETACH DATABASE legacy")
     finally:
-        db.close() 
\ No newline at end of file
+        conn.close()
@@ -1,9 +1,12 @@
+import asyncio
 import json
-from fastapi import FastAPI, HTTPException, Depends, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import uvicorn
 from datetime import datetime, timedelta
@@ -11,31 +14,83 @@ from fastapi import Query
 
 from aiocache import cached, Cache
 
-from app.platforms.aws import AWSPlatform
 from app.platforms.local import LocalPlatform
 
-from .database import get_db, engine
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware, metrics_response, monitor_event_loop
+from .database import get_async_db, create_auth_tables, copy_legacy_auth_data
 from .models import credentials, users
 from .schemas import CredentialCreate, CredentialResponse, LogQuery, UserCreate, User, Token
 from .services import credential_service, platform_service
+from .services.cache_service import (
+    result_cache,
+    logs_key,
+    snap_window,
+    trim_logs,
+    window_ttl,
+    LOG_GROUPS_TTL
+)
+from .services.response_service import (
+    FastJSONResponse,
+    parse_fields,
+    shape_logs
+)
+from .services.response_service import dumps
+from .services.stream_service import (
+    DROP_POLICIES,
+    TAIL_DROP_POLICY,
+    TailMultiplexer,
+    filter_events,
+    sse_batches
+)
+from .services.coalesce_service import (
+    credentials_fingerprint,
+    flight_key,
+    request_flights,
+    tail_hub
+)
+from .services.deadline_service import (
+    MAX_QUERY_BUDGET_SECONDS,
+    QUERY_BUDGET_SECONDS,
+    ClientDisconnected,
+    QueryBudget,
+    until_disconnected
+)
+from .services.cursor_service import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    query_fingerprint
+)
 from .auth import (
     get_current_user,
+    get_user_by_username,
     authenticate_user,
     create_access_token,
     get_password_hash,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
-# Create tables
-users.Base.metadata.create_all(bind=engine)
-credentials.Base.metadata.create_all(bind=engine)
-
 platform_service = platform_service.PlatformService()
 
-local_log_dict = platform_service.get_system_logs()
 log_levels = platform_service.get_log_levels()
 
-app = FastAPI(title="Log Management System")
+# Largest page for /logs?limit=...
+MAX_PAGE_SIZE = 10000
+
+TAIL_POLICY_PATTERN = f"^({'|'.join(DROP_POLICIES)})$"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_auth_tables()
+    await asyncio.to_thread(copy_legacy_auth_data)
+    loop_monitor = asyncio.create_task(monitor_event_loop())
+    try:
+        yield
+    finally:
+        loop_monitor.cancel()
+
+app = FastAPI(title="Log Management System", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -46,36 +101,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+# gzip/zstd for /logs and the SSE tails; tiny responses are sent as-is
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Outermost, so endpoint latency includes compression
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics. Cache and tail figures are only gathered when scraped."""
+    return metrics_response()
 
 @app.post("/register", response_model=User)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
-    db_user = db.query(users.User).filter(users.User.username == user.username).first()
+    db_user = await get_user_by_username(db, user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     db_user = users.User(
         username=user.username,
         email=user.email,
-        hashed_password=get_password_hash(user.password)
+        hashed_password=await run_in_threadpool(get_password_hash, user.password)
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get access token"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,7 +152,7 @@ async def login_for_access_token(
 async def add_credentials(
     platform: str,
     credential: CredentialCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Add credentials for a specific platform"""
@@ -101,7 +161,7 @@ async def add_credentials(
 @app.get("/credentials/{platform}")
 async def get_credentials(
     platform: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get credentials for a specific platform"""
@@ -115,19 +175,20 @@ async def get_log_types(platform: str):
     return {"logTypes": log_types}
 
 @app.get("/log-groups")
-@cached(ttl=60, cache=Cache.MEMORY)
 async def get_log_groups(
     platform: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get available log groups for the specified platform."""
+    cache_key = ("log_groups", current_user.id, platform)
+    cached_result = result_cache.get(cache_key)
+    if cached_result is not None:
+        return cached_result
+
     try:
         if platform == "aws" or platform == "azure" or platform == "gcp" or platform == "els":
-            credential = db.query(credentials.Credential).filter(
-                credentials.Credential.user_id == current_user.id,
-                credentials.Credential.platform == platform
-            ).first()
+            credential = await credential_service.get_credentials(db, platform, current_user.id)
             
             if not credential:
                 raise HTTPException(status_code=404, detail="Credentials not found")
@@ -136,17 +197,22 @@ async def get_log_groups(
             if not platform_instance:
                 raise HTTPException(status_code=404, detail="Platform not configured")
                 
-            log_groups = await platform_instance.get_log_groups(credential.get_credentials())
+            log_groups = await request_flights.do(
+                flight_key(cache_key, credential),
+                lambda: platform_instance.get_log_groups(credential)
+            )
         else:
             raise HTTPException(status_code=404, detail="Platform not configured")
-        return {"log_groups": log_groups}
+        result = {"log_groups": log_groups}
+        result_cache.set(cache_key, result, ttl=LOG_GROUPS_TTL)
+        return result
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/logs")
-@cached(ttl=60, cache=Cache.MEMORY)
 async def get_logs(
+    request: Request,
     platform: str,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
@@ -155,10 +221,33 @@ async def get_logs(
     log_level: Optional[str] = None,
     file_path: Optional[str] = None,
     keyword: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = Query("rows", pattern="^(rows|columnar)$"),
+    timeout: Optional[float] = Query(None, gt=0, le=MAX_QUERY_BUDGET_SECONDS),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all logs for the specified platform and filters."""
+    """
+    Get logs for the specified platform and filters.
+
+    When `limit` is given only one page is returned, along with an opaque
+    `next` cursor to pass back for the following page (null on the last page).
+    `fields` projects a comma-separated subset of timestamp,message,source,level
+    and `format=columnar` returns parallel arrays instead of one object per log.
+
+    Fetching stops after `timeout` seconds (LOGS_QUERY_BUDGET_SECONDS by
+    default). The logs gathered so far are then returned with
+    `truncated: true` and a `resume_cursor`. Passing that cursor back
+    without a `limit` continues the query. If the client disconnects, the
+    upstream fetch is cancelled.
+    """
+    try:
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         platform_instance = await platform_service.get_user_platform(platform)
         if not platform_instance:
@@ -168,7 +257,7 @@ async def get_logs(
         filters = {}
 
         if log_type and platform == "local":
-            filters["path"] = f"{local_log_dict[log_type]}"
+            filters["path"] = f"{platform_service.get_local_logs()[log_type]}"
 
         if file_path and platform == "file":
             filters["path"] = file_path
@@ -182,20 +271,99 @@ async def get_logs(
         if keyword:
             filters["keyword"] = keyword
 
-        logs = await platform_instance.get_logs(
-            credentials={"path": filters.get("path", "/var/log/syslog")} if platform in ["local", "file"] else db.query(credentials.Credential).filter(
-                credentials.Credential.user_id == current_user.id,
-                credentials.Credential.platform == platform
-            ).first().get_credentials(),
-            start_time=start_time or datetime.now() - timedelta(hours=1),
-            end_time=end_time or datetime.now(),
-            filters=filters
+        source = filters.get("path") or filters.get("log_group")
+        fingerprint = query_fingerprint(platform, source, filters)
+        position = None
+        if cursor:
+            # Later pages reuse the window the first page was issued for
+            try:
+                position, start_time, end_time, window = decode_cursor(cursor, platform, fingerprint)
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            # Fetch and cache the window snapped to cache buckets so near-identical
+            # queries share an entry; what is returned is trimmed back to `window`
+            window = (start_time or datetime.now() - timedelta(hours=1), end_time or datetime.now())
+            start_time, end_time = snap_window(*window)
+
+        def respond(result):
+            trimmed = {**result, "logs": trim_logs(result["logs"], *window)}
+            return FastJSONResponse(shape_logs(trimmed, selected_fields, format))
+
+        cache_key = logs_key(
+            current_user.id,
+            platform,
+            source,
+            {**filters, "limit": limit, "cursor": cursor},
+            start_time,
+            end_time
         )
-        
-        return {
-            "logs": logs
-        }
+        cached_result = result_cache.get(cache_key)
+        if cached_result is not None:
+            return respond(cached_result)
+
+        if platform in ["local", "file"]:
+            platform_credentials = {"path": filters.get("path", "/var/log/syslog")}
+        else:
+            platform_credentials = await credential_service.get_credentials(db, platform, current_user.id)
+            if not platform_credentials:
+                raise HTTPException(status_code=404, detail="Credentials not found")
+
+        async def fetch():
+            budget = QueryBudget(timeout or QUERY_BUDGET_SECONDS)
+            next_cursor = resume_cursor = None
+            try:
+                if limit:
+                    logs, next_position = await platform_instance.get_logs_page(
+                        credentials=platform_credentials,
+                        start_time=start_time,
+                        end_time=end_time,
+                        filters=filters,
+                        limit=limit,
+                        position=position,
+                        budget=budget
+                    )
+                    if next_position is not None:
+                        next_cursor = encode_cursor(platform, next_position, fingerprint, start_time, end_time, window)
+                        if budget.expired():
+                            resume_cursor = next_cursor
+                else:
+                    logs, resume_position = await platform_instance.collect_logs(
+                        credentials=platform_credentials,
+                        start_time=start_time,
+                        end_time=end_time,
+                        filters=filters,
+                        budget=budget,
+                        position=position
+                    )
+                    if resume_position is not None:
+                        resume_cursor = encode_cursor(platform, resume_position, fingerprint, start_time, end_time, window)
+            except asyncio.CancelledError:
+                # Let readers running in worker threads stop at their next check
+                budget.cancel()
+                raise
+            return {
+                "logs": logs,
+                "next": next_cursor,
+                "truncated": resume_cursor is not None,
+                "resume_cursor": resume_cursor
+            }
 
+        # Identical concurrent queries with the same credentials and time budget share
+        # one upstream fetch, which is cancelled once every client waiting on it has
+        # disconnected. The budget is part of the key so a longer timeout never gets
+        # a result cut short by another caller's budget.
+        key = flight_key(cache_key, platform_credentials) + (timeout or QUERY_BUDGET_SECONDS,)
+        try:
+            result = await until_disconnected(request, request_flights.do(key, fetch))
+        except ClientDisconnected:
+            return Response(status_code=499)
+        if not result["truncated"]:
+            result_cache.set(cache_key, result, ttl=window_ttl(end_time))
+        return respond(result)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -203,20 +371,22 @@ async def get_logs(
 @app.get("/logs/tail/aws")
 async def tail_logs(
     log_group_name: str, 
-    db: Session = Depends(get_db), 
+    policy: str = Query(TAIL_DROP_POLICY, pattern=TAIL_POLICY_PATTERN),
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
     ):
-    credential = db.query(credentials.Credential).filter(
-        credentials.Credential.user_id == current_user.id,
-        credentials.Credential.platform == "aws"
-    ).first().get_credentials()
-    aws_platform = AWSPlatform()
+    credential = await credential_service.get_credentials(db, "aws", current_user.id)
+    if not credential:
+        raise HTTPException(status_code=404, detail="Credentials not found")
+    aws_platform = await platform_service.get_user_platform("aws")
     try:
-        async def event_stream():
-            async for log_event in aws_platform.tail_logs(credential, log_group_name):
-                yield f"data: {json.dumps(log_event.__dict__, cls=DateTimeEncoder)}\n\n"
+        events = tail_hub.subscribe(
+            ("tail", credentials_fingerprint(credential), "aws", log_group_name),
+            lambda: aws_platform.tail_logs(credential, log_group_name)
+        )
+        event_stream = sse_batches(events, policy=policy)
 
-        return StreamingResponse(event_stream(), 
+        return StreamingResponse(event_stream, 
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache", 
@@ -232,17 +402,19 @@ async def tail_logs(
 async def tail_logs(
     platform: str,
     log_type: Optional[str] = None,
-    file_path: Optional[str] = None
+    file_path: Optional[str] = None,
+    policy: str = Query(TAIL_DROP_POLICY, pattern=TAIL_POLICY_PATTERN)
 ):
     local_platform = LocalPlatform()
     try:
-        async def event_stream():
-            async for log_event in local_platform.tail_logs(
-                credentials={"path": local_log_dict[log_type] if platform == "local" else file_path}
-                ):
-                yield f"data: {json.dumps(log_event, cls=DateTimeEncoder)}\n\n"
+        path = platform_service.get_local_logs()[log_type] if platform == "local" else file_path
+        events = tail_hub.subscribe(
+            ("tail", "local", path),
+            lambda: local_platform.tail_logs(credentials={"path": path})
+        )
+        event_stream = sse_batches(events, policy=policy)
 
-        return StreamingResponse(event_stream(), 
+        return StreamingResponse(event_stream, 
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache", 
@@ -254,5 +426,94 @@ async def tail_logs(
         print("Error while tailing logs:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def open_tail(message: dict, db: AsyncSession, current_user: User):
+    """Open the tail described by a WebSocket subscribe message."""
+    platform = message["platform"]
+    source = message["source"]
+    if platform in ["local", "file"]:
+        path = platform_service.get_local_logs()[source] if platform == "local" else source
+        events = tail_hub.subscribe(
+            ("tail", "local", path),
+            lambda: LocalPlatform().tail_logs(credentials={"path": path})
+        )
+    else:
+        credential = await credential_service.get_credentials(db, platform, current_user.id)
+        if not credential:
+            raise ValueError("Credentials not found")
+        platform_instance = await platform_service.get_user_platform(platform)
+        events = tail_hub.subscribe(
+            ("tail", credentials_fingerprint(credential), platform, source),
+            lambda: platform_instance.tail_logs(credential, source)
+        )
+    return filter_events(events, level=message.get("level"), keyword=message.get("keyword"))
+
+@app.websocket("/ws/tail")
+async def tail_websocket(
+    websocket: WebSocket,
+    token: str,
+    encoding: str = "json",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Tail many sources over one connection.
+
+    Client messages:
+        {"op": "subscribe", "id": "s1", "platform": "aws", "source": "<log group>",
+         "level": "ERROR", "keyword": "timeout", "policy": "drop_oldest"}
+        {"op": "unsubscribe", "id": "s1"}
+    Server frames are tagged with the subscription id and carry `events`,
+    `dropped`, `error`, `overflow` or an `op` acknowledgement. With
+    encoding=binary frames are sent as binary JSON messages.
+    """
+    try:
+        current_user = await get_current_user(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    if encoding == "binary":
+        async def send(frame):
+            await websocket.send_bytes(dumps(frame))
+    else:
+        async def send(frame):
+            await websocket.send_text(dumps(frame).decode())
+
+    multiplexer = TailMultiplexer(send)
+    writer = asyncio.create_task(multiplexer.run_writer())
+    try:
+        while True:
+            data = await (websocket.receive_bytes() if encoding == "binary" else websocket.receive_text())
+            # A malformed message is answered with an error, not by closing every subscription
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await multiplexer.outbox.put({"error": "Messages must be JSON objects"})
+                continue
+            op = message.get("op")
+            sub_id = str(message.get("id", ""))
+            try:
+                if op == "subscribe":
+                    policy = message.get("policy", TAIL_DROP_POLICY)
+                    multiplexer.subscribe(sub_id, await open_tail(message, db, current_user), policy)
+                    await multiplexer.outbox.put({"id": sub_id, "op": "subscribed"})
+                elif op == "unsubscribe":
+                    if not multiplexer.unsubscribe(sub_id):
+                        raise ValueError(f"Unknown subscription {sub_id}")
+                    await multiplexer.outbox.put({"id": sub_id, "op": "unsubscribed"})
+                else:
+                    raise ValueError(f"Unknown op {op}")
+            except KeyError as e:
+                await multiplexer.outbox.put({"id": sub_id, "error": f"Missing or unknown value: {e}"})
+            except ValueError as e:
+                await multiplexer.outbox.put({"id": sub_id, "error": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await multiplexer.close()
+        writer.cancel()
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", reload=True)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+T = TypeVar("T")
+
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", 0.5))
+
+REQUEST_LATENCY = Histogram(
+    "logs_http_request_duration_seconds",
+    "Time until the response headers are sent, per endpoint",
+    ["method", "route", "status"]
+)
+UPSTREAM_CALLS = Counter(
+    "logs_upstream_calls_total",
+    "Calls made to log platform APIs",
+    ["platform", "operation", "outcome"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "logs_upstream_call_duration_seconds",
+    "Latency of log platform API calls",
+    ["platform", "operation"]
+)
+UPSTREAM_PAGES = Counter(
+    "logs_upstream_pages_total",
+    "Result pages fetched from log platform APIs",
+    ["platform", "operation"]
+)
+LOCAL_BYTES_SCANNED = Counter(
+    "logs_local_bytes_scanned_total",
+    "Bytes read from local log files"
+)
+LOCAL_LINES_SCANNED = Counter(
+    "logs_local_lines_scanned_total",
+    "Lines read from local log files"
+)
+LOOP_LAG = Gauge(
+    "logs_event_loop_lag_seconds",
+    "How late the last event loop lag probe woke up"
+)
+LOOP_LAG_HISTOGRAM = Histogram(
+    "logs_event_loop_lag_distribution_seconds",
+    "Event loop lag probe samples",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+def _record_call(platform: str, operation: str, start: float, outcome: str) -> None:
+    UPSTREAM_LATENCY.labels(platform, operation).observe(time.perf_counter() - start)
+    UPSTREAM_CALLS.labels(platform, operation, outcome).inc()
+
+
+@contextmanager
+def upstream_call(platform: str, operation: str, page: bool = False) -> Iterator[None]:
+    """Count and time one call to a platform API; `page` also counts it as a fetched page."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        _record_call(platform, operation, start, "error")
+        raise
+    _record_call(platform, operation, start, "ok")
+    if page:
+        UPSTREAM_PAGES.labels(platform, operation).inc()
+
+
+def upstream_pages(platform: str, operation: str, pages: Iterable[T]) -> Iterator[T]:
+    """Wrap a lazy paginator so that fetching each page is counted and timed as a call."""
+    iterator = iter(pages)
+    while True:
+        start = time.perf_counter()
+        try:
+            page = next(iterator)
+        except StopIteration:
+            return
+        except BaseException:
+            _record_call(platform, operation, start, "error")
+            raise
+        _record_call(platform, operation, start, "ok")
+        UPSTREAM_PAGES.labels(platform, operation).inc()
+        yield page
+
+
+class _StatsCollector:
+    """Reads cache, coalescing and tail statistics only when /metrics is scraped."""
+
+    def collect(self):
+        from .services.cache_service import credential_cache, result_cache, token_cache
+        from .services.coalesce_service import request_flights, tail_hub
+
+        caches = {"results": result_cache, "tokens": token_cache, "credentials": credential_cache}
+        # Cumulative counts are counters (exported as *_total), current levels are gauges
+        families = {
+            name: metric_type(f"logs_cache_{name}", help_text, labels=["cache"])
+            for name, metric_type, help_text in (
+                ("hits", CounterMetricFamily, "Cache hits"),
+                ("misses", CounterMetricFamily, "Cache misses"),
+                ("evictions", CounterMetricFamily, "Entries evicted to stay within budget"),
+                ("expirations", CounterMetricFamily, "Entries dropped after their TTL"),
+                ("hit_ratio", GaugeMetricFamily, "Cache hits / lookups"),
+                ("entries", GaugeMetricFamily, "Entries currently cached"),
+                ("bytes", GaugeMetricFamily, "Estimated size of cached entries"),
+            )
+        }
+        for cache_name, cache in caches.items():
+            stats = cache.stats()
+            for name, family in families.items():
+                family.add_metric([cache_name], stats[name])
+        yield from families.values()
+
+        flights = request_flights.stats()
+        yield GaugeMetricFamily("logs_upstream_in_flight", "Distinct upstream queries running", value=flights["in_flight"])
+        yield CounterMetricFamily("logs_coalesced_requests", "Requests served by joining an identical query", value=flights["coalesced"])
+
+        tails = tail_hub.stats()
+        yield GaugeMetricFamily("logs_tail_upstreams", "Upstream tails currently running", value=tails["tails"])
+        yield GaugeMetricFamily("logs_tail_subscribers", "Active tail subscribers", value=tails["subscribers"])
+        yield CounterMetricFamily("logs_tail_coalesced", "Tail subscriptions that joined a running upstream tail", value=tails["coalesced"])
+
+
+REGISTRY.register(_StatsCollector())
+
+
+def metrics_response() -> Response:
+    """Render every registered metric in the Prometheus text format."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+async def monitor_event_loop(interval: float = LOOP_LAG_INTERVAL) -> None:
+    """Sleep for `interval` in a loop and record how late each wake-up is."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+class MetricsMiddleware:
+    """
+    Record per-endpoint latency up to the start of the response.
+
+    Requests are labelled with the matched route template rather than the
+    raw path, and streaming responses stop the clock at their headers so
+    long-lived tails do not skew the histogram.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record(500)
+
@@ -2,6 +2,8 @@ from sqlalchemy import Column, Integer, String, JSON, ForeignKey
 from sqlalchemy.orm import relationship
 from ..database import Base
 from cryptography.fernet import Fernet
+import ast
+import json
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -21,10 +23,14 @@ class Credential(Base):
     
     def set_credentials(self, data: dict):
         """Encrypt credentials before storing"""
-        encrypted = cipher_suite.encrypt(str(data).encode())
+        encrypted = cipher_suite.encrypt(json.dumps(data).encode())
         self.encrypted_data = encrypted.decode()
     
     def get_credentials(self) -> dict:
         """Decrypt stored credentials"""
-        decrypted = cipher_suite.decrypt(self.encrypted_data.encode())
-        return eval(decrypted.decode())
\ No newline at end of file
+        decrypted = cipher_suite.decrypt(self.encrypted_data.encode()).decode()
+        try:
+            return json.loads(decrypted)
+        except ValueError:
+            # Rows written before credentials were stored as JSON hold a dict repr
+            return ast.literal_eval(decrypted)
\ No newline at end of file
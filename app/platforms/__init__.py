@@ -1,20 +1,50 @@
-from .aws import AWSPlatform
-from .local import LocalPlatform
+import importlib
+from typing import Dict, Optional
+
 from .base import LogPlatform
-from .els import ElasticsearchPlatform
-from .google import GoogleCloudPlatform
-from .azure import AzurePlatform
-
-def get_platform_handler(platform_type: str) -> LogPlatform:
-    """Get the appropriate platform handler."""
-    handlers = {
-        'aws': AWSPlatform(),
-        'local': LocalPlatform(),
-        'els': ElasticsearchPlatform(),
-        'gcp': GoogleCloudPlatform(),
-        'azure': AzurePlatform(),
-        # Add more platform handlers here
-    }
-    return handlers.get(platform_type)
-
-__all__ = ['get_platform_handler', 'AWSPlatform', 'LogPlatform', 'ElasticsearchPlatform', 'GoogleCloudPlatform', 'AzurePlatform'] 
\ No newline at end of file
+
+# platform id -> (module, class). Modules (and the cloud SDKs they pull in)
+# are only imported the first time a platform is requested.
+PLATFORM_REGISTRY = {
+    'aws': ('.aws', 'AWSPlatform'),
+    'local': ('.local', 'LocalPlatform'),
+    'file': ('.local', 'LocalPlatform'),
+    'els': ('.els', 'ElasticsearchPlatform'),
+    'gcp': ('.google', 'GoogleCloudPlatform'),
+    'azure': ('.azure', 'AzurePlatform'),
+    # Add more platform handlers here
+}
+
+_CLASS_MODULES = {class_name: module for module, class_name in PLATFORM_REGISTRY.values()}
+
+_handlers: Dict[str, LogPlatform] = {}
+
+
+def get_platform_class(platform_type: str) -> Optional[type]:
+    """Import and return the handler class for a platform id."""
+    entry = PLATFORM_REGISTRY.get(platform_type)
+    if entry is None:
+        return None
+    module_name, class_name = entry
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+def get_platform_handler(platform_type: str) -> Optional[LogPlatform]:
+    """Get the appropriate platform handler, creating it on first use."""
+    handler = _handlers.get(platform_type)
+    if handler is None:
+        platform_class = get_platform_class(platform_type)
+        if platform_class is None:
+            return None
+        handler = _handlers[platform_type] = platform_class()
+    return handler
+
+
+def __getattr__(name):
+    # Keep `from app.platforms import AWSPlatform` working without eager imports
+    if name in _CLASS_MODULES:
+        return getattr(importlib.import_module(_CLASS_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['get_platform_handler', 'get_platform_class', 'PLATFORM_REGISTRY', 'AWSPlatform', 'LocalPlatform', 'LogPlatform', 'ElasticsearchPlatform', 'GoogleCloudPlatform', 'AzurePlatform']
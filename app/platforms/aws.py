@@ -1,8 +1,11 @@
 from .base import LogPlatform
-from ..reader.cloud import CloudWatchLogsReader
+from ..reader.aws import CloudWatchLogsReader
 from typing import Optional
+import asyncio
 
 class AWSPlatform(LogPlatform):
+    native_paging = True
+
     async def get_logs(self, credentials, start_time, end_time, filters):
 
         if not filters.get('log_group'):
@@ -21,6 +24,32 @@ class AWSPlatform(LogPlatform):
             filter_pattern=filters.get('level')
         )
         
+        return self._format_logs(logs)
+
+    async def get_logs_page(self, credentials, start_time, end_time, filters, limit, position=None, budget=None):
+        if not filters.get('log_group'):
+            raise ValueError("log_group is required")
+
+        reader = CloudWatchLogsReader(
+            region_name=credentials['region'],
+            aws_access_key=credentials['access_key'],
+            aws_secret_key=credentials['secret_key']
+        )
+
+        # Pages are fetched off the event loop so the request can be cancelled meanwhile
+        logs, next_token = await asyncio.to_thread(
+            reader.get_log_events_page,
+            log_group_name=filters['log_group'],
+            start_time=start_time,
+            end_time=end_time,
+            filter_pattern=filters.get('level'),
+            limit=limit,
+            next_token=position,
+            budget=budget
+        )
+        return self._format_logs(logs), next_token
+
+    def _format_logs(self, logs):
         return [
             {
                 'timestamp': log.timestamp.isoformat(),
@@ -59,4 +88,5 @@ class AWSPlatform(LogPlatform):
             async for log_event in reader.tail_logs(log_group_name, interval, filter_pattern):
                 yield log_event
         except Exception as e:
-            print(f"Error while tailing logs: {str(e)}")
\ No newline at end of file
+            print(f"Error while tailing logs: {str(e)}")
+            raise
\ No newline at end of file
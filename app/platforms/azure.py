@@ -1,5 +1,5 @@
 from .base import LogPlatform
-from ..reader.cloud import AzureLogReader
+from ..reader.azure import AzureLogReader
 from typing import Optional
 
 class AzurePlatform(LogPlatform):
@@ -61,4 +61,5 @@ class AzurePlatform(LogPlatform):
             async for log_event in reader.tail_logs(log_workspace_id, interval, filter_pattern):
                 yield log_event
         except Exception as e:
-            print(f"Error while tailing logs: {str(e)}")
\ No newline at end of file
+            print(f"Error while tailing logs: {str(e)}")
+            raise
\ No newline at end of file
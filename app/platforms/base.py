@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 class LogPlatform(ABC):
+    # Set by platforms whose get_logs_page resumes from a native position
+    # rather than re-reading the whole result
+    native_paging = False
+
     @abstractmethod
     async def get_logs(
         self,
@@ -14,6 +18,58 @@ class LogPlatform(ABC):
         """Retrieve logs from the platform"""
         pass
 
+    async def get_logs_page(
+        self,
+        credentials: Dict[str, str],
+        start_time: datetime,
+        end_time: datetime,
+        filters: Dict[str, Any],
+        limit: int,
+        position: Optional[Any] = None,
+        budget: Optional[Any] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """
+        Retrieve one page of logs and the position of the next page (None when exhausted).
+
+        Platforms override this to use their native continuation token; the
+        default falls back to an offset into the full result. Platforms that
+        make several upstream calls per page stop early once `budget` has
+        expired and return the position reached so far.
+        """
+        logs = await self.get_logs(credentials, start_time, end_time, filters)
+        offset = int(position or 0)
+        next_offset = offset + limit
+        return logs[offset:next_offset], next_offset if next_offset < len(logs) else None
+
+    async def collect_logs(
+        self,
+        credentials: Dict[str, str],
+        start_time: datetime,
+        end_time: datetime,
+        filters: Dict[str, Any],
+        budget: Any,
+        position: Optional[Any] = None,
+        page_size: int = 10000
+    ) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """
+        Retrieve logs page by page until the result is exhausted or `budget` expires.
+
+        Returns the logs and the position to resume from, which is None when
+        the result is complete.
+        """
+        if not self.native_paging:
+            logs = await self.get_logs(credentials, start_time, end_time, filters)
+            return logs[int(position or 0):], None
+
+        logs = []
+        while True:
+            page, position = await self.get_logs_page(
+                credentials, start_time, end_time, filters, page_size, position, budget
+            )
+            logs.extend(page)
+            if position is None or budget.expired():
+                return logs, position
+
     @abstractmethod
     def validate_credentials(self, credentials: Dict[str, str]) -> bool:
         """Validate platform-specific credentials"""
@@ -1,8 +1,11 @@
 from .base import LogPlatform
-from ..reader.cloud import ElasticsearchLogsReader
+from ..reader.els import ElasticsearchLogsReader
 from typing import Optional
+import asyncio
 
 class ElasticsearchPlatform(LogPlatform):
+    native_paging = True
+
     async def get_logs(self, credentials, start_time, end_time, filters):
         if not filters.get('log_group'):
             raise ValueError("index is required")
@@ -21,6 +24,31 @@ class ElasticsearchPlatform(LogPlatform):
             query_filter=filters.get('level')
         )
         
+        return self._format_logs(logs)
+
+    async def get_logs_page(self, credentials, start_time, end_time, filters, limit, position=None, budget=None):
+        if not filters.get('log_group'):
+            raise ValueError("index is required")
+
+        reader = ElasticsearchLogsReader(
+            host=credentials['host'],
+            username=credentials.get('username'),
+            password=credentials.get('password'),
+            api_key=credentials.get('api_key')
+        )
+
+        logs, search_after = await asyncio.to_thread(
+            reader.get_log_events_page,
+            index_name=filters['log_group'],
+            start_time=start_time,
+            end_time=end_time,
+            query_filter=filters.get('level'),
+            limit=limit,
+            search_after=position
+        )
+        return self._format_logs(logs), search_after
+
+    def _format_logs(self, logs):
         return [
             {
                 'timestamp': log.timestamp.isoformat(),
@@ -67,4 +95,5 @@ class ElasticsearchPlatform(LogPlatform):
             async for log_event in reader.tail_logs(index_name, interval, filter_pattern):
                 yield log_event
         except Exception as e:
-            print(f"Error while tailing logs: {str(e)}")
\ No newline at end of file
+            print(f"Error while tailing logs: {str(e)}")
+            raise
\ No newline at end of file
@@ -1,8 +1,11 @@
 from .base import LogPlatform
-from ..reader.cloud import GoogleCloudLogsReader
+from ..reader.google import GoogleCloudLogsReader
 from typing import Optional
+import asyncio
 
 class GoogleCloudPlatform(LogPlatform):
+    native_paging = True
+
     async def get_logs(self, credentials, start_time, end_time, filters):
         if not filters.get('log_group'):
             raise ValueError("log_name is required")
@@ -20,6 +23,30 @@ class GoogleCloudPlatform(LogPlatform):
             filter_pattern=filters.get('level')
         )
         
+        return self._format_logs(logs)
+
+    async def get_logs_page(self, credentials, start_time, end_time, filters, limit, position=None, budget=None):
+        if not filters.get('log_group'):
+            raise ValueError("log_name is required")
+
+        reader = GoogleCloudLogsReader(
+            project_id=credentials['project_id'],
+            credentials_path=credentials.get('credentials_path'),
+            service_account_info=credentials.get('service_account_info')
+        )
+
+        logs, page_token = await asyncio.to_thread(
+            reader.get_log_events_page,
+            log_name=filters['log_group'],
+            start_time=start_time,
+            end_time=end_time,
+            filter_pattern=filters.get('level'),
+            limit=limit,
+            page_token=position
+        )
+        return self._format_logs(logs), page_token
+
+    def _format_logs(self, logs):
         return [
             {
                 'timestamp': log.timestamp.isoformat(),
@@ -64,4 +91,5 @@ class GoogleCloudPlatform(LogPlatform):
             async for log_event in reader.tail_logs(log_name, interval, filter_pattern):
                 yield log_event
         except Exception as e:
-            print(f"Error while tailing logs: {str(e)}")
\ No newline at end of file
+            print(f"Error while tailing logs: {str(e)}")
+            raise
\ No newline at end of file
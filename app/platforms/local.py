@@ -1,23 +1,19 @@
 from .base import LogPlatform
+from ..reader.levels import parse_log_level, parse_log_levels
+from ..metrics import LOCAL_BYTES_SCANNED, LOCAL_LINES_SCANNED
 from pathlib import Path
 from datetime import datetime
-from typing import AsyncGenerator, Dict, List, Any
+from typing import AsyncGenerator, Dict, List, Any, Optional, Tuple
 import re
 import asyncio
 import os
 
 class LocalPlatform(LogPlatform):
+    native_paging = True
 
     def parse_log_level(self, line: str) -> str:
-            """Parse log level from line. Default to INFO if not found."""
-            line_lower = line.lower()
-            if 'error' in line_lower:
-                return 'ERROR'
-            elif 'warn' in line_lower:
-                return 'WARN'
-            elif 'debug' in line_lower:
-                return 'DEBUG'
-            return 'INFO'
+        """Parse log level from line. Default to INFO if not found."""
+        return parse_log_level(line)
         
 
     def extract_timestamp(self, line: str) -> str:
@@ -49,46 +45,117 @@ class LocalPlatform(LogPlatform):
         # If no timestamp is found, return current time
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-    async def get_logs(
+    # Lines are classified in batches of this size while scanning
+    LEVEL_BATCH_SIZE = 1000
+
+    def _read_logs(
         self,
-        credentials: Dict[str, str],
+        path: str,
         start_time: datetime,
         end_time: datetime,
-        filters: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """Read logs from local files."""
+        filters: Dict[str, Any],
+        offset: int = 0,
+        limit: Optional[int] = None,
+        budget: Optional[Any] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Scan a log file from a byte offset.
+
+        Returns the matching entries and the byte offset just past the last
+        returned line, or None once the end of the file has been reached.
+        The scan also stops, every LEVEL_BATCH_SIZE lines, once `budget` has expired.
+        """
         logs = []
-        path = credentials.get('path', '/var/log/syslog')  # Default path if not specified
         start_time = datetime.fromisoformat(start_time.isoformat()).strftime("%Y-%m-%d %H:%M:%S")
         end_time = datetime.fromisoformat(end_time.isoformat()).strftime("%Y-%m-%d %H:%M:%S")
-        
-        try:
-            log_path = Path(path)
-            if log_path.is_file():
-                with open(log_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        log_entry = {
-                            'timestamp': self.extract_timestamp(line),
-                            'message': line,
-                            'source': 'local',
-                            'level': self.parse_log_level(line)
-                        }
+        level = filters['level'].upper() if 'level' in filters else None
+
+        log_path = Path(path)
+        if not log_path.is_file():
+            return logs, None
+
+        with open(log_path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            f.seek(offset)
+            lines_scanned = 0
+            try:
+                pending = []  # (entry, offset after the line)
+                while True:
+                    raw = f.readline()
+                    if raw:
+                        lines_scanned += 1
+                        line = raw.decode('utf-8', errors='replace').strip()
+                        timestamp = self.extract_timestamp(line)
                         # Filter by time range
-                        log_time = datetime.fromisoformat(log_entry['timestamp']).strftime("%Y-%m-%d %H:%M:%S")
+                        log_time = datetime.fromisoformat(timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
-                        if start_time <= log_time <= end_time:
-                            # Filter by name if provided
-                            if 'keyword' in filters and filters['keyword'] not in line:
-                                continue
+                        # Filter by name if provided
+                        if start_time <= log_time <= end_time and (
+                            'keyword' not in filters or filters['keyword'] in line
+                        ):
+                            pending.append(({
+                                'timestamp': timestamp,
+                                'message': line,
+                                'source': 'local',
+                            }, f.tell()))
+
+                    stop = bool(raw) and budget is not None and (
+                        lines_scanned % self.LEVEL_BATCH_SIZE == 0 and budget.expired()
+                    )
+                    if pending and (not raw or stop or len(pending) >= self.LEVEL_BATCH_SIZE):
+                        # Classify the surviving lines in one batch
+                        levels = parse_log_levels(entry['message'] for entry, _ in pending)
+                        for (entry, line_end), entry_level in zip(pending, levels):
                             # Filter by log level if provided
-                            if 'level' in filters and log_entry['level'].upper() != filters['level']:
+                            if level and entry_level != level:
                                 continue
-                            logs.append(log_entry)
+                            entry['level'] = entry_level
+                            logs.append(entry)
+                            if limit and len(logs) >= limit:
+                                return logs, line_end if line_end < file_size else None
+                        pending = []
+
+                    if stop:
+                        position = f.tell()
+                        return logs, position if position < file_size else None
+                    if not raw:
+                        return logs, None
+            finally:
+                LOCAL_LINES_SCANNED.inc(lines_scanned)
+                LOCAL_BYTES_SCANNED.inc(f.tell() - offset)
+
+    async def get_logs(
+        self,
+        credentials: Dict[str, str],
+        start_time: datetime,
+        end_time: datetime,
+        filters: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Read logs from local files."""
+        path = credentials.get('path', '/var/log/syslog')  # Default path if not specified
+        try:
+            logs, _ = await asyncio.to_thread(self._read_logs, path, start_time, end_time, filters)
         except Exception as e:
             print(f"Error reading local logs: {e}")
+            logs = []
         return logs
 
+    async def get_logs_page(
+        self,
+        credentials: Dict[str, str],
+        start_time: datetime,
+        end_time: datetime,
+        filters: Dict[str, Any],
+        limit: int,
+        position: Optional[Any] = None,
+        budget: Optional[Any] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Read one page of logs, using the file byte offset as the position."""
+        path = credentials.get('path', '/var/log/syslog')  # Default path if not specified
+        return await asyncio.to_thread(
+            self._read_logs, path, start_time, end_time, filters, int(position or 0), limit, budget
+        )
+
     def validate_credentials(self, credentials: Dict[str, str]) -> bool:
         """Local files don't require credentials."""
         return True
@@ -0,0 +1,157 @@
+import boto3
+from botocore.exceptions import ClientError
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Dict, List, Optional, Tuple, AsyncGenerator
+import asyncio
+from .events import LogEvent
+from .levels import parse_log_levels
+from ..metrics import upstream_call, upstream_pages
+
+class CloudWatchLogsReader:
+    """A class to read and process AWS CloudWatch logs."""
+    
+    def __init__(self, region_name: str = None, aws_access_key: str = None, aws_secret_key: str = None):
+        """Initialize the CloudWatch Logs reader."""
+        session = boto3.Session(
+            aws_access_key_id=aws_access_key,
+            aws_secret_access_key=aws_secret_key,
+            region_name=region_name)
+        self.client = session.client('logs')
+        
+    def _build_params(
+        self,
+        log_group_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        log_stream_name: Optional[str] = None,
+        filter_pattern: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build filter_log_events parameters."""
+        params = {
+            'logGroupName': log_group_name
+        }
+        
+        if start_time:
+            params['startTime'] = int(start_time.timestamp() * 1000)
+        if end_time:
+            params['endTime'] = int(end_time.timestamp() * 1000)
+        if log_stream_name:
+            params['logStreamNames'] = [log_stream_name]
+        if filter_pattern:
+            params['filterPattern'] = filter_pattern
+        return params
+
+    def _to_log_events(self, events: List[Dict[str, Any]]) -> List[LogEvent]:
+        """Convert one page of raw CloudWatch events, classifying levels in a batch."""
+        levels = parse_log_levels(event['message'] for event in events)
+        return [
+            LogEvent(
+                timestamp=datetime.fromtimestamp(event['timestamp'] / 1000),
+                message=event['message'],
+                log_stream=event['logStreamName'],
+                ingestion_time=datetime.fromtimestamp(event['ingestionTime'] / 1000),
+                level=level
+            ) for event, level in zip(events, levels)
+        ]
+
+    def get_log_events(
+        self,
+        log_group_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        log_stream_name: Optional[str] = None,
+        filter_pattern: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[LogEvent]:
+        """Retrieve log events from CloudWatch."""
+        params = self._build_params(
+            log_group_name, start_time, end_time, log_stream_name, filter_pattern
+        )
+        if limit:
+            params['limit'] = limit
+            
+        try:
+            paginator = self.client.get_paginator('filter_log_events')
+            for page in upstream_pages('aws', 'filter_log_events', paginator.paginate(**params)):
+                yield from self._to_log_events(page.get('events', []))
+                    
+        except ClientError as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+
+    def get_log_events_page(
+        self,
+        log_group_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filter_pattern: Optional[str] = None,
+        limit: int = 1000,
+        next_token: Optional[str] = None,
+        budget: Optional[Any] = None
+    ) -> Tuple[List[LogEvent], Optional[str]]:
+        """
+        Retrieve up to `limit` events starting at a CloudWatch nextToken.
+
+        Stops early, returning the token reached, once `budget.expired()`.
+        """
+        params = self._build_params(
+            log_group_name, start_time, end_time, filter_pattern=filter_pattern
+        )
+        events = []
+
+        try:
+            while len(events) < limit:
+                if next_token:
+                    params['nextToken'] = next_token
+                params['limit'] = min(limit - len(events), 10000)
+                with upstream_call('aws', 'filter_log_events', page=True):
+                    response = self.client.filter_log_events(**params)
+                events.extend(self._to_log_events(response.get('events', [])))
+                next_token = response.get('nextToken')
+                if not next_token or (budget is not None and budget.expired()):
+                    break
+        except ClientError as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+
+        return events, next_token
+        
+    def get_log_groups(self) -> List[Dict[str, str]]:
+        """Retrieve available log groups."""
+        try:
+            paginator = self.client.get_paginator('describe_log_groups')
+            log_groups = []
+            for page in upstream_pages('aws', 'describe_log_groups', paginator.paginate()):
+                for group in page.get('logGroups', []):
+                    log_groups.append({
+                        'name': group['logGroupName'],
+                        'arn': group.get('arn', ''),
+                        'storedBytes': group.get('storedBytes', 0),
+                        'creationTime': datetime.fromtimestamp(group['creationTime'] / 1000).isoformat()
+                    })
+            return log_groups
+        except ClientError as e:
+            raise Exception(f"Failed to fetch log groups: {str(e)}")
+
+
+    async def tail_logs(
+        self,
+        log_group_name: str,
+        interval: int = 5,
+        filter_pattern: Optional[str] = None
+    ) -> AsyncGenerator[LogEvent, None]:
+        """Continuously tail logs from CloudWatch (similar to 'tail -f')."""
+        last_timestamp = datetime.now() - timedelta(weeks=52)
+        
+        while True:
+            # Poll in a worker thread so a disconnected tail is cancelled right away
+            events = await asyncio.to_thread(list, self.get_log_events(
+                log_group_name=log_group_name,
+                start_time=last_timestamp,
+                filter_pattern=filter_pattern
+            ))
+            new_events = [event for event in events if event.timestamp > last_timestamp]
+            if new_events:
+                for event in new_events:
+                    yield event
+                last_timestamp = max(event.timestamp for event in new_events)
+            
+            await asyncio.sleep(interval)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Iterator, Dict, List, Optional, AsyncGenerator
+import asyncio
+from azure.identity import ClientSecretCredential
+from azure.monitor.query import LogsQueryClient
+from azure.mgmt.loganalytics import LogAnalyticsManagementClient
+from azure.identity import AzureAuthorityHosts
+from .events import LogEvent
+from .levels import parse_log_levels
+from ..metrics import upstream_call
+
+class AzureLogReader:
+    """A class to read and process Azure Log Analytics logs."""
+    
+    def __init__(self, tenant_id: str, client_id: str, client_secret: str, subscription_id: str):
+        """Initialize the Azure Log Analytics reader."""
+        self.credential = ClientSecretCredential(
+            tenant_id=tenant_id,
+            client_id=client_id,
+            client_secret=client_secret,
+            authority=AzureAuthorityHosts.AZURE_PUBLIC_CLOUD,
+            logging_enable=True
+        )
+
+        self.subscription_id = subscription_id
+    
+    def get_log_events(
+        self,
+        workspace_id: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        query_filter: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[LogEvent]:
+        """Retrieve log events from Azure Log Analytics."""
+        client = LogsQueryClient(self.credential)
+        
+        # Construct query
+        query = "union *"
+        if query_filter:
+            query += f" | where Severity == '{query_filter}'"
+        
+        # Time range
+        start_time = start_time or datetime.now() - timedelta(hours=1)
+        end_time = end_time or datetime.now()
+        timespan = end_time - start_time
+        
+        # Limit
+        if limit:
+            query += f" | take {limit}"
+        
+        try:
+            with upstream_call('azure', 'query_workspace', page=True):
+                result = client.query_workspace(workspace_id, query,
+                                                timespan=timespan)
+            
+            rows = result.tables[0].rows
+            levels = parse_log_levels(str(row.get('Message', '')) for row in rows)
+            for row, level in zip(rows, levels):
+                yield LogEvent(
+                    timestamp=row['TimeGenerated'],
+                    message=str(row.get('Message', '')),
+                    log_stream=str(row.get('Source', 'Unknown')),
+                    level=level
+                )
+        
+        except Exception as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+    
+    def get_log_workspaces(self) -> List[Dict[str, str]]:
+        """Retrieve available log workspaces."""
+        client = LogAnalyticsManagementClient(self.credential, self.subscription_id)
+        with upstream_call('azure', 'list_workspaces'):
+            workspaces = list(client.workspaces.list())
+        return [{'id': ws.customer_id, 'name': ws.name} for ws in workspaces]
+    
+    async def tail_logs(
+        self,
+        workspace_id: str,
+        interval: int = 5,
+        filter_pattern: Optional[str] = None
+    ) -> AsyncGenerator[LogEvent, None]:
+        """Continuously tail logs from Azure Log Analytics."""
+        last_timestamp = datetime.now() - timedelta(weeks=52)
+        
+        while True:
+            events = await asyncio.to_thread(list, self.get_log_events(
+                workspace_id=workspace_id,
+                start_time=last_timestamp,
+                query_filter=filter_pattern
+            ))
+            
+            new_events = [event for event in events if event.timestamp > last_timestamp]
+            
+            if new_events:
+                for event in new_events:
+                    yield event
+                last_timestamp = max(event.timestamp for event in new_events)
+            
+            await asyncio.sleep(interval)
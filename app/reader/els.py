@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Dict, List, Optional, Tuple, AsyncGenerator
+import asyncio
+from elasticsearch import Elasticsearch
+from .events import LogEvent
+from .levels import normalize_level, parse_log_level
+from ..metrics import upstream_call
+
+class ElasticsearchLogsReader:
+    """A class to read and process Elasticsearch logs."""
+    
+    def __init__(
+        self, 
+        host: str, 
+        username: Optional[str] = None, 
+        password: Optional[str] = None,
+        api_key: Optional[str] = None
+    ):
+        """Initialize the Elasticsearch logs reader."""
+        if api_key:
+            self.client = Elasticsearch(
+                hosts=[host],
+                api_key=api_key
+            )
+        else:
+            self.client = Elasticsearch(
+                hosts=[host],
+                basic_auth=(username, password) if username and password else None
+            )
+    
+    def _build_query(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        query_filter: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build an Elasticsearch search body."""
+        query = {
+            "query": {
+                "bool": {
+                    "filter": []
+                }
+            },
+            "sort": [{"@timestamp": {"order": "desc"}}]
+        }
+        
+        # Time range filter
+        if start_time or end_time:
+            time_range = {}
+            if start_time:
+                time_range["gte"] = start_time
+            if end_time:
+                time_range["lte"] = end_time
+            query["query"]["bool"]["filter"].append({"range": {"@timestamp": time_range}})
+        
+        # Log level filter
+        if query_filter:
+            query["query"]["bool"]["filter"].append({"match": {"level": query_filter}})
+        return query
+
+    def _to_log_event(self, hit: Dict[str, Any]) -> LogEvent:
+        source = hit['_source']
+        return LogEvent(
+            timestamp=datetime.fromisoformat(source.get('@timestamp', datetime.now().isoformat())),
+            message=str(source.get('message', '')),
+            log_stream=str(source.get('log_stream', 'Unknown')),
+            level=normalize_level(source.get('level')) or parse_log_level(str(source.get('message', '')))
+        )
+
+    def get_log_events(
+        self,
+        index_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        query_filter: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[LogEvent]:
+        """Retrieve log events from Elasticsearch."""
+        query = self._build_query(start_time, end_time, query_filter)
+        
+        # Set limit
+        if limit:
+            query["size"] = limit
+        
+        try:
+            with upstream_call('els', 'search', page=True):
+                results = self.client.search(index=index_name, body=query)
+            
+            for hit in results['hits']['hits']:
+                yield self._to_log_event(hit)
+        
+        except Exception as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+
+    def get_log_events_page(
+        self,
+        index_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        query_filter: Optional[str] = None,
+        limit: int = 1000,
+        search_after: Optional[List[Any]] = None
+    ) -> Tuple[List[LogEvent], Optional[List[Any]]]:
+        """Retrieve a page of log events using search_after, returning the sort values to resume from."""
+        query = self._build_query(start_time, end_time, query_filter)
+        # Tiebreaker so events sharing a timestamp are neither skipped nor repeated
+        query["sort"].append({"_doc": {"order": "asc"}})
+        query["size"] = limit
+        if search_after:
+            query["search_after"] = search_after
+
+        try:
+            with upstream_call('els', 'search', page=True):
+                hits = self.client.search(index=index_name, body=query)['hits']['hits']
+        except Exception as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+
+        events = [self._to_log_event(hit) for hit in hits]
+        next_position = hits[-1]['sort'] if len(hits) == limit else None
+        return events, next_position
+    
+    def get_indices(self) -> List[Dict[str, str]]:
+        """Retrieve available indices."""
+        with upstream_call('els', 'get_indices'):
+            indices = self.client.indices.get(index='*')
+        return [
+            {
+                'name' : name,
+                'health' : info.get('health', 'unknown'),
+                'status' : info.get('status', 'unknown'),
+            } for name, info in indices.items()
+        ]
+    
+    async def tail_logs(
+        self,
+        index_name: str,
+        interval: int = 5,
+        filter_pattern: Optional[str] = None
+    ) -> AsyncGenerator[LogEvent, None]:
+        """Continuously tail logs from Elasticsearch."""
+        last_timestamp = datetime.now() - timedelta(weeks=52)
+        
+        while True:
+            events = await asyncio.to_thread(list, self.get_log_events(
+                index_name=index_name,
+                start_time=last_timestamp,
+                query_filter=filter_pattern
+            ))
+            
+            new_events = [event for event in events if event.timestamp > last_timestamp]
+            
+            if new_events:
+                for event in new_events:
+                    yield event
+                last_timestamp = max(event.timestamp for event in new_events)
+            
+            await asyncio.sleep(interval)
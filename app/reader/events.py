@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+from dataclasses import dataclass
+
+@dataclass
+class LogEvent:
+    timestamp: datetime
+    message: str
+    log_stream: str
+    ingestion_time: Optional[datetime] = None
+    level: str = 'INFO'  # Default level
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Dict, List, Optional, Tuple, Union, AsyncGenerator
+import asyncio
+from google.cloud import logging_v2
+from google.cloud.logging_v2.services.logging_service_v2 import LoggingServiceV2Client
+from google.cloud.logging_v2.types import ListLogsRequest
+from google.oauth2 import service_account
+from .events import LogEvent
+from .levels import normalize_level
+from ..metrics import upstream_call, upstream_pages
+
+class GoogleCloudLogsReader:
+    """A class to read and process Google Cloud logs."""
+    
+    def __init__(
+        self, 
+        project_id: str, 
+        credentials_path: Optional[str] = None,
+        service_account_info: Optional[dict] = None
+    ):
+        """Initialize the Google Cloud logs reader."""
+        if credentials_path:
+            credentials = service_account.Credentials.from_service_account_file(
+                credentials_path,
+                scopes=['https://www.googleapis.com/auth/cloud-platform']
+            )
+        elif service_account_info:
+            credentials = service_account.Credentials.from_service_account_info(
+                service_account_info,
+                scopes=['https://www.googleapis.com/auth/cloud-platform',
+                        'https://www.googleapis.com/auth/logging.read'
+                ]
+            )
+        else:
+            raise ValueError("Either credentials_path or service_account_info must be provided")
+        
+        # Initialize logging client
+        self.client = logging_v2.Client(project=project_id, credentials=credentials)
+        self.project_id = project_id
+
+        # Initialize LoggingServiceV2Client for list_logs
+        self.logs_client = LoggingServiceV2Client(credentials=credentials)
+    
+    
+    def _parse_log_level(self, severity: Union[str, None]) -> str:
+        """Parse log severity to standard levels."""
+        return normalize_level(severity) or 'INFO'
+    
+    def _build_filter(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filter_pattern: Optional[str] = None
+    ) -> Optional[str]:
+        """Build a Cloud Logging filter expression."""
+        # Helper function to format timestamps
+        def format_ts(ts: datetime) -> str:
+            """Convert to RFC 3339 format with Z suffix."""
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)  # Now recognizes timezone
+            utc_ts = ts.astimezone(timezone.utc)
+            return utc_ts.isoformat(timespec="microseconds").replace("+00:00", "Z")
+        
+        # Construct filter
+        filter_parts = []
+        if start_time:
+            filter_parts.append(f'timestamp >= "{format_ts(start_time)}"')
+        if end_time:
+            filter_parts.append(f'timestamp <= "{format_ts(end_time)}"')
+        if filter_pattern:
+            filter_parts.append(filter_pattern)
+        
+        # Apply filters
+        return ' AND '.join(filter_parts) if filter_parts else None
+
+    def _to_log_event(self, entry) -> LogEvent:
+        return LogEvent(
+            timestamp=entry.timestamp,
+            message=str(entry.payload),
+            log_stream=entry.log_name,
+            level=self._parse_log_level(entry.severity)
+        )
+
+    def get_log_events(
+        self,
+        log_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filter_pattern: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[LogEvent]:
+        """Retrieve log events from Google Cloud Logging."""
+        # # remove url encoding
+        # log_name = log_name.replace('%2F', '/') # will uncomment this later
+        # cut only the log name
+        log_name = log_name.split('/')[-1]
+        print(log_name)
+
+        logger = self.client.logger(log_name)
+        log_filter = self._build_filter(start_time, end_time, filter_pattern)
+        
+        try:
+            entries = logger.list_entries(filter_=log_filter, page_token=None, page_size=limit or 1000)
+            
+            for page in upstream_pages('gcp', 'list_entries', entries.pages):
+                for entry in page:
+                    yield self._to_log_event(entry)
+        
+        except Exception as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+
+    def get_log_events_page(
+        self,
+        log_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filter_pattern: Optional[str] = None,
+        limit: int = 1000,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[LogEvent], Optional[str]]:
+        """Retrieve a single page of log events and the token of the next page."""
+        logger = self.client.logger(log_name.split('/')[-1])
+        log_filter = self._build_filter(start_time, end_time, filter_pattern)
+
+        try:
+            entries = logger.list_entries(filter_=log_filter, page_token=page_token, page_size=limit)
+            with upstream_call('gcp', 'list_entries', page=True):
+                page = list(next(entries.pages, []))
+            events = [self._to_log_event(entry) for entry in page]
+            return events, entries.next_page_token
+        
+        except Exception as e:
+            raise Exception(f"Failed to retrieve logs: {str(e)}")
+    
+    def get_log_names(self) -> List[Dict[str, str]]:
+        """Retrieve available log names."""
+        request = ListLogsRequest(
+            resource_names=[f"projects/{self.project_id}"],
+            page_size=500
+        )
+        with upstream_call('gcp', 'list_logs'):
+            logs = list(self.logs_client.list_logs(request=request))
+        return [{'name': log} for log in logs]
+    
+    async def tail_logs(
+        self,
+        log_name: str,
+        interval: int = 5,
+        filter_pattern: Optional[str] = None
+    ) -> AsyncGenerator[LogEvent, None]:
+        """Continuously tail logs from Google Cloud Logging."""
+        last_timestamp = datetime.now() - timedelta(weeks=52)
+        
+        while True:
+            events = await asyncio.to_thread(list, self.get_log_events(
+                log_name=log_name,
+                start_time=last_timestamp,
+                filter_pattern=filter_pattern
+            ))
+            
+            new_events = [event for event in events if event.timestamp > last_timestamp]
+            
+            if new_events:
+                for event in new_events:
+                    yield event
+                last_timestamp = max(event.timestamp for event in new_events)
+            
+            await asyncio.sleep(interval)
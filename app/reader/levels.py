@@ -0,0 +1,157 @@
+import json
+import re
+from typing import Any, Iterable, List, Optional
+
+DEFAULT_LEVEL = 'INFO'
+
+# Map every spelling we see in the wild onto the four levels the API exposes
+LEVEL_ALIASES = {
+    'TRACE': 'DEBUG',
+    'DEBUG': 'DEBUG',
+    'FINE': 'DEBUG',
+    'INFO': 'INFO',
+    'INFORMATION': 'INFO',
+    'NOTICE': 'INFO',
+    'DEFAULT': 'INFO',
+    'WARN': 'WARN',
+    'WARNING': 'WARN',
+    'ERR': 'ERROR',
+    'ERROR': 'ERROR',
+    'SEVERE': 'ERROR',
+    'CRIT': 'ERROR',
+    'CRITICAL': 'ERROR',
+    'FATAL': 'ERROR',
+    'ALERT': 'ERROR',
+    'EMERG': 'ERROR',
+    'EMERGENCY': 'ERROR',
+}
+
+# Structured fields checked, in order, when the message is a JSON object
+JSON_LEVEL_FIELDS = ('level', 'severity', 'levelname', 'log.level', 'lvl')
+
+_TOKENS = '|'.join(sorted(LEVEL_ALIASES, key=len, reverse=True))
+
+# level=error, severity: "warning" anywhere in the line (logfmt and friends)
+_KEY_VALUE = re.compile(
+    rf'\b(?:level|severity|lvl)\s*[=:]\s*["\']?({_TOKENS})\b',
+    re.IGNORECASE
+)
+
+# ISO 8601 ("2024-01-01T12:00:00.123Z") and syslog ("Jan  1 12:00:00") line timestamps
+_TIMESTAMP = (
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+    r'|[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}'
+)
+
+# Syslog header: "Jan  1 12:00:00 host prog[123]:"
+_SYSLOG_HEADER = r'[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2} \S+ [^\s:\[]+(?:\[\d+\])?:'
+
+# The level at the start of the line, after an optional syslog header or
+# timestamp and any bracketed fields: "ERROR: ...", "[warn] ...",
+# "2024-01-01 12:00:00 WARN app ...", "[main] (debug) ...",
+# "Jan  1 12:00:00 host sshd[1]: ERROR ...". Bracketed levels match in any
+# case, bare ones only in upper case, so "no error found" stays INFO; level
+# words later in the message ("Using DEFAULT profile", "got (error)") do not count.
+_PREFIX = re.compile(
+    rf'(?:(?:{_SYSLOG_HEADER}|{_TIMESTAMP})[\s|:\-]*)?'
+    rf'(?:\[[^\]]*\][\s|:\-]*)*'
+    rf'(?:[\[<(]\s*((?i:{_TOKENS}))\s*[\]>)]|({_TOKENS})(?=[\s:|\-]|$))'
+)
+
+
+def normalize_level(value: Any) -> Optional[str]:
+    """
+    Map a level/severity name or number to a standard level.
+
+    Numbers are read as syslog severities (0-7), pino/bunyan levels
+    (10-60) or Cloud Logging severities (100-800).
+    """
+    if value is None:
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        if value < 10:
+            if value <= 3:
+                return 'ERROR'
+            if value == 4:
+                return 'WARN'
+            if value == 7:
+                return 'DEBUG'
+            return 'INFO'
+        if value < 100:
+            # pino/bunyan: 10 trace, 20 debug, 30 info, 40 warn, 50 error, 60 fatal
+            info, warn, error = 30, 40, 50
+        else:
+            # Cloud Logging: 100 debug, 200 info, 300 notice, 400 warning, 500+ error
+            info, warn, error = 200, 400, 500
+        if value < info:
+            return 'DEBUG'
+        if value < warn:
+            return 'INFO'
+        if value < error:
+            return 'WARN'
+        return 'ERROR'
+    return LEVEL_ALIASES.get(str(value).strip().upper())
+
+
+def _level_from_json(message: str) -> Optional[str]:
+    try:
+        payload = json.loads(message)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    for field in JSON_LEVEL_FIELDS:
+        level = normalize_level(payload.get(field))
+        if level:
+            return level
+    log = payload.get('log')
+    if isinstance(log, dict):
+        return normalize_level(log.get('level'))
+    return None
+
+
+def parse_log_level(message: str, default: str = DEFAULT_LEVEL) -> str:
+    """
+    Extract the log level of a single message.
+
+    JSON messages are classified from their `level`/`severity`/`levelname`
+    fields, plain text from the level token at the start of the line (after
+    any timestamp, syslog header or bracketed fields) or a key=value field.
+    Words that merely appear in the message body do not count.
+    """
+    if not message:
+        return default
+
+    text = message.lstrip()
+    if text[:1] == '{':
+        level = _level_from_json(text)
+        if level:
+            return level
+
+    match = _PREFIX.match(text)
+    if match:
+        return LEVEL_ALIASES[(match.group(1) or match.group(2)).upper()]
+
+    match = _KEY_VALUE.search(text)
+    if match:
+        return LEVEL_ALIASES[match.group(1).upper()]
+
+    return default
+
+
+def parse_log_levels(messages: Iterable[str], default: str = DEFAULT_LEVEL) -> List[str]:
+    """
+    Classify a batch of messages, returning one level per message.
+
+    Repeated lines (common in high-volume streams) are classified once.
+    """
+    seen = {}
+    levels = []
+    for message in messages:
+        level = seen.get(message)
+        if level is None:
+            level = parse_log_level(message, default)
+            if len(seen) < 4096:
+                seen[message] = level
+        levels.append(level)
+    return levels
@@ -1,4 +1,6 @@
+from . import cache_service
+from . import coalesce_service
 from . import credential_service
 from . import platform_service
 
-__all__ = ['credential_service', 'platform_service']
\ No newline at end of file
+__all__ = ['cache_service', 'coalesce_service', 'credential_service', 'platform_service']
\ No newline at end of file
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Size budget and TTLs can be tuned per deployment
+CACHE_MAX_BYTES = int(os.getenv("LOGS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_BUCKET_SECONDS = int(os.getenv("LOGS_CACHE_BUCKET_SECONDS", 10))
+OPEN_WINDOW_TTL = int(os.getenv("LOGS_CACHE_OPEN_TTL", 15))
+CLOSED_WINDOW_TTL = int(os.getenv("LOGS_CACHE_CLOSED_TTL", 600))
+LOG_GROUPS_TTL = int(os.getenv("LOGS_CACHE_GROUPS_TTL", 300))
+
+# Auth hot path: verified tokens and decrypted credentials
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+CREDENTIAL_CACHE_TTL = int(os.getenv("CREDENTIAL_CACHE_TTL", 300))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+
+def estimate_size(value: Any) -> int:
+    """Cheap approximation of the serialized size of a JSON-like value."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(estimate_size(k) + estimate_size(v) + 2 for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(estimate_size(v) + 1 for v in value)
+    return 8
+
+
+def snap_window(
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int = CACHE_BUCKET_SECONDS
+) -> Tuple[datetime, datetime]:
+    """Widen a time window outwards to bucket boundaries so nearby queries share a key."""
+    start = start_time.timestamp() // bucket_seconds * bucket_seconds
+    end = -(-end_time.timestamp() // bucket_seconds) * bucket_seconds
+    start = datetime.fromtimestamp(start, tz=start_time.tzinfo)
+    end = datetime.fromtimestamp(end, tz=end_time.tzinfo)
+    return start, end
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def trim_logs(logs: List[Dict[str, Any]], start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+    """
+    Keep the logs of a snapped window that fall inside the requested one.
+
+    Logs whose timestamp cannot be parsed are kept, since they cannot be placed.
+    """
+    start, end = start_time.timestamp(), end_time.timestamp()
+    kept = []
+    for log in logs:
+        ts = _epoch(log.get("timestamp"))
+        if ts is None or start <= ts <= end:
+            kept.append(log)
+    return kept
+
+
+def window_ttl(end_time: datetime) -> int:
+    """Closed windows can be cached for much longer than ones still receiving logs."""
+    now = datetime.now(end_time.tzinfo)
+    if end_time < now - timedelta(seconds=CACHE_BUCKET_SECONDS):
+        return CLOSED_WINDOW_TTL
+    return OPEN_WINDOW_TTL
+
+
+def logs_key(
+    user_id: int,
+    platform: str,
+    source: Optional[str],
+    filters: Dict[str, Any],
+    start_time: datetime,
+    end_time: datetime
+) -> Tuple[Hashable, ...]:
+    """Build the cache key for a /logs query. Windows should already be snapped."""
+    normalized = tuple(sorted(
+        (name, str(value).upper() if name == "level" else str(value))
+        for name, value in filters.items()
+        if value is not None and name not in ("path", "log_group")
+    ))
+    return ("logs", user_id, platform, source, normalized, start_time.isoformat(), end_time.isoformat())
+
+
+class ResultCache:
+    """
+    In-process LRU cache bounded by the total estimated size of its entries
+    and, optionally, by the number of entries.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: int) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes or (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int, platform: Optional[str] = None) -> None:
+        """Drop every entry belonging to a user (optionally only one platform)."""
+        with self._lock:
+            for key in [
+                k for k in self._entries
+                if k[1] == user_id and (platform is None or k[2] == platform)
+            ]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+# Shared by the API handlers
+result_cache = ResultCache()
+
+# Keys: ("token", sha256 of token) -> User, ("credentials", user_id, platform) -> dict
+token_cache = ResultCache(max_entries=AUTH_CACHE_MAX_ENTRIES)
+credential_cache = ResultCache(max_entries=AUTH_CACHE_MAX_ENTRIES)
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+# Marks the end of a shared tail in each subscriber's queue
+_END = object()
+
+
+def credentials_fingerprint(credentials: Dict[str, Any]) -> str:
+    """Stable digest of a credentials dict, so equal credentials share upstream work."""
+    encoded = json.dumps(credentials, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def flight_key(cache_key: Tuple[Hashable, ...], credentials: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """
+    Turn a per-user cache key ("kind", user_id, ...) into a coalescing key.
+
+    The user id is swapped for the credentials fingerprint: callers only
+    share a result when they would have sent the same upstream request
+    with the same credentials.
+    """
+    return (cache_key[0], credentials_fingerprint(credentials)) + tuple(cache_key[2:])
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key starts the call in its own task; callers
+    arriving while it runs await that same task. A caller that goes away
+    does not cancel the call for the others, but the call is cancelled
+    once nobody is waiting for it any more.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.create_task(fn()))
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / total if total else 0.0,
+        }
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class _SharedTail:
+    def __init__(self, source: AsyncIterator[Any]):
+        self.source = source
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.pump = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            async for event in self.source:
+                for queue in self.subscribers:
+                    queue.put_nowait(event)
+            ended = _END
+        except Exception as e:
+            ended = e
+        for queue in self.subscribers:
+            queue.put_nowait(ended)
+
+
+class TailHub:
+    """
+    Fans one upstream tail out to every subscriber with the same key.
+
+    Subscribers receive events from the moment they join. Each subscriber
+    queue is drained straight into its own bounded TailQueue by
+    batch_events, so a slow client is handled by its drop policy rather
+    than holding back the upstream reader. The upstream tail is stopped
+    when its last subscriber leaves.
+    """
+
+    def __init__(self):
+        self._tails: Dict[Hashable, _SharedTail] = {}
+        self.coalesced = 0
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        open_source: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        tail = self._tails.get(key)
+        if tail is None or tail.pump.done():
+            tail = self._tails[key] = _SharedTail(open_source())
+        else:
+            self.coalesced += 1
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tail.subscribers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is _END:
+                    return
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            tail.subscribers.discard(queue)
+            if not tail.subscribers:
+                tail.pump.cancel()
+                if self._tails.get(key) is tail:
+                    del self._tails[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tails": len(self._tails),
+            "subscribers": sum(len(tail.subscribers) for tail in self._tails.values()),
+            "coalesced": self.coalesced,
+        }
+
+
+# Shared by the API handlers
+request_flights = SingleFlight()
+tail_hub = TailHub()
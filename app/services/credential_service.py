@@ -1,20 +1,27 @@
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models import Credential
 from ..schemas import CredentialCreate, CredentialResponse
+from .cache_service import credential_cache, result_cache, CREDENTIAL_CACHE_TTL
+
+async def _find_credential(db: AsyncSession, platform: str, user_id: int) -> Optional[Credential]:
+    result = await db.execute(select(Credential).where(
+        Credential.user_id == user_id,
+        Credential.platform == platform
+    ))
+    return result.scalars().first()
+
 
 async def create_credential(
-    db: Session,
+    db: AsyncSession,
     platform: str,
     credential: CredentialCreate,
     user_id: int
 ) -> CredentialResponse:
     """Create or update credentials for a user's platform"""
     # Check for existing credentials
-    db_credential = db.query(Credential).filter(
-        Credential.user_id == user_id,
-        Credential.platform == platform
-    ).first()
+    db_credential = await _find_credential(db, platform, user_id)
     
     if db_credential:
         # Update existing credentials
@@ -28,8 +35,12 @@ async def create_credential(
         db_credential.set_credentials(credential.model_dump(exclude_none=True))
         db.add(db_credential)
     
-    db.commit()
-    db.refresh(db_credential)
+    await db.commit()
+    await db.refresh(db_credential)
+
+    # Cached credentials and results were fetched with the old credentials
+    credential_cache.invalidate(user_id, platform)
+    result_cache.invalidate(user_id, platform)
     
     return CredentialResponse(
         id=db_credential.id,
@@ -37,14 +48,18 @@ async def create_credential(
     ) 
 
 
-async def get_credentials(db: Session, platform: str, user_id: int) -> Dict[str, Any]:
+async def get_credentials(db: AsyncSession, platform: str, user_id: int) -> Dict[str, Any]:
     """Get credentials for a specific platform"""
-    db_credential = db.query(Credential).filter(
-        Credential.user_id == user_id,
-        Credential.platform == platform
-    ).first()
+    cache_key = ("credentials", user_id, platform)
+    cached_credentials = credential_cache.get(cache_key)
+    if cached_credentials is not None:
+        return dict(cached_credentials)
+
+    db_credential = await _find_credential(db, platform, user_id)
     
     if not db_credential:
         return {}
     
-    return db_credential.get_credentials()
\ No newline at end of file
+    decrypted = db_credential.get_credentials()
+    credential_cache.set(cache_key, decrypted, ttl=CREDENTIAL_CACHE_TTL)
+    return dict(decrypted)
\ No newline at end of file
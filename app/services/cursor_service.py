@@ -0,0 +1,90 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# Key cursors are signed with; set it when several workers share clients,
+# otherwise cursors only survive for the lifetime of the process
+CURSOR_SECRET = os.getenv("CURSOR_SECRET") or secrets.token_hex(32)
+
+Window = Tuple[datetime, datetime]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a continuation token is malformed, tampered with or belongs to another query."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(body: str) -> str:
+    digest = hmac.new(CURSOR_SECRET.encode(), body.encode(), hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+
+def query_fingerprint(platform: str, source: Optional[str], filters: Dict[str, Any]) -> str:
+    """Short, stable digest of the query a cursor was issued for."""
+    payload = json.dumps([platform, source, sorted((k, str(v)) for k, v in filters.items())])
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def encode_cursor(
+    platform: str,
+    position: Any,
+    fingerprint: str,
+    start_time: datetime,
+    end_time: datetime,
+    window: Optional[Window] = None
+) -> str:
+    """
+    Wrap a platform-native position in an opaque, signed, URL-safe token.
+
+    The time window is pinned in the token so later pages of a query with
+    default (relative) times keep reading the same window. `window` is the
+    requested window when the fetched one was widened to cache buckets.
+    """
+    payload = {
+        "p": platform,
+        "q": fingerprint,
+        "s": start_time.isoformat(),
+        "e": end_time.isoformat(),
+        "pos": position,
+    }
+    if window is not None:
+        payload["w"] = [window[0].isoformat(), window[1].isoformat()]
+    body = _b64encode(json.dumps(payload, separators=(",", ":"), default=str).encode())
+    return f"{body}.{_signature(body)}"
+
+
+def decode_cursor(token: str, platform: str, fingerprint: str) -> Tuple[Any, datetime, datetime, Window]:
+    """
+    Return (position, start_time, end_time, window) for a token issued by encode_cursor.
+
+    `window` is the requested window, or the fetched one if it was not widened.
+    """
+    body, _, signature = token.partition(".")
+    if not hmac.compare_digest(signature.encode(), _signature(body).encode()):
+        raise InvalidCursor("Invalid cursor signature")
+
+    try:
+        payload = json.loads(_b64decode(body))
+        position = payload["pos"]
+        start_time = datetime.fromisoformat(payload["s"])
+        end_time = datetime.fromisoformat(payload["e"])
+        window = tuple(map(datetime.fromisoformat, payload.get("w") or (payload["s"], payload["e"])))
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+
+    if payload.get("p") != platform or payload.get("q") != fingerprint:
+        raise InvalidCursor("Cursor does not match this query")
+    return position, start_time, end_time, window
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable
+
+from starlette.requests import Request
+
+# Default and maximum time a /logs query may spend fetching before partial results are returned
+QUERY_BUDGET_SECONDS = float(os.getenv("LOGS_QUERY_BUDGET_SECONDS", 20))
+MAX_QUERY_BUDGET_SECONDS = float(os.getenv("LOGS_MAX_QUERY_BUDGET_SECONDS", 120))
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready."""
+
+
+class QueryBudget:
+    """
+    Time budget for one query.
+
+    Readers check `expired()` between upstream calls and stop early,
+    returning what they have and the position to resume from. It can be
+    checked from worker threads, and `cancel()` expires it immediately.
+    """
+
+    def __init__(self, seconds: float = QUERY_BUDGET_SECONDS):
+        self.deadline = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def expired(self) -> bool:
+        return self._cancelled.is_set() or time.monotonic() >= self.deadline
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+
+async def until_disconnected(
+    request: Request,
+    awaitable: Awaitable[Any],
+    poll: float = DISCONNECT_POLL_SECONDS
+) -> Any:
+    """
+    Await `awaitable`, cancelling it as soon as the client disconnects.
+
+    Raises ClientDisconnected in that case.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
@@ -1,9 +1,5 @@
-from ..platforms.aws import AWSPlatform
-from ..platforms.local import LocalPlatform
-from ..platforms.azure import AzurePlatform
-from ..platforms.google import GoogleCloudPlatform
-from ..platforms.els import ElasticsearchPlatform
-from typing import Dict, List, Any
+from ..platforms import get_platform_handler
+from typing import Dict, List, Any, Optional
 import os
 import platform
 
@@ -40,9 +36,15 @@ class PlatformService:
 
         return logs
 
-    AVAILABLE_LOG_TYPES = {
-        "local": get_system_logs()
-    }
+    # Filled on first use instead of scanning the log directory at import time
+    _local_logs: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def get_local_logs(cls) -> Dict[str, str]:
+        """Local log name -> path, scanned once on first use."""
+        if cls._local_logs is None:
+            cls._local_logs = cls.get_system_logs()
+        return cls._local_logs
 
     @staticmethod
     def get_log_levels() -> List[str]:
@@ -51,19 +53,8 @@ class PlatformService:
     @staticmethod
     async def get_user_platform(platform: str):
         """Get the platform instance for a user based on their stored credentials."""
-        if platform == "aws":
-            return AWSPlatform()
-        elif platform == "local":
-            return LocalPlatform()
-        elif platform == "file":
-            return LocalPlatform()
-        elif platform == "els":
-            return ElasticsearchPlatform()
-        elif platform == "gcp":
-            return GoogleCloudPlatform()
-        elif platform == "azure":
-            return AzurePlatform()
-        return LocalPlatform()  # Default to local for unknown platforms
+        # Default to local for unknown platforms
+        return get_platform_handler(platform) or get_platform_handler("local")
 
     @staticmethod
     def get_available_platforms() -> List[Dict[str, Any]]:
@@ -73,7 +64,7 @@ class PlatformService:
                 "id": "local",
                 "name": "Local System Logs",
                 "description": "Access and analyze local system log files",
-                "logTypes": list(PlatformService.AVAILABLE_LOG_TYPES["local"].keys())
+                "logTypes": list(PlatformService.get_local_logs().keys())
             },
             {
                 "id": "aws",
@@ -87,7 +78,7 @@ class PlatformService:
     async def get_log_types(platform: str) -> List[str]:
         """Get available log types for a platform"""
         if platform == "local":
-            return list(PlatformService.AVAILABLE_LOG_TYPES["local"].keys())
+            return list(PlatformService.get_local_logs().keys())
         return []
 
 def get_available_platforms() -> List[Dict[str, Any]]:
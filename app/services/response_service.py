@@ -0,0 +1,85 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+LOG_FIELDS = ("timestamp", "message", "source", "level")
+
+# Low-cardinality columns that are sent as a value table plus integer codes
+DICTIONARY_FIELDS = ("level", "source")
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if hasattr(obj, "__dict__"):
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by `dumps`, bypassing FastAPI's jsonable_encoder."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Sequence[str]:
+    """Parse a `fields=` projection. Raises ValueError on unknown fields."""
+    if not fields:
+        return LOG_FIELDS
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in LOG_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def project_rows(logs: List[Dict[str, Any]], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """Keep only the requested keys of each log entry."""
+    if tuple(fields) == LOG_FIELDS:
+        return logs
+    return [{field: log.get(field) for field in fields} for log in logs]
+
+
+def to_columnar(logs: List[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Convert row-shaped logs to parallel arrays.
+
+    `level` and `source` are dictionary-encoded as {"values": [...], "codes": [...]}.
+    """
+    columns = {}
+    for field in fields:
+        if field in DICTIONARY_FIELDS:
+            lookup = {}
+            codes = [lookup.setdefault(log.get(field), len(lookup)) for log in logs]
+            columns[field] = {"values": list(lookup), "codes": codes}
+        else:
+            columns[field] = [log.get(field) for log in logs]
+    return {"count": len(logs), "columns": columns}
+
+
+def shape_logs(result: Dict[str, Any], fields: Sequence[str], layout: str = "rows") -> Dict[str, Any]:
+    """Apply the requested projection and layout to a /logs result."""
+    shaped = dict(result)
+    if layout == "columnar":
+        shaped.pop("logs")
+        shaped["format"] = "columnar"
+        shaped.update(to_columnar(result["logs"], fields))
+    else:
+        shaped["logs"] = project_rows(result["logs"], fields)
+    return shaped
@@ -0,0 +1,260 @@
+import asyncio
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .response_service import dumps
+
+# A batch is flushed when it reaches TAIL_BATCH_SIZE events or TAIL_BATCH_MS after its first event
+TAIL_BATCH_SIZE = int(os.getenv("TAIL_BATCH_SIZE", 500))
+TAIL_BATCH_MS = int(os.getenv("TAIL_BATCH_MS", 100))
+TAIL_QUEUE_SIZE = int(os.getenv("TAIL_QUEUE_SIZE", 5000))
+TAIL_DROP_POLICY = os.getenv("TAIL_DROP_POLICY", "drop_oldest")
+
+DROP_OLDEST = "drop_oldest"
+SAMPLE = "sample"
+DISCONNECT = "disconnect"
+DROP_POLICIES = (DROP_OLDEST, SAMPLE, DISCONNECT)
+
+# Frames waiting to be written to one WebSocket; when full, subscriptions stop
+# draining their TailQueues and the per-subscription drop policy takes over
+WS_OUTBOX_SIZE = int(os.getenv("WS_OUTBOX_SIZE", 64))
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", 50))
+
+# Let other tasks run after this many events read without awaiting
+PRODUCER_YIELD_EVERY = 100
+
+
+class TailQueue:
+    """
+    Bounded per-client event queue.
+
+    When a slow consumer lets it fill up, `policy` decides what happens:
+    drop_oldest discards the oldest event, sample thins the queue to every
+    other event, and disconnect marks the stream as overflowed.
+    """
+
+    def __init__(self, maxsize: int = TAIL_QUEUE_SIZE, policy: str = TAIL_DROP_POLICY):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.events = deque()
+        self.dropped = 0
+        self.closed = False
+        self.overflowed = False
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def put(self, event: Any) -> None:
+        if self.overflowed:
+            return
+        if len(self.events) >= self.maxsize:
+            if self.policy == DISCONNECT:
+                self.overflowed = True
+                self._changed.set()
+                return
+            if self.policy == SAMPLE:
+                kept = deque(list(self.events)[1::2])
+                self.dropped += len(self.events) - len(kept)
+                self.events = kept
+            else:
+                self.events.popleft()
+                self.dropped += 1
+        self.events.append(event)
+        self._changed.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._changed.set()
+
+    def drain(self, max_events: int) -> Tuple[List[Any], int]:
+        """Take up to `max_events` events plus the number dropped since the last drain."""
+        count = min(max_events, len(self.events))
+        events = [self.events.popleft() for _ in range(count)]
+        dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait until the queue changes (new event, close or overflow) or `timeout` elapses."""
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def batch_events(
+    source: AsyncIterator[Any],
+    max_events: int = TAIL_BATCH_SIZE,
+    max_delay: float = TAIL_BATCH_MS / 1000,
+    queue: Optional[TailQueue] = None
+) -> AsyncIterator[Tuple[List[Any], int]]:
+    """
+    Group events from `source` into (events, dropped) batches.
+
+    The source is drained by a background task into a bounded queue, so a
+    slow client never stalls the reader; the queue's policy decides what is
+    lost instead. Iteration stops when the source ends or the queue overflows
+    under the disconnect policy. If the source fails, its exception is
+    raised once the events read before the failure have been yielded.
+    """
+    if queue is None:
+        queue = TailQueue()
+    loop = asyncio.get_running_loop()
+    errors: List[Exception] = []
+
+    async def produce():
+        try:
+            count = 0
+            async for event in source:
+                queue.put(event)
+                count += 1
+                if count % PRODUCER_YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            queue.close()
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            while not queue and not queue.closed and not queue.overflowed:
+                await queue.wait()
+            if queue.overflowed:
+                return
+
+            # Give the batch up to max_delay to fill
+            deadline = loop.time() + max_delay
+            while len(queue) < max_events and not queue.closed and not queue.overflowed:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await queue.wait(remaining)
+
+            events, dropped = queue.drain(max_events)
+            if events or dropped:
+                yield events, dropped
+            if queue.closed and not queue:
+                if errors:
+                    raise errors[0]
+                return
+    finally:
+        producer.cancel()
+
+
+async def sse_batches(
+    source: AsyncIterator[Any],
+    policy: str = TAIL_DROP_POLICY,
+    max_events: int = TAIL_BATCH_SIZE,
+    max_delay: float = TAIL_BATCH_MS / 1000
+) -> AsyncIterator[bytes]:
+    """
+    Encode a tail as SSE frames carrying JSON arrays of events.
+
+    Dropped events are reported with an `event: dropped` frame, a
+    disconnect-policy overflow ends the stream with an `event: overflow` frame
+    and a failing source ends it with an `event: tail_error` frame (EventSource
+    keeps `error` for its own connection failures).
+    """
+    queue = TailQueue(policy=policy)
+    try:
+        async for events, dropped in batch_events(source, max_events, max_delay, queue):
+            if dropped:
+                yield b"event: dropped\ndata: " + dumps({"dropped": dropped}) + b"\n\n"
+            if events:
+                yield b"data: " + dumps(events) + b"\n\n"
+    except Exception as e:
+        yield b"event: tail_error\ndata: " + dumps({"error": str(e)}) + b"\n\n"
+        return
+    if queue.overflowed:
+        yield b"event: overflow\ndata: " + dumps({"queued": len(queue)}) + b"\n\n"
+
+
+async def filter_events(
+    source: AsyncIterator[Any],
+    level: Optional[str] = None,
+    keyword: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Normalize tail events to dicts and apply level/keyword filters before queueing."""
+    level = level.upper() if level else None
+    async for event in source:
+        if not isinstance(event, dict):
+            event = dict(event.__dict__)
+        if level and str(event.get("level", "")).upper() != level:
+            continue
+        if keyword and keyword not in str(event.get("message", "")):
+            continue
+        yield event
+
+
+class TailMultiplexer:
+    """
+    Runs many tail subscriptions over a single connection.
+
+    Each subscription batches its source through its own TailQueue and
+    hands frames tagged with the subscription id to a shared, bounded
+    outbox that one writer task drains.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+        outbox_size: int = WS_OUTBOX_SIZE,
+        max_subscriptions: int = WS_MAX_SUBSCRIPTIONS
+    ):
+        self._send = send
+        self.outbox: asyncio.Queue = asyncio.Queue(outbox_size)
+        self.max_subscriptions = max_subscriptions
+        self.subscriptions: Dict[str, asyncio.Task] = {}
+
+    async def run_writer(self) -> None:
+        while True:
+            frame = await self.outbox.get()
+            await self._send(frame)
+
+    def subscribe(self, sub_id: str, source: AsyncIterator[Any], policy: str = TAIL_DROP_POLICY) -> None:
+        if sub_id in self.subscriptions:
+            raise ValueError(f"Subscription {sub_id} already exists")
+        if len(self.subscriptions) >= self.max_subscriptions:
+            raise ValueError(f"At most {self.max_subscriptions} subscriptions per connection")
+        queue = TailQueue(policy=policy)
+        self.subscriptions[sub_id] = asyncio.create_task(self._pump(sub_id, source, queue))
+
+    def unsubscribe(self, sub_id: str) -> bool:
+        task = self.subscriptions.pop(sub_id, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def close(self) -> None:
+        tasks = list(self.subscriptions.values())
+        self.subscriptions.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _pump(self, sub_id: str, source: AsyncIterator[Any], queue: TailQueue) -> None:
+        try:
+            async for events, dropped in batch_events(source, queue=queue):
+                frame = {"id": sub_id}
+                if events:
+                    frame["events"] = events
+                if dropped:
+                    frame["dropped"] = dropped
+                await self.outbox.put(frame)
+            if queue.overflowed:
+                await self.outbox.put({"id": sub_id, "overflow": True})
+            else:
+                await self.outbox.put({"id": sub_id, "op": "ended"})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.outbox.put({"id": sub_id, "error": str(e)})
+        finally:
+            if self.subscriptions.get(sub_id) is asyncio.current_task():
+                del self.subscriptions[sub_id]
@@ -87,8 +87,8 @@ interface LogFilter {
             >Previous</button>
             <span>Page {{ currentPage }} of {{ totalPages }}</span>
             <button 
-              [disabled]="currentPage === totalPages"
-              (click)="setPage(currentPage + 1)"
+              [disabled]="currentPage >= totalPages && !nextCursor"
+              (click)="nextPage()"
             >Next</button>
             <button 
               [disabled]="currentPage === totalPages"
@@ -198,9 +198,12 @@ export class LogViewerComponent implements OnInit {
   logType: string = 'syslog';
   filePath: string = '';
 
-  // Pagination state
+  // Pagination state; logs are fetched from the server several table pages at a time
   currentPage = 1;
   pageSize = 50;
+  fetchSize = 500;
+  nextCursor: string | null = null;
+  private lastQuery: [string, string, string, string, string, string, string, string] | null = null;
   
   constructor(
     private readonly logService: LogService
@@ -240,6 +243,7 @@ export class LogViewerComponent implements OnInit {
     try {
       this.loading = true;
       this.error = null;
+      this.nextCursor = null;
       
       // Default to last hour if no dates are selected
       const now = new Date().toISOString();
@@ -248,7 +252,7 @@ export class LogViewerComponent implements OnInit {
          this.toast?.openToast('Please select a log group', 'error');
          return;
         }
-      this.logs = await this.logService.fetchLogs(
+      this.lastQuery = [
         this.platform,
         this.filters.startDate ?? oneHourAgo,
         this.filters.endDate ?? now,
@@ -257,7 +261,10 @@ export class LogViewerComponent implements OnInit {
         this.filters['logGroup'] ?? '',
         this.filters['keyword'] ?? '',
         this.filters['filePath'] ?? ''
-      );
+      ];
+      const page = await this.logService.fetchLogsPage(...this.lastQuery, this.fetchSize);
+      this.logs = page.logs;
+      this.nextCursor = page.next;
       
       // Reset to first page when new logs are loaded
       this.currentPage = 1;
@@ -293,6 +300,21 @@ export class LogViewerComponent implements OnInit {
     }
   }
 
+  async nextPage() {
+    if (this.currentPage >= this.totalPages && this.nextCursor && this.lastQuery) {
+      // Out of fetched logs: pull the next server page before moving on
+      try {
+        this.loading = true;
+        const page = await this.logService.fetchLogsPage(...this.lastQuery, this.fetchSize, this.nextCursor);
+        this.logs = [...this.logs, ...page.logs];
+        this.nextCursor = page.next;
+      } finally {
+        this.loading = false;
+      }
+    }
+    this.setPage(this.currentPage + 1);
+  }
+
   toggleLogTailing() {
     this.isTailingLogs = !this.isTailingLogs;
   
@@ -329,11 +351,30 @@ export class LogViewerComponent implements OnInit {
   
       this.toast?.openToast(`Tailing logs for ${this.platform}`, 'info');
   
-      this.subscription = this.logService.tailLogs(this.logGroupName, this.platform, this.logType, this.filePath).subscribe({
-        next: (logEvent) => {
-          this.logs = [...(this.logs || []), logEvent];
+      // Tails go over the multiplexed WebSocket, which filters by level and
+      // keyword on the server; fall back to SSE if the socket cannot be opened
+      const source = this.platform === 'local' ? this.logType
+        : this.platform === 'file' ? this.filePath
+        : this.logGroupName;
+      let received = false;
+      this.subscription = this.logService.tailMany({
+        [this.platform]: {
+          platform: this.platform,
+          source,
+          level: this.filters.level || undefined,
+          keyword: this.filters.keyword || undefined,
+        }
+      }).subscribe({
+        next: ({ events }) => {
+          received = true;
+          this.logs = [...(this.logs || []), ...events];
         },
         error: (error) => {
+          if (!received && error instanceof Event) {
+            console.warn('WebSocket tail unavailable, falling back to SSE');
+            this.tailOverSse();
+            return;
+          }
           this.toast?.openToast('Error tailing logs', 'error');
           console.error('Component error:', error);
         },
@@ -346,6 +387,21 @@ export class LogViewerComponent implements OnInit {
     }
   }
   
+  private tailOverSse() {
+    this.subscription = this.logService.tailLogs(this.logGroupName, this.platform, this.logType, this.filePath).subscribe({
+      next: (logEvents) => {
+        this.logs = [...(this.logs || []), ...logEvents];
+      },
+      error: (error) => {
+        this.toast?.openToast('Error tailing logs', 'error');
+        console.error('Component error:', error);
+      },
+      complete: () => {
+        console.log('Stream completed');
+      },
+    });
+  }
+
   stopTailingLogs() {
     if (this.subscription) {
       this.subscription.unsubscribe();
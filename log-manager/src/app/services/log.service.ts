@@ -15,8 +15,12 @@ export class LogService {
 
   constructor(private readonly http: HttpClient) {}
 
-  async fetchLogs(platform: string, start_time: string, end_time: string, log_type: string, log_level: string, log_group: string, keyword: string, file_path: string): Promise<any[]> {
-    const filters = {
+  /**
+   * Fetch one page of logs. Pass the returned `next` cursor back to get the
+   * following page; it is null on the last one.
+   */
+  async fetchLogsPage(platform: string, start_time: string, end_time: string, log_type: string, log_level: string, log_group: string, keyword: string, file_path: string, limit: number, cursor?: string | null): Promise<{ logs: any[], next: string | null }> {
+    const filters: Record<string, string | number> = {
       platform,
       start_time,
       end_time,
@@ -24,18 +28,25 @@ export class LogService {
       log_level,
       log_group,
       keyword,
-      file_path
+      file_path,
+      limit
     };
+    if (cursor) {
+      filters['cursor'] = cursor;
+    }
     try {
       const response = await firstValueFrom(
-        this.http.get<{ logs: any[] }>(`${this.API_URL}/logs`, {
+        this.http.get<{ logs: any[], next: string | null, truncated?: boolean }>(`${this.API_URL}/logs`, {
           params: filters
         })
       );
-      return response.logs;
+      if (response.truncated) {
+        console.warn('Log query hit its time budget; showing partial results');
+      }
+      return { logs: response.logs, next: response.next };
     } catch (error) {
       console.error('Error fetching logs:', error);
-      return [];
+      return { logs: [], next: null };
     }
   }
 
@@ -49,7 +60,7 @@ export class LogService {
     }
   }
 
-  tailLogs(logGroupName: string, platform: string, logType: string, filePath: string): Observable<any> {
+  tailLogs(logGroupName: string, platform: string, logType: string, filePath: string): Observable<any[]> {
     const token = this.authService.getToken();
     const url = this.getTailingUrl(logGroupName, platform, logType, filePath);
     return new Observable(observer => {
@@ -69,15 +80,34 @@ export class LogService {
         console.log('EventSource connected!', event);
       };
   
+      // The server sends micro-batches: one JSON array of log events per frame
       eventSource.onmessage = (event) => {  
         try {
-          const logEvent = JSON.parse(event.data);
-          observer.next(logEvent);
+          const logEvents = JSON.parse(event.data);
+          observer.next(Array.isArray(logEvents) ? logEvents : [logEvents]);
         } catch (error) {
           console.error('Error parsing event data:', error);
           console.log('Problematic data:', event.data);
         }
       };
+
+      eventSource.addEventListener('dropped', (event: any) => {
+        console.warn('Tail fell behind, events dropped:', JSON.parse(event.data).dropped);
+      });
+
+      eventSource.addEventListener('overflow', () => {
+        console.warn('Tail fell too far behind and was closed by the server');
+        eventSource.close();
+        observer.complete();
+      });
+
+      // The upstream tail failed; the server ends the stream after this frame
+      eventSource.addEventListener('tail_error', (event: any) => {
+        const message = JSON.parse(event.data).error;
+        console.error('Tail failed:', message);
+        eventSource.close();
+        observer.error(new Error(message));
+      });
   
       eventSource.onerror = (error) => {
         console.error('EventSource error:', error);
@@ -90,5 +120,62 @@ export class LogService {
       };
     });
   }
-  
-}
\ No newline at end of file
+
+  /**
+   * Tail several sources over one WebSocket. Emits { id, events } batches tagged
+   * with the subscription id; `subscriptions` maps id -> { platform, source, level?, keyword? }.
+   * Completes once every subscription has ended, and errors if they all failed.
+   */
+  tailMany(subscriptions: Record<string, { platform: string, source: string, level?: string, keyword?: string }>): Observable<{ id: string, events: any[] }> {
+    const token = this.authService.getToken();
+    const wsUrl = this.API_URL.replace(/^http/, 'ws');
+    return new Observable(observer => {
+      const socket = new WebSocket(`${wsUrl}/ws/tail?token=${token}`);
+      const active = new Set(Object.keys(subscriptions));
+      const failures: string[] = [];
+
+      const end = (id: string) => {
+        active.delete(id);
+        if (active.size === 0) {
+          socket.close();
+          if (failures.length === Object.keys(subscriptions).length) {
+            observer.error(new Error(failures.join('; ')));
+          } else {
+            observer.complete();
+          }
+        }
+      };
+
+      socket.onopen = () => {
+        Object.entries(subscriptions).forEach(([id, sub]) => {
+          socket.send(JSON.stringify({ op: 'subscribe', id, ...sub }));
+        });
+      };
+
+      socket.onmessage = (message) => {
+        const frame = JSON.parse(message.data);
+        if (frame.events) {
+          observer.next({ id: frame.id, events: frame.events });
+        }
+        if (frame.dropped) {
+          console.warn(`Subscription ${frame.id} dropped events:`, frame.dropped);
+        }
+        if (frame.error) {
+          console.error(`Subscription ${frame.id} error:`, frame.error);
+          failures.push(frame.error);
+          end(frame.id);
+        } else if (frame.overflow) {
+          console.warn(`Subscription ${frame.id} fell too far behind and was closed by the server`);
+          end(frame.id);
+        } else if (frame.op === 'ended') {
+          end(frame.id);
+        }
+      };
+
+      socket.onerror = (error) => observer.error(error);
+      socket.onclose = () => observer.complete();
+
+      return () => socket.close();
+    });
+  }
+}
@@ -32,10 +32,16 @@ class LogAggregator:
                     is_json=is_json
                 ))
                 
+                # Keep the line's own timestamp, or None when it has none, so
+                # collecting a file again yields the same entries and LogStorage
+                # skips them as duplicates; it stores timestamp-less lines at
+                # `collected_at`
+                now = datetime.now().isoformat()
                 logs.extend([{
                     'source': 'local',
                     'file_path': str(path),
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': entry.get('timestamp') if isinstance(entry, dict) else None,
+                    'collected_at': now,
                     'content': entry
                 } for entry in entries])
                 
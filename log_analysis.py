@@ -20,34 +20,62 @@ class LogAnalyzer:
         source_type: Optional[str] = None
     ) -> Dict:
         """Generate a summary of log data."""
-        logs = self.storage.query_logs(
+        # Hourly rollups: one row per hour, source and level instead of one per log
+        df = self._hourly_counts(start_time, end_time, source_type)
+        if df.empty:
+            return {"error": "No logs found for the specified period"}
+        
+        recent_errors = self.storage.query_logs(
             start_time=start_time,
             end_time=end_time,
             source_type=source_type,
-            limit=10000  # Increased limit for analysis
+            level='ERROR',
+            limit=5,
+            include_metadata=False
         )
         
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(logs)
-        if df.empty:
-            return {"error": "No logs found for the specified period"}
-            
-        # Convert timestamp strings to datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
         summary = {
             "period": {
                 "start": df['timestamp'].min().isoformat(),
                 "end": df['timestamp'].max().isoformat()
             },
-            "total_logs": len(df),
-            "by_source": df['source_type'].value_counts().to_dict(),
-            "by_level": df['level'].value_counts().to_dict(),
-            "logs_per_hour": df.groupby(df['timestamp'].dt.hour)['id'].count().to_dict(),
-            "recent_errors": df[df['level'].str.upper() == 'ERROR'].tail(5)[['timestamp', 'message']].to_dict('records')
+            "total_logs": int(df['count'].sum()),
+            "by_source": self._totals(df, 'source_type'),
+            "by_level": self._totals(df, 'level'),
+            "logs_per_hour": {
+                int(hour): int(count)
+                for hour, count in df.groupby(df['timestamp'].dt.hour)['count'].sum().items()
+            },
+            "recent_errors": [
+                {"timestamp": log['timestamp'], "message": log['message']}
+                for log in reversed(list(recent_errors))
+            ]
         }
         
         return summary
+
+    def _hourly_counts(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        source_type: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Log counts per hour, source and level from the rollup tables."""
+        df = pd.DataFrame(self.storage.rollup_counts(
+            start_time=start_time,
+            end_time=end_time,
+            source_type=source_type,
+            granularity='hour'
+        ))
+        if not df.empty:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    @staticmethod
+    def _totals(df: pd.DataFrame, by) -> Dict:
+        """Sum of counts per group, largest first, as plain ints."""
+        totals = df.groupby(by)['count'].sum().sort_values(ascending=False)
+        return {key: int(value) for key, value in totals.items()}
     
     def export_summary(
         self,
@@ -77,29 +105,23 @@ class LogAnalyzer:
         output_dir: str = 'reports'
     ):
         """Create various visualizations of log data."""
-        logs = self.storage.query_logs(
-            start_time=start_time,
-            end_time=end_time,
-            limit=10000
-        )
-        
-        df = pd.DataFrame(logs)
+        df = self._hourly_counts(start_time, end_time)
         if df.empty:
             return
             
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
         Path(output_dir).mkdir(exist_ok=True)
         
         # 1. Logs by Source Type
         fig_sources = px.pie(
             df,
             names='source_type',
+            values='count',
             title='Log Distribution by Source'
         )
         fig_sources.write_html(f"{output_dir}/logs_by_source.html")
         
         # 2. Logs Over Time
-        df_time = df.groupby(df['timestamp'].dt.date).size().reset_index()
+        df_time = df.groupby(df['timestamp'].dt.date)['count'].sum().reset_index()
         df_time.columns = ['date', 'count']
         
         fig_timeline = px.line(
@@ -111,7 +133,7 @@ class LogAnalyzer:
         fig_timeline.write_html(f"{output_dir}/logs_timeline.html")
         
         # 3. Log Levels Distribution (Fixed)
-        level_counts = df['level'].value_counts().reset_index()
+        level_counts = df.groupby('level')['count'].sum().reset_index()
         level_counts.columns = ['level', 'count']
         
         fig_levels = px.bar(
@@ -126,7 +148,7 @@ class LogAnalyzer:
         df['hour'] = df['timestamp'].dt.hour
         df['day'] = df['timestamp'].dt.day_name()
         
-        activity_matrix = pd.crosstab(df['day'], df['hour'])
+        activity_matrix = pd.crosstab(df['day'], df['hour'], values=df['count'], aggfunc='sum').fillna(0)
         
         fig_heatmap = go.Figure(data=go.Heatmap(
             z=activity_matrix.values,
@@ -2,14 +2,73 @@ import click
 import sqlite3
 from datetime import datetime, timedelta
 import json
+import time
 from typing import Optional, Dict, Any, List
 from tabulate import tabulate
 import re
-from dataclasses import dataclass
-from log_storage import LogStorage
+from dataclasses import dataclass, replace
+from log_storage import (
+    LogStorage,
+    ISO_TIMESTAMP_SQL,
+    MESSAGE_SQL,
+    ROLLUP_GRANULARITIES,
+    ROLLUP_RETENTION_DAYS,
+    fts_match_query,
+    to_epoch_ms,
+)
 from auth import AuthManager, requires_auth
 import os
 
+try:
+    import pyarrow.compute as pc
+except ImportError:  # only needed for archived partitions
+    pc = None
+
+# Fields `aggregate --field` can group by, and the SQL each one maps to
+GROUP_BY_FIELDS = {
+    'level': 'v.name',
+    'source': 's.name',
+    'source_name': 's.name',
+    'source_type': 's.type',
+    'date': "date(l.ts / 1000, 'unixepoch', 'localtime')",
+    'hour': "strftime('%H', l.ts / 1000, 'unixepoch', 'localtime')",
+    # Every version of a template counts towards the template it started as
+    'template': '(SELECT cluster_id FROM templates WHERE id = l.template_id)',
+}
+
+# The archive column each GROUP_BY_FIELDS entry is computed from when a
+# partition has been moved to Parquet; archives keep no template ids
+ARCHIVE_GROUP_COLUMNS = {
+    'level': 'level',
+    'source': 'source_name',
+    'source_name': 'source_name',
+    'source_type': 'source_type',
+    'date': 'ts',
+    'hour': 'ts',
+}
+
+# Fields a COUNT aggregate can read from the hourly rollups instead of
+# scanning logs: the rollup key to count by, and how the field is taken from
+# a LogStorage.rollup_counts() row
+COUNTER_FIELDS = {
+    'level': ('level', lambda row: row['level']),
+    'source': ('source', lambda row: row['source_name']),
+    'source_name': ('source', lambda row: row['source_name']),
+    'source_type': ('source', lambda row: row['source_type']),
+    'date': ('bucket', lambda row: datetime.fromtimestamp(row['bucket'] / 1000).strftime('%Y-%m-%d')),
+    'hour': ('bucket', lambda row: datetime.fromtimestamp(row['bucket'] / 1000).strftime('%H')),
+}
+
+HOUR_MS = ROLLUP_GRANULARITIES['hour']
+
+# How per-partition aggregate values combine into one
+MERGE_AGGREGATES = {
+    'COUNT': lambda a, b: a + b,
+    'SUM': lambda a, b: a + b,
+    'MIN': min,
+    'MAX': max,
+}
+
 @dataclass
 class QueryParams:
     """Query parameters container"""
@@ -18,6 +77,7 @@ class QueryParams:
     source_type: Optional[str] = None
     level: Optional[str] = None
     keyword: Optional[str] = None
+    template: Optional[int] = None
     limit: int = 1000
     group_by: Optional[str] = None
     aggregate: Optional[str] = None
@@ -48,67 +108,249 @@ class LogQuery:
             except ValueError:
                 raise ValueError(f"Invalid time format: {time_str}")
 
-    def build_query(self, params: QueryParams) -> tuple[str, list]:
-        """Build SQL query from parameters."""
-        base_query = """
+    def build_query(self, params: QueryParams, partition: str) -> tuple[str, list]:
+        """Build SQL query from parameters, over a single partition."""
+        base_query = f"""
             SELECT 
-                l.timestamp,
-                l.level,
-                l.message,
+                {ISO_TIMESTAMP_SQL} as timestamp,
+                v.name as level,
+                {MESSAGE_SQL} as message,
                 s.name as source_name,
                 s.type as source_type
         """
         
+        group_expr = None
+        if params.group_by:
+            group_expr = GROUP_BY_FIELDS.get(params.group_by)
+            if group_expr is None:
+                raise ValueError(
+                    f"Cannot group by {params.group_by}; choose from {', '.join(GROUP_BY_FIELDS)}"
+                )
+
         if params.aggregate:
             base_query = f"""
                 SELECT 
-                    {params.group_by},
+                    {group_expr} as {params.group_by},
                     {params.aggregate}(1) as count
             """
         
         query = f"""
             {base_query}
-            FROM logs l
+            FROM logs_{partition} l
             JOIN sources s ON l.source_id = s.id
+            LEFT JOIN levels v ON l.level_id = v.id
             WHERE 1=1
         """
         query_params = []
         
+        # Plain comparisons on l.ts / l.level_id / l.source_id keep these index range scans
         if params.start_time:
-            query += " AND datetime(l.timestamp) >= datetime(?)"
-            query_params.append(params.start_time.isoformat())
+            query += " AND l.ts >= ?"
+            query_params.append(to_epoch_ms(params.start_time))
         
         if params.end_time:
-            query += " AND datetime(l.timestamp) <= datetime(?)"
-            query_params.append(params.end_time.isoformat())
+            query += " AND l.ts <= ?"
+            query_params.append(to_epoch_ms(params.end_time))
+        
+        # Keyword search goes through the logs_fts index instead of scanning messages.
+        # The full-text match is then the selective part, so the leading + keeps
+        # SQLite from driving the query off the level/source indexes instead.
+        match = fts_match_query(params.keyword) if params.keyword else None
+        column = "+l" if match else "l"
         
         if params.source_type:
-            query += " AND s.type = ?"
+            query += f" AND {column}.source_id IN (SELECT id FROM sources WHERE type = ?)"
             query_params.append(params.source_type)
         
         if params.level:
-            query += " AND l.level = ?"
-            query_params.append(params.level)
+            query += f" AND {column}.level_id = (SELECT id FROM levels WHERE name = ?)"
+            query_params.append(params.level.upper())
         
-        if params.keyword:
-            query += " AND l.message LIKE ?"
-            query_params.append(f"%{params.keyword}%")
+        if params.template is not None:
+            query += f" AND {column}.template_id IN (SELECT id FROM templates WHERE cluster_id = ?)"
+            query_params.append(params.template)
         
-        if params.group_by:
-            query += f" GROUP BY {params.group_by}"
+        if match:
+            query += f" AND l.id IN (SELECT rowid FROM logs_fts_{partition} WHERE logs_fts_{partition} MATCH ?)"
+            query_params.append(match)
+        
+        if group_expr:
+            query += f" GROUP BY {group_expr}"
         
         if not params.aggregate:
-            query += " ORDER BY datetime(l.timestamp) DESC"
+            query += " ORDER BY l.ts DESC"
         
         if params.limit:
             query += " LIMIT ?"
             query_params.append(params.limit)
         
-        print(f"DEBUG - Query: {query}")  # Debug print
-        print(f"DEBUG - Params: {query_params}")  # Debug print
-        
         return query, query_params
 
+    def run_query(self, params: QueryParams) -> List[Dict[str, Any]]:
+        """
+        Run a query over the partitions overlapping its time window.
+
+        Searches read partitions newest first and stop once `limit` rows
+        are found; aggregates are computed per partition and merged.
+        """
+        if params.aggregate and params.aggregate.upper() not in MERGE_AGGREGATES:
+            raise ValueError(
+                f"Cannot aggregate with {params.aggregate}; choose from {', '.join(MERGE_AGGREGATES)}"
+            )
+        results = self.count_from_rollups(params) if params.aggregate else None
+        if results is None:
+            results = self._scan(params)
+
+        if not params.aggregate:
+            return results
+
+        merge = MERGE_AGGREGATES[params.aggregate.upper()]
+        merged: Dict[Any, Any] = {}
+        for row in results:
+            key = row[params.group_by]
+            merged[key] = merge(merged[key], row['count']) if key in merged else row['count']
+        rows = [
+            {params.group_by: key, 'count': value}
+            for key, value in sorted(merged.items(), key=lambda item: (item[0] is None, str(item[0])))
+        ]
+        if params.group_by == 'template':
+            templates = self.storage.templates()
+            for row in rows:
+                row['template_text'] = templates.get(row['template'])
+        return rows[:params.limit] if params.limit else rows
+
+    def count_from_rollups(self, params: QueryParams) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a COUNT aggregate from the hourly rollups, or return None if it needs a scan.
+
+        Eligible queries group by one of COUNTER_FIELDS and filter on time,
+        source type and level only. Whole hours are read from the rollups
+        (kept current on insert); the partial hours at either end of the
+        window are scanned, as is anything older than the hourly rollups'
+        retention, such as logs with unparseable timestamps (stored at
+        epoch 0), and anything up to the archive horizon, so the result is
+        the same as a scan's. Returns rows for run_query() to merge.
+        """
+        if (
+            params.aggregate.upper() != 'COUNT'
+            or params.group_by not in COUNTER_FIELDS
+            or params.keyword
+            or params.template is not None
+        ):
+            return None
+        # An hourly bucket maps onto one local date and hour only if the UTC offset is whole hours
+        if params.group_by in ('date', 'hour') and (time.timezone % 3600 or time.altzone % 3600):
+            return None
+
+        # Rollups outlive the partitions dropped by retention, so they are
+        # only read after the archive horizon (or, with nothing archived,
+        # from the oldest live partition). Late logs for an older day make a
+        # live partition before it, which is scanned with the archives.
+        with self.storage._get_connection() as conn:
+            anchor = conn.execute('SELECT MAX(end_ts) FROM log_archives').fetchone()[0]
+            if anchor is None:
+                anchor = conn.execute('SELECT MIN(start_ts) FROM log_partitions').fetchone()[0]
+        if anchor is None:
+            return []
+        start_ms = to_epoch_ms(params.start_time) if params.start_time else None
+        end_ms = to_epoch_ms(params.end_time) if params.end_time else None
+        # Whole hours [first_hour, end_hour) come from the rollups, which
+        # only go back ROLLUP_RETENTION_DAYS
+        horizon = to_epoch_ms(datetime.now() - timedelta(days=ROLLUP_RETENTION_DAYS['hour']))
+        first_hour = -(-max(start_ms or anchor, anchor, horizon) // HOUR_MS) * HOUR_MS
+        end_hour = (end_ms + 1) // HOUR_MS * HOUR_MS if end_ms is not None else None
+        if end_hour is not None and end_hour <= first_hour:
+            return None
+
+        # Epoch milliseconds are accepted wherever a time is (see to_epoch_ms),
+        # and keep the edges of the window exact
+        key, field = COUNTER_FIELDS[params.group_by]
+        counts = self.storage.rollup_counts(
+            start_time=first_hour,
+            end_time=end_hour - 1 if end_hour is not None else None,
+            source_type=params.source_type,
+            level=params.level,
+            granularity='hour',
+            by=(key,)
+        )
+        results = [{params.group_by: field(row), 'count': row['count']} for row in counts]
+        if start_ms is None or start_ms < first_hour:
+            results.extend(self._scan(replace(params, start_time=start_ms, end_time=first_hour - 1)))
+        if end_hour is not None and end_hour <= end_ms:
+            results.extend(self._scan(replace(params, start_time=end_hour, end_time=end_ms)))
+        return results
+
+    def _scan(self, params: QueryParams) -> List[Dict[str, Any]]:
+        """
+        Run the query over each live and archived partition in its window,
+        newest first; aggregates are left per partition.
+        """
+        start_ms = to_epoch_ms(params.start_time) if params.start_time else None
+        end_ms = to_epoch_ms(params.end_time) if params.end_time else None
+        results = []
+        with self.storage._get_connection() as conn:
+            cursor = conn.cursor()
+            segments = self.storage._segments(cursor, start_ms, end_ms)
+            archived = [name for name, is_archived in segments if is_archived]
+            if archived and (params.template is not None or params.group_by == 'template'):
+                raise ValueError(
+                    f"Partitions {', '.join(archived)} are archived and keep no template ids; "
+                    "narrow the time window to live partitions"
+                )
+            for partition, is_archived in segments:
+                remaining = params.limit - len(results) if params.limit and not params.aggregate else 0
+                if is_archived:
+                    results.extend(self._scan_archive(params, partition, start_ms, end_ms, remaining))
+                else:
+                    # Aggregates need every group from each partition before merging
+                    query, query_params = self.build_query(replace(params, limit=remaining), partition)
+                    cursor.execute(query, query_params)
+                    results.extend(dict(row) for row in cursor.fetchall())
+                if not params.aggregate and params.limit and len(results) >= params.limit:
+                    break
+        return results
+
+    def _scan_archive(
+        self,
+        params: QueryParams,
+        name: str,
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Run the query over one archived partition's Parquet file, giving the rows build_query() would."""
+        if not params.aggregate:
+            logs = self.storage._read_archive(
+                name, start_ms, end_ms, params.source_type, params.level, params.keyword, False, limit or None
+            )
+            return [
+                {key: log[key] for key in ('timestamp', 'level', 'message', 'source_name', 'source_type')}
+                for log in logs
+            ]
+
+        column = ARCHIVE_GROUP_COLUMNS.get(params.group_by)
+        if column is None:
+            raise ValueError(
+                f"Cannot group by {params.group_by}; choose from {', '.join(GROUP_BY_FIELDS)}"
+            )
+        table = self.storage._archive_table(
+            name, [column], start_ms, end_ms, params.source_type, params.level, params.keyword
+        )
+        values = table[column]
+        if column == 'ts':
+            # Counted per minute, then each minute is named by its local date
+            # or hour, which holds for any UTC offset in whole minutes
+            values = pc.divide(pc.cast(values, 'int64'), 60000)
+        rows = []
+        for entry in pc.value_counts(values).to_pylist():
+            key = entry['values']
+            if column == 'ts':
+                key = datetime.fromtimestamp(key * 60).strftime('%Y-%m-%d' if params.group_by == 'date' else '%H')
+            # What {aggregate}(1) gives over the group's rows
+            count = entry['counts'] if params.aggregate.upper() in ('COUNT', 'SUM') else 1
+            rows.append({params.group_by: key, 'count': count})
+        return rows
+
 @click.group()
 def cli():
     """Log Query CLI tool"""
@@ -120,10 +362,11 @@ def cli():
 @click.option('--end', '-e', help='End time (YYYY-MM-DD)')
 @click.option('--source', '-src', help='Source type (local/cloudwatch)')
 @click.option('--level', '-l', help='Log level')
-@click.option('--keyword', '-k', help='Keyword search')
+@click.option('--keyword', '-k', help='Keyword search: words, "exact phrase" or prefix*')
+@click.option('--template', '-t', type=int, help='Template id (see `aggregate --field template`)')
 @click.option('--limit', default=100, help='Limit results')
 @click.option('--format', '-f', type=click.Choice(['table', 'json']), default='table')
-def search(start, end, source, level, keyword, limit, format):
+def search(start, end, source, level, keyword, template, limit, format):
     """Search logs with various filters"""
     query_tool = LogQuery()
     
@@ -134,35 +377,32 @@ def search(start, end, source, level, keyword, limit, format):
             source_type=source,
             level=level,
             keyword=keyword,
+            template=template,
             limit=limit
         )
         
-        query, query_params = query_tool.build_query(params)
+        results = query_tool.run_query(params)
         
-        with query_tool.storage._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, query_params)
-            results = [dict(row) for row in cursor.fetchall()]
-            
-            if format == 'json':
-                click.echo(json.dumps(results, indent=2, default=str))
+        if format == 'json':
+            click.echo(json.dumps(results, indent=2, default=str))
+        else:
+            if results:
+                click.echo(tabulate(results, headers='keys', tablefmt='grid'))
             else:
-                if results:
-                    click.echo(tabulate(results, headers='keys', tablefmt='grid'))
-                else:
-                    click.echo("No results found")
-                    # Debug information
-                    click.echo("\nDebug Information:")
-                    click.echo(f"Database path: {query_tool.storage.db_path}")
-                    
-                    # Check if tables exist and have data
-                    cursor.execute("SELECT COUNT(*) FROM logs")
-                    log_count = cursor.fetchone()[0]
+                click.echo("No results found")
+                # Debug information
+                click.echo("\nDebug Information:")
+                click.echo(f"Database path: {query_tool.storage.db_path}")
+                
+                # Check if tables exist and have data
+                with query_tool.storage._get_connection() as conn:
+                    cursor = conn.cursor()
                     cursor.execute("SELECT COUNT(*) FROM sources")
                     source_count = cursor.fetchone()[0]
-                    
-                    click.echo(f"Total logs in database: {log_count}")
-                    click.echo(f"Total sources in database: {source_count}")
+                
+                click.echo(f"Total logs in database: {query_tool.storage.count_logs()}")
+                click.echo(f"Partitions searched: {len(query_tool.storage.partitions(params.start_time, params.end_time))}")
+                click.echo(f"Total sources in database: {source_count}")
                 
     except Exception as e:
         click.echo(f"Error executing query: {str(e)}")
@@ -186,15 +426,32 @@ def aggregate(field, start, end, source):
         aggregate='COUNT'
     )
     
-    query, query_params = query_tool.build_query(params)
-    
-    with query_tool.storage._get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, query_params)
-        results = [dict(row) for row in cursor.fetchall()]
+    results = query_tool.run_query(params)
     
     click.echo(tabulate(results, headers='keys', tablefmt='grid'))
 
+@cli.command()
+@requires_auth
+@click.option('--days', '-d', required=True, type=int, help='Keep this many days of logs')
+def prune(days):
+    """Drop log partitions older than the retention period"""
+    query_tool = LogQuery()
+    dropped = query_tool.storage.drop_partitions_before(datetime.now() - timedelta(days=days))
+    click.echo(f"Dropped {len(dropped)} partitions")
+
+@cli.command()
+@requires_auth
+@click.option('--retention-days', '-d', type=float, help='Also drop raw log partitions older than this')
+@click.option('--archive-after-days', '-a', type=float, help='Move partitions older than this to the Parquet archive')
+def compact(retention_days, archive_after_days):
+    """Update log rollups, archive and apply retention, and reclaim space"""
+    query_tool = LogQuery()
+    summary = query_tool.storage.compact(
+        raw_retention_days=retention_days,
+        archive_after_days=archive_after_days
+    )
+    click.echo(json.dumps(summary, indent=2))
+
 @cli.command()
 @click.option('--username', '-u', required=True, help='Username')
 @click.option('--role', '-r', default='reader', type=click.Choice(['reader', 'admin']))
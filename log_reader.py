@@ -6,6 +6,9 @@ from typing import Iterator, Union, Dict, List, Optional
 import gzip
 import re
 
+# Fallback for lines the pattern does not match: a syslog prefix such as "Oct 19 08:00:01"
+SYSLOG_PATTERN = re.compile(r'(?P<timestamp>[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2})\s+(?P<message>.*)')
+
 class LogReader:
     """A class to read and parse different types of log files."""
     
@@ -35,7 +38,9 @@ class LogReader:
                     Default pattern matches common log formats
         
         Returns:
-            Iterator of dictionaries containing parsed log entries
+            Iterator of dictionaries containing parsed log entries.
+            Lines that only carry a syslog timestamp keep it; lines
+            without any timestamp get None.
         """
         if pattern is None:
             # Default pattern matches: timestamp [level] message
@@ -53,12 +58,13 @@ class LogReader:
                 match = regex.match(line)
                 if match:
                     yield match.groupdict()
-                else:
-                    yield {
-                        'timestamp': datetime.now().isoformat(),
-                        'level': 'INFO',
-                        'message': line
-                    }
+                    continue
+                match = SYSLOG_PATTERN.match(line)
+                yield {
+                    'timestamp': match.group('timestamp') if match else None,
+                    'level': 'INFO',
+                    'message': match.group('message') if match else line
+                }
     
     def read_json(self) -> Iterator[Dict]:
         """
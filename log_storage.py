@@ -1,21 +1,959 @@
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 from pathlib import Path
+import atexit
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
 import time
 from contextlib import contextmanager
+from itertools import chain
+
+from log_templates import TemplateMiner, render
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # the Parquet archive tier is optional
+    pa = None
+
+try:
+    import zstandard
+except ImportError:  # message compression is optional
+    zstandard = None
+
+# Applied to every connection. WAL lets readers run while a batch is written;
+# synchronous=NORMAL only syncs at checkpoints, which is safe in WAL mode.
+# auto_vacuum lets compact() hand pages freed by dropped partitions back to the
+# OS; it only takes effect when the file is created (the alembic migration
+# converts existing databases), so it has to come first.
+PRAGMAS = (
+    'PRAGMA auto_vacuum=INCREMENTAL',
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+)
+
+# Logs written per transaction by store_logs
+STORE_BATCH_SIZE = 10000
+
+# Rows query_logs reads per step, and so log ids per metadata lookup
+# (well under SQLite's limit on bound parameters)
+QUERY_FETCH_SIZE = 500
+
+# Fingerprints checked per query when skipping already stored logs
+FINGERPRINT_LOOKUP_SIZE = 500
+
+# Rows per multi-row INSERT when writing a partition; one statement per
+# chunk costs far less than one step per row with executemany
+INSERT_CHUNK_ROWS = 250
+
+# Batches a LogWriter queues before producers block
+WRITER_MAX_PENDING = 64
+
+# How often blocked submit()/flush() calls check that the writer thread is alive
+WRITER_POLL_SECONDS = 0.5
+
+# Queued to tell the writer thread to finish
+_STOP = object()
+
+# Keys of a log entry that are stored as columns rather than metadata
+LOG_COLUMNS = frozenset(('timestamp', 'level', 'message', 'content', 'source'))
+
+# Levels are stored once in `levels` and referenced by id from `logs`
+DEFAULT_LEVELS = ('DEBUG', 'INFO', 'NOTICE', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Rows copied per transaction when migrating a legacy logs table
+MIGRATION_BATCH_SIZE = 50000
+
+# Logs are stored in one set of tables per time partition, aligned to UTC.
+# Width of each partition in epoch milliseconds, and how partitions are named.
+PARTITION_INTERVALS = {
+    'day': 24 * 60 * 60 * 1000,
+    'hour': 60 * 60 * 1000,
+}
+_PARTITION_NAME_FORMATS = {
+    'day': 'p%Y%m%d',
+    'hour': 'p%Y%m%d%H',
+}
+DEFAULT_PARTITION_INTERVAL = 'day'
+
+# Log counts per bucket, source and level are kept in one rollup table per
+# granularity: bucket width in epoch milliseconds, and days each is kept
+ROLLUP_GRANULARITIES = {
+    'minute': 60 * 1000,
+    'hour': 60 * 60 * 1000,
+}
+ROLLUP_RETENTION_DAYS = {
+    'minute': 30,
+    'hour': 730,
+}
+
+# Log ids folded into the rollups per transaction
+ROLLUP_BATCH_SIZE = 100000
+
+# Seconds between LogCompactor runs, and free pages returned to the OS per run
+COMPACTION_INTERVAL = 300
+COMPACTION_VACUUM_PAGES = 10000
+
+# Rows sampled per index by ANALYZE when compaction refreshes statistics
+ANALYSIS_LIMIT = 1000
+
+# Archived partitions are Parquet files sorted by timestamp. A row group is
+# the unit that timestamp/level/source statistics let readers skip, and
+# also the number of rows read from SQLite per step while exporting.
+ARCHIVE_ROW_GROUP_SIZE = 100000
+ARCHIVE_COMPRESSION = 'zstd'
+
+# With LogStorage(compress_messages=True), stored message bodies are zstd
+# frames compressed against a dictionary trained per source. The first
+# dictionary of a source is trained from its first COMPRESSION_TRAINING_SAMPLES
+# bodies; compaction trains a new version once the current one is older than
+# COMPRESSION_RETRAIN_DAYS. Frames omit the magic number, checksum and
+# dictionary id, which would otherwise be a large share of a short log line.
+COMPRESSION_TRAINING_SAMPLES = 2000
+COMPRESSION_DICT_SIZE = 16 * 1024
+COMPRESSION_LEVEL = 3
+COMPRESSION_RETRAIN_DAYS = 7
+
+# Renders logs.ts (epoch milliseconds) as a local ISO timestamp in SQL
+ISO_TIMESTAMP_SQL = "strftime('%Y-%m-%dT%H:%M:%f', l.ts / 1000.0, 'unixepoch', 'localtime')"
+
+# The full text of a log; compressed bodies are decompressed and templated
+# messages rebuilt by the log_message() function LogStorage registers on its
+# connections, only for the rows a query actually returns
+MESSAGE_SQL = 'log_message(l.message, l.template_id, l.params, l.dict_id)'
+
+# Quoted phrases and bare terms (optionally ending in * for a prefix) in a keyword query
+_KEYWORD_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+# A run of letters and digits: one token to the full-text index (FTS5's default
+# unicode61 tokenizer), and the RE2 class of characters between tokens
+_FTS_TOKEN = re.compile(r'[^\W_]+')
+_RE2_SEPARATOR = r'[^\pL\pN]'
+
+_TIMESTAMP_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%b/%Y:%H:%M:%S %z',
+    '%b %d %H:%M:%S',
+)
+
+
+def to_epoch_ms(value: Any) -> Optional[int]:
+    """
+    Convert a datetime, epoch number or timestamp string to epoch milliseconds.
+
+    Naive values are taken as local time. Returns None when the value
+    cannot be parsed.
+    """
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (int, float)):
+        # Epoch seconds or milliseconds
+        return int(value if value > 1e11 else value * 1000)
+    text = str(value).strip()
+    try:
+        return int(datetime.fromisoformat(text).timestamp() * 1000)
+    except ValueError:
+        pass
+    try:
+        return to_epoch_ms(float(text))
+    except ValueError:
+        pass
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if parsed.year == 1900:  # syslog timestamps carry no year
+            parsed = parsed.replace(year=datetime.now().year)
+        return int(parsed.timestamp() * 1000)
+    return None
+
+
+def from_epoch_ms(ms: int) -> str:
+    """Render epoch milliseconds as a local ISO timestamp."""
+    return datetime.fromtimestamp(ms / 1000).isoformat(timespec='milliseconds')
+
+
+def create_logs_table(
+    cursor: sqlite3.Cursor,
+    table: str = 'logs',
+    index_prefix: str = 'idx_logs',
+    autoincrement: bool = True
+) -> None:
+    """
+    Create the logs table and its indexes.
+
+    Timestamps are integer epoch milliseconds and levels are ids into
+    `levels`, so range scans on (source_id, ts) and (level_id, ts) are
+    plain index lookups. A message matched to a template is stored as
+    template_id plus params, with an empty message. When dict_id is set,
+    the stored body (params if templated, else message) is a zstd frame
+    compressed with that compression_dicts entry.
+    """
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY{' AUTOINCREMENT' if autoincrement else ''},
+            source_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            level_id INTEGER,
+            message TEXT NOT NULL,
+            template_id INTEGER,
+            params TEXT,
+            dict_id INTEGER,
+            FOREIGN KEY (source_id) REFERENCES sources(id),
+            FOREIGN KEY (level_id) REFERENCES levels(id)
+        )
+    ''')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_ts ON {table}(ts)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_source_ts ON {table}(source_id, ts)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_level_ts ON {table}(level_id, ts)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_template_ts ON {table}(template_id, ts)')
+
+
+def log_fingerprint(source: Tuple[str, str], stream: Optional[str], timestamp: Any, message: str) -> int:
+    """
+    64-bit content hash identifying a log for deduplication.
+
+    `timestamp` is the epoch ms, the raw text of a timestamp that could
+    not be parsed, or None for a log without one. The result fits an
+    SQLite INTEGER.
+    """
+    key = '\0'.join((source[0], source[1], stream or '', str(timestamp), message))
+    digest = hashlib.blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def create_levels_table(cursor: sqlite3.Cursor) -> None:
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS levels (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.executemany(
+        'INSERT OR IGNORE INTO levels (name) VALUES (?)',
+        [(level,) for level in DEFAULT_LEVELS]
+    )
+
+
+def create_templates_table(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the table of mined message templates.
+
+    Each version of a template is a row of its own and never changes, so
+    logs stored against an older version still render exactly. cluster_id
+    is the id of the first version and groups all versions of a template.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS templates (
+            id INTEGER PRIMARY KEY,
+            cluster_id INTEGER,
+            template TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_templates_cluster ON templates(cluster_id)')
+
+
+def add_template_columns(cursor: sqlite3.Cursor, table: str, index_prefix: str) -> None:
+    """Add the template_id and params columns to a logs table created before templates."""
+    columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    if 'template_id' not in columns:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN template_id INTEGER')
+    if 'params' not in columns:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN params TEXT')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_prefix}_template_ts ON {table}(template_id, ts)')
+
+
+def create_compression_dicts_table(cursor: sqlite3.Cursor) -> None:
+    """Create the table of per-source zstd dictionaries; each version is a row."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS compression_dicts (
+            id INTEGER PRIMARY KEY,
+            source_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            dict BLOB NOT NULL,
+            FOREIGN KEY (source_id) REFERENCES sources(id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_compression_dicts_source ON compression_dicts(source_id, id)')
+
+
+def add_compression_column(cursor: sqlite3.Cursor, table: str) -> None:
+    """Add the dict_id column to a logs table created before message compression."""
+    columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    if 'dict_id' not in columns:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN dict_id INTEGER')
+
+
+def zstd_decompressor(dict_data: bytes) -> 'zstandard.ZstdDecompressor':
+    """A decompressor for message bodies compressed with `dict_data`."""
+    return zstandard.ZstdDecompressor(
+        dict_data=zstandard.ZstdCompressionDict(dict_data),
+        format=zstandard.FORMAT_ZSTD1_MAGICLESS
+    )
+
+
+def zstd_compressor(dict_data: bytes) -> 'zstandard.ZstdCompressor':
+    """A compressor for message bodies, writing frames zstd_decompressor() reads."""
+    return zstandard.ZstdCompressor(
+        dict_data=zstandard.ZstdCompressionDict(dict_data),
+        compression_params=zstandard.ZstdCompressionParameters.from_level(
+            COMPRESSION_LEVEL,
+            format=zstandard.FORMAT_ZSTD1_MAGICLESS,
+            write_checksum=0,
+            write_dict_id=0
+        )
+    )
+
+
+def decompress_messages(cursor: sqlite3.Cursor, table: str) -> int:
+    """Store every compressed body in `table` as plain text again."""
+    rows = cursor.execute(
+        f'SELECT id, template_id, message, params, dict_id FROM {table} WHERE dict_id IS NOT NULL'
+    ).fetchall()
+    if not rows:
+        return 0
+    if zstandard is None:
+        raise RuntimeError('Decompressing messages requires zstandard (pip install zstandard)')
+    decompressors = {
+        row[0]: zstd_decompressor(row[1]) for row in cursor.execute('SELECT id, dict FROM compression_dicts')
+    }
+    updates = []
+    for log_id, template_id, message, params, dict_id in rows:
+        if template_id is None:
+            message = decompressors[dict_id].decompress(message).decode('utf-8')
+        else:
+            params = decompressors[dict_id].decompress(params).decode('utf-8')
+        updates.append((message, params, log_id))
+    cursor.executemany(f'UPDATE {table} SET message = ?, params = ?, dict_id = NULL WHERE id = ?', updates)
+    return len(rows)
+
+
+def materialize_messages(cursor: sqlite3.Cursor, table: str) -> int:
+    """Write the full text of every templated message in `table` back to its message column."""
+    templates = {row[0]: row[1].split(' ') for row in cursor.execute('SELECT id, template FROM templates')}
+    rows = cursor.execute(
+        f'SELECT id, template_id, params FROM {table} WHERE template_id IS NOT NULL'
+    ).fetchall()
+    cursor.executemany(
+        f'UPDATE {table} SET message = ?, template_id = NULL, params = NULL WHERE id = ?',
+        [(render(templates[template_id], params), log_id) for log_id, template_id, params in rows]
+    )
+    return len(rows)
+
+
+def create_fts_table(cursor: sqlite3.Cursor, table: str = 'logs_fts') -> bool:
+    """
+    Create a full-text index over log messages.
+
+    It is a contentless FTS5 table: only the index is stored, keyed by log
+    id. Stored messages may be templated or compressed, so the full text
+    is inserted explicitly and searches only read rowids back. Returns
+    True if the table was just created.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,))
+    if cursor.fetchone():
+        return False
+    cursor.execute(f"CREATE VIRTUAL TABLE {table} USING fts5(message, content='')")
+    return True
+
+
+def rebuild_fts_index(cursor: sqlite3.Cursor, partition: str) -> int:
+    """
+    Re-index the full text of every log in a partition; returns how many.
+
+    Messages are rendered with log_message(), so `cursor` must come from a
+    LogStorage connection.
+    """
+    table = f'logs_fts_{partition}'
+    cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('delete-all')")
+    cursor.execute(f'''
+        INSERT INTO {table} (rowid, message)
+        SELECT l.id, {MESSAGE_SQL} FROM logs_{partition} l
+    ''')
+    return cursor.rowcount
+
+
+def fts_match_query(keyword: str) -> Optional[str]:
+    """
+    Turn a search string into an FTS5 MATCH expression.
+
+    Words must all appear (in any order), "quoted text" must appear as a
+    phrase and a trailing * makes a word a prefix. Everything else is
+    quoted, so FTS5 operators and punctuation in the input are matched
+    as plain text. Returns None if there is nothing to search for.
+    """
+    terms = []
+    for text, prefix in keyword_terms(keyword):
+        term = '"' + text.replace('"', '""') + '"'
+        terms.append(term + '*' if prefix else term)
+    return ' '.join(terms) or None
+
+
+def keyword_terms(keyword: str) -> List[Tuple[str, bool]]:
+    """Split a search string into (text, is_prefix) terms; quoted phrases are one term."""
+    terms = []
+    for phrase, word in _KEYWORD_TOKEN.findall(keyword):
+        text = phrase if phrase else word
+        prefix = not phrase and len(word) > 1 and word.endswith('*')
+        text = text.rstrip('*') if prefix else text
+        if text.strip():
+            terms.append((text, prefix))
+    return terms
+
+
+def keyword_pattern(text: str, prefix: bool) -> Optional[str]:
+    """
+    RE2 pattern (for pyarrow) matching a keyword_terms() term the way the
+    full-text index does: its tokens in order, whole words except a prefix
+    term's last one, case-insensitively when used with ignore_case. None if
+    the term has no tokens, which the index ignores.
+    """
+    tokens = _FTS_TOKEN.findall(text)
+    if not tokens:
+        return None
+    pattern = f'(^|{_RE2_SEPARATOR})' + f'{_RE2_SEPARATOR}+'.join(tokens)
+    return pattern if prefix else pattern + f'($|{_RE2_SEPARATOR})'
+
+
+def is_legacy_schema(cursor: sqlite3.Cursor) -> bool:
+    """True if `logs` still has the old text timestamp column."""
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(logs)')}
+    return 'timestamp' in columns
+
+
+def migrate_logs_schema(
+    conn: sqlite3.Connection,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    progress=print
+) -> int:
+    """
+    Migrate a legacy logs table (text timestamps and levels) to the epoch-ms schema.
+
+    Rows are copied into `logs_new` in id order, one transaction per batch,
+    so writers using the old schema keep working meanwhile. A final short
+    transaction copies the rows added since, then swaps the tables. An
+    interrupted migration resumes from the last copied id. Timestamps that
+    cannot be parsed are stored as 0, and the original text is kept in
+    log_metadata under `raw_timestamp`. Returns the number of rows copied.
+    """
+    cursor = conn.cursor()
+    if not is_legacy_schema(cursor):
+        return 0
+
+    create_levels_table(cursor)
+    create_logs_table(cursor, 'logs_new')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_metadata (
+            log_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            FOREIGN KEY (log_id) REFERENCES logs(id),
+            PRIMARY KEY (log_id, key)
+        )
+    ''')
+    conn.commit()
+    level_ids = {name: level_id for level_id, name in cursor.execute('SELECT id, name FROM levels')}
+
+    def copy_batch(after_id: int, limit: Optional[int]) -> Tuple[int, int]:
+        query = 'SELECT id, source_id, timestamp, level, message FROM logs WHERE id > ? ORDER BY id'
+        params = [after_id]
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        rows = cursor.execute(query, params).fetchall()
+        converted = []
+        raw_timestamps = []
+        for log_id, source_id, timestamp, level, message in rows:
+            ts = to_epoch_ms(timestamp)
+            if ts is None:
+                ts = 0
+                raw_timestamps.append((log_id, 'raw_timestamp', str(timestamp)))
+            level_id = None
+            if level:
+                level = level.upper()
+                level_id = level_ids.get(level)
+                if level_id is None:
+                    cursor.execute('INSERT OR IGNORE INTO levels (name) VALUES (?)', (level,))
+                    cursor.execute('SELECT id FROM levels WHERE name = ?', (level,))
+                    level_id = level_ids[level] = cursor.fetchone()[0]
+            converted.append((log_id, source_id or 0, ts, level_id, message))
+        cursor.executemany(
+            'INSERT INTO logs_new (id, source_id, ts, level_id, message) VALUES (?, ?, ?, ?, ?)',
+            converted
+        )
+        cursor.executemany(
+            'INSERT OR REPLACE INTO log_metadata (log_id, key, value) VALUES (?, ?, ?)',
+            raw_timestamps
+        )
+        return len(rows), rows[-1][0] if rows else after_id
+
+    last_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM logs_new').fetchone()[0]
+    copied = 0
+    while True:
+        cursor.execute('BEGIN IMMEDIATE')
+        count, last_id = copy_batch(last_id, batch_size)
+        conn.commit()
+        copied += count
+        if count:
+            progress(f"Migrated {copied} logs (up to id {last_id})")
+        if count < batch_size:
+            break
+
+    # Cut over: pick up rows written during the copy, then swap the tables
+    cursor.execute('BEGIN IMMEDIATE')
+    count, last_id = copy_batch(last_id, None)
+    copied += count
+    cursor.execute('DROP TABLE logs')
+    cursor.execute('ALTER TABLE logs_new RENAME TO logs')
+    conn.commit()
+    progress(f"Logs table migrated: {copied} rows copied")
+    return copied
+
+
+def create_partition_registry(cursor: sqlite3.Cursor) -> None:
+    """Create the tables listing partitions and archives, and the table handing out log ids."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_partitions (
+            name TEXT PRIMARY KEY,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_sequence (
+            name TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_archives (
+            name TEXT PRIMARY KEY,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL
+        )
+    ''')
+
+
+def create_rollup_tables(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the log_rollups_<granularity> tables.
+
+    Each row counts the logs of one source and level in one bucket, where
+    bucket is the bucket start in epoch ms. Logs without a level are
+    counted under level_id 0 so they still have a unique key.
+    """
+    for granularity in ROLLUP_GRANULARITIES:
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS log_rollups_{granularity} (
+                bucket INTEGER NOT NULL,
+                source_id INTEGER NOT NULL,
+                level_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (bucket, source_id, level_id)
+            ) WITHOUT ROWID
+        ''')
+
+
+def archive_schema() -> 'pa.Schema':
+    """Columns of an archived partition; levels and sources are stored by name."""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('ts', pa.timestamp('ms', tz='UTC')),
+        ('level', pa.string()),
+        ('source_name', pa.string()),
+        ('source_type', pa.string()),
+        ('message', pa.string()),
+        ('metadata', pa.string()),  # JSON object
+    ])
+
+
+def has_unpartitioned_logs(cursor: sqlite3.Cursor) -> bool:
+    """True if logs are still kept in a single `logs` table."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs'")
+    return cursor.fetchone() is not None
+
+
+def create_partition(cursor: sqlite3.Cursor, name: str, start_ts: int, end_ts: int) -> None:
+    """
+    Create and register the tables of one partition.
+
+    Partition `name` covers start_ts <= ts < end_ts and is stored in
+    logs_<name>, log_metadata_<name>, the logs_fts_<name> index and the
+    log_fingerprints_<name> set of stored log fingerprints.
+    """
+    create_logs_table(cursor, f'logs_{name}', f'idx_logs_{name}', autoincrement=False)
+    create_fingerprint_table(cursor, name)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS log_metadata_{name} (
+            log_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            FOREIGN KEY (log_id) REFERENCES logs_{name}(id),
+            PRIMARY KEY (log_id, key)
+        )
+    ''')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_log_metadata_{name}_key ON log_metadata_{name}(key)')
+    create_fts_table(cursor, f'logs_fts_{name}')
+    cursor.execute(
+        'INSERT OR IGNORE INTO log_partitions (name, start_ts, end_ts) VALUES (?, ?, ?)',
+        (name, start_ts, end_ts)
+    )
+
+
+def create_fingerprint_table(cursor: sqlite3.Cursor, partition: str) -> None:
+    """
+    Create the fingerprint set of a partition.
+
+    A log's fingerprint covers its timestamp, so duplicates always fall in
+    the same partition. The fingerprint is the rowid, so the table is a
+    single b-tree of 64-bit keys.
+    """
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS log_fingerprints_{partition} (fingerprint INTEGER PRIMARY KEY)')
+
+
+def backfill_fingerprints(cursor: sqlite3.Cursor, partition: str, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """Fingerprint the logs already stored in a partition; returns how many were read."""
+    templates = {row[0]: row[1].split(' ') for row in cursor.execute('SELECT id, template FROM templates')}
+    decompressors: Dict[int, Any] = {}
+    insert_cursor = cursor.connection.cursor()
+    cursor.execute(f'''
+        SELECT s.name, s.type,
+               (SELECT value FROM log_metadata_{partition} m WHERE m.log_id = l.id AND m.key = 'stream'),
+               l.ts,
+               (SELECT value FROM log_metadata_{partition} m WHERE m.log_id = l.id AND m.key = 'raw_timestamp'),
+               l.message, l.template_id, l.params, l.dict_id
+        FROM logs_{partition} l
+        JOIN sources s ON l.source_id = s.id
+    ''')
+    read = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return read
+        fingerprints = []
+        for name, source_type, stream, ts, raw_timestamp, message, template_id, params, dict_id in rows:
+            if dict_id is not None:
+                if dict_id not in decompressors:
+                    data = insert_cursor.execute('SELECT dict FROM compression_dicts WHERE id = ?', (dict_id,)).fetchone()[0]
+                    decompressors[dict_id] = zstd_decompressor(data)
+                body = decompressors[dict_id].decompress(message if template_id is None else params).decode('utf-8')
+                message, params = (body, params) if template_id is None else (message, body)
+            if template_id is not None:
+                message = render(templates[template_id], params)
+            timestamp = raw_timestamp if raw_timestamp is not None else ts
+            fingerprints.append((log_fingerprint((name, source_type), stream, timestamp, message),))
+        insert_cursor.executemany(
+            f'INSERT OR IGNORE INTO log_fingerprints_{partition} (fingerprint) VALUES (?)',
+            fingerprints
+        )
+        read += len(rows)
+
+
+def backfill_archive_fingerprints(
+    cursor: sqlite3.Cursor,
+    partition: str,
+    path: str,
+    batch_size: int = MIGRATION_BATCH_SIZE
+) -> int:
+    """Fingerprint the logs in an archived partition's Parquet file; returns how many were read."""
+    columns = ['source_name', 'source_type', 'ts', 'message', 'metadata']
+    read = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size, columns=columns):
+        fingerprints = []
+        for name, source_type, ts, message, metadata in zip(
+            batch.column(0).to_pylist(),
+            batch.column(1).to_pylist(),
+            pc.cast(batch.column(2), pa.int64()).to_pylist(),
+            batch.column(3).to_pylist(),
+            batch.column(4).to_pylist()
+        ):
+            metadata = json.loads(metadata) if metadata else {}
+            timestamp = metadata.get('raw_timestamp', ts)
+            fingerprints.append((log_fingerprint((name, source_type), metadata.get('stream'), timestamp, message),))
+        cursor.executemany(
+            f'INSERT OR IGNORE INTO log_fingerprints_{partition} (fingerprint) VALUES (?)',
+            fingerprints
+        )
+        read += batch.num_rows
+    return read
+
+
+def find_partition(
+    cursor: sqlite3.Cursor,
+    ts: int,
+    interval: str = DEFAULT_PARTITION_INTERVAL
+) -> Tuple[str, int, int]:
+    """
+    Return (name, start_ts, end_ts) of the partition holding `ts`.
+
+    The partition is created if none covers `ts` yet, so this must run
+    inside a write transaction.
+    """
+    cursor.execute('''
+        SELECT name, start_ts, end_ts FROM log_partitions
+        WHERE start_ts <= ? AND end_ts > ?
+        ORDER BY start_ts DESC LIMIT 1
+    ''', (ts, ts))
+    row = cursor.fetchone()
+    if row:
+        return tuple(row)
+    width = PARTITION_INTERVALS[interval]
+    start_ts = ts - ts % width
+    name = datetime.fromtimestamp(start_ts / 1000, timezone.utc).strftime(_PARTITION_NAME_FORMATS[interval])
+    create_partition(cursor, name, start_ts, start_ts + width)
+    return name, start_ts, start_ts + width
+
+
+def list_partitions(
+    cursor: sqlite3.Cursor,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None
+) -> List[str]:
+    """Names of the partitions overlapping [start_ms, end_ms], newest first."""
+    query = 'SELECT name FROM log_partitions WHERE 1=1'
+    params = []
+    if start_ms is not None:
+        query += ' AND end_ts > ?'
+        params.append(start_ms)
+    if end_ms is not None:
+        query += ' AND start_ts <= ?'
+        params.append(end_ms)
+    query += ' ORDER BY start_ts DESC'
+    return [row[0] for row in cursor.execute(query, params)]
+
+
+def insert_rows(cursor: sqlite3.Cursor, insert: str, width: int, rows: Sequence[Tuple]) -> None:
+    """Run `insert` ('INSERT ... VALUES') for `rows` of `width` values, INSERT_CHUNK_ROWS per statement."""
+    placeholders = '(' + ', '.join('?' * width) + ')'
+    full_chunk = None
+    for i in range(0, len(rows), INSERT_CHUNK_ROWS):
+        chunk = rows[i:i + INSERT_CHUNK_ROWS]
+        if len(chunk) == INSERT_CHUNK_ROWS:
+            sql = full_chunk = full_chunk or f"{insert} {', '.join([placeholders] * INSERT_CHUNK_ROWS)}"
+        else:
+            sql = f"{insert} {', '.join([placeholders] * len(chunk))}"
+        cursor.execute(sql, list(chain.from_iterable(chunk)))
+
+
+def insert_partition_rows(
+    cursor: sqlite3.Cursor,
+    partition: str,
+    log_rows: List[Tuple],
+    metadata_rows: List[Tuple],
+    fts_rows: Optional[List[Tuple]] = None,
+    fingerprints: Optional[List[int]] = None
+) -> None:
+    """
+    Insert logs and their metadata into a partition.
+
+    `log_rows` are (id, source_id, ts, level_id, message, template_id, params, dict_id).
+    The full-text index gets (id, full message) `fts_rows`, which default to
+    the stored messages; templated or compressed logs must pass them.
+    `fingerprints` are added to the partition's fingerprint set.
+    """
+    insert_rows(
+        cursor,
+        f'INSERT INTO logs_{partition} (id, source_id, ts, level_id, message, template_id, params, dict_id) VALUES',
+        8,
+        log_rows
+    )
+    insert_rows(
+        cursor,
+        f'INSERT INTO logs_fts_{partition} (rowid, message) VALUES',
+        2,
+        fts_rows if fts_rows is not None else [(row[0], row[4]) for row in log_rows]
+    )
+    if metadata_rows:
+        insert_rows(cursor, f'INSERT INTO log_metadata_{partition} (log_id, key, value) VALUES', 3, metadata_rows)
+    if fingerprints:
+        insert_rows(
+            cursor,
+            f'INSERT OR IGNORE INTO log_fingerprints_{partition} (fingerprint) VALUES',
+            1,
+            [(fingerprint,) for fingerprint in fingerprints]
+        )
+
+
+def drop_partition(cursor: sqlite3.Cursor, name: str, keep_fingerprints: bool = False) -> None:
+    """Drop every table of a partition and unregister it; archiving keeps the fingerprints."""
+    cursor.execute(f'DROP TABLE IF EXISTS logs_fts_{name}')
+    if not keep_fingerprints:
+        cursor.execute(f'DROP TABLE IF EXISTS log_fingerprints_{name}')
+    cursor.execute(f'DROP TABLE IF EXISTS log_metadata_{name}')
+    cursor.execute(f'DROP TABLE IF EXISTS logs_{name}')
+    cursor.execute('DELETE FROM log_partitions WHERE name = ?', (name,))
+
+
+def migrate_to_partitions(
+    conn: sqlite3.Connection,
+    interval: str = DEFAULT_PARTITION_INTERVAL,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    progress=print
+) -> int:
+    """
+    Move logs from the single `logs` table into time partitions.
+
+    Rows are moved in id order, one transaction per batch, and deleted
+    from `logs` as they go, so an interrupted migration simply carries
+    on with what is left. Writers still using `logs` keep working until
+    the final transaction moves the remaining rows and drops `logs`,
+    log_metadata and logs_fts. Log ids are kept. Returns the number of
+    rows moved.
+    """
+    cursor = conn.cursor()
+    if not has_unpartitioned_logs(cursor):
+        return 0
+
+    create_partition_registry(cursor)
+    conn.commit()
+    partitions: Dict[int, Tuple[str, int, int]] = {}
+    width = PARTITION_INTERVALS[interval]
+
+    def move_batch(limit: Optional[int]) -> Tuple[int, int]:
+        query = 'SELECT id, source_id, ts, level_id, message FROM logs ORDER BY id'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        rows = cursor.execute(query).fetchall()
+        if not rows:
+            return 0, 0
+        first_id, last_id = rows[0][0], rows[-1][0]
+        metadata: Dict[int, List[Tuple]] = {}
+        for log_id, key, value in cursor.execute(
+            'SELECT log_id, key, value FROM log_metadata WHERE log_id BETWEEN ? AND ?',
+            (first_id, last_id)
+        ):
+            metadata.setdefault(log_id, []).append((log_id, key, value))
+
+        groups: Dict[str, Tuple[List, List]] = {}
+        for row in rows:
+            ts = row[2]
+            partition = partitions.get(ts // width)
+            if partition is None or not partition[1] <= ts < partition[2]:
+                partition = partitions[ts // width] = find_partition(cursor, ts, interval)
+            log_rows, metadata_rows = groups.setdefault(partition[0], ([], []))
+            log_rows.append(tuple(row) + (None, None, None))
+            metadata_rows.extend(metadata.get(row[0], ()))
+        for name, (log_rows, metadata_rows) in groups.items():
+            insert_partition_rows(cursor, name, log_rows, metadata_rows)
+
+        cursor.execute('DELETE FROM log_metadata WHERE log_id <= ?', (last_id,))
+        cursor.execute('DELETE FROM logs WHERE id <= ?', (last_id,))
+        cursor.execute('''
+            INSERT INTO log_sequence (name, seq) VALUES ('logs', ?)
+            ON CONFLICT(name) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        ''', (last_id,))
+        return len(rows), last_id
+
+    moved = 0
+    while True:
+        cursor.execute('BEGIN IMMEDIATE')
+        count, last_id = move_batch(batch_size)
+        conn.commit()
+        moved += count
+        if count:
+            progress(f"Partitioned {moved} logs (up to id {last_id})")
+        if count < batch_size:
+            break
+
+    # Cut over: move rows written meanwhile, then drop the old tables
+    cursor.execute('BEGIN IMMEDIATE')
+    count, _ = move_batch(None)
+    moved += count
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'logs'")
+    row = cursor.fetchone()
+    if row:
+        cursor.execute('''
+            INSERT INTO log_sequence (name, seq) VALUES ('logs', ?)
+            ON CONFLICT(name) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        ''', (row[0],))
+    cursor.execute('DROP TABLE IF EXISTS logs_fts')
+    cursor.execute('DROP TABLE IF EXISTS log_metadata')
+    cursor.execute('DROP TABLE logs')
+    conn.commit()
+    progress(f"Logs partitioned by {interval}: {moved} rows moved")
+    return moved
+
 
 class LogStorage:
     """Stores and manages logs in SQLite database."""
     
-    def __init__(self, db_path: str = 'logs.db'):
+    def __init__(
+        self,
+        db_path: str = 'logs.db',
+        partition_interval: str = DEFAULT_PARTITION_INTERVAL,
+        archive_dir: Optional[str] = None,
+        mine_templates: bool = True,
+        compress_messages: bool = False,
+        deduplicate: bool = True
+    ):
         """
         Initialize the log storage.
         
         Args:
             db_path: Path to SQLite database file
+            partition_interval: 'day' or 'hour', the width of new partitions
+            archive_dir: Where archived partitions are written as Parquet
+                (defaults to <db name>_archive next to the database)
+            mine_templates: Store messages as a template id plus parameters
+                (see log_templates); False stores every message as-is
+            compress_messages: Compress stored message bodies with zstd
+                dictionaries trained per source (needs zstandard)
+            deduplicate: Skip logs that are already stored; fingerprints
+                are recorded either way
         """
+        if partition_interval not in PARTITION_INTERVALS:
+            raise ValueError(
+                f"Unknown partition interval {partition_interval}; choose from {', '.join(PARTITION_INTERVALS)}"
+            )
+        if compress_messages and zstandard is None:
+            raise RuntimeError('Compressing messages requires zstandard (pip install zstandard)')
         self.db_path = db_path
+        self.partition_interval = partition_interval
+        self.archive_dir = archive_dir or f'{os.path.splitext(db_path)[0]}_archive'
+        # (name, type) -> sources.id, so ingest does not look sources up per log
+        self._source_ids: Dict[Tuple[str, str], int] = {}
+        self._level_ids: Dict[str, int] = {}
+        # ts // partition width -> (name, start_ts, end_ts) of the partition last used for it
+        self._partitions: Dict[int, Tuple[str, int, int]] = {}
+        # PRAGMA schema_version as of this storage's last write; a different
+        # value means another connection (e.g. a LogCompactor with its own
+        # LogStorage) created or dropped tables, so _partitions may be stale
+        self._schema_version: Optional[int] = None
+        self.mine_templates = mine_templates
+        # Loaded from `templates` on the first write
+        self._miner: Optional[TemplateMiner] = None
+        # templates.id -> template tokens, for rendering messages in log_message()
+        self._template_tokens: Dict[int, List[str]] = {}
+        self.deduplicate = deduplicate
+        self.compress_messages = compress_messages
+        # sources.id -> (compression_dicts.id, compressor) of its current
+        # dictionary, loaded on the first write
+        self._compressors: Optional[Dict[int, Tuple[int, Any]]] = None
+        # sources.id -> bodies seen before its first dictionary is trained
+        self._samples: Dict[int, List[bytes]] = {}
+        # compression_dicts.id -> dictionary data, for log_message()
+        self._dictionaries: Dict[int, bytes] = {}
+        # Decompressors are reused but not shared between threads; a
+        # rollback bumps the generation so stale ones are dropped
+        self._local = threading.local()
+        self._generation = 0
+        # Held while writing, so the caches above are only changed by one
+        # thread at a time (e.g. a LogWriter and a caller sharing this storage)
+        self._lock = threading.RLock()
         self._init_db()
     
     @contextmanager
@@ -26,6 +964,9 @@ class LogStorage:
             try:
                 conn = sqlite3.connect(self.db_path, timeout=20.0)  # Increase timeout
                 conn.row_factory = sqlite3.Row
+                for pragma in PRAGMAS:
+                    conn.execute(pragma)
+                conn.create_function('log_message', 4, self._render_message, deterministic=True)
                 yield conn
                 return
             except sqlite3.OperationalError as e:
@@ -44,6 +985,7 @@ class LogStorage:
         """Initialize database schema."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
+
             
             # Sources table for log sources (local files, cloud services)
             cursor.execute('''
@@ -56,125 +998,494 @@ class LogStorage:
                 )
             ''')
             
-            # Main logs table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    source_id INTEGER NOT NULL,
-                    timestamp TIMESTAMP NOT NULL,
-                    level TEXT,
-                    message TEXT NOT NULL,
-                    FOREIGN KEY (source_id) REFERENCES sources(id)
-                )
-            ''')
-            
-            # Metadata table for additional log properties
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS log_metadata (
-                    log_id INTEGER NOT NULL,
-                    key TEXT NOT NULL,
-                    value TEXT NOT NULL,
-                    FOREIGN KEY (log_id) REFERENCES logs(id),
-                    PRIMARY KEY (log_id, key)
+            # Log levels, referenced by id from logs
+            create_levels_table(cursor)
+
+            # Logs, their metadata and full-text index live in per-partition
+            # tables created on first write; this registry lists them
+            if has_unpartitioned_logs(cursor):
+                raise RuntimeError(
+                    f"{self.db_path} keeps logs in a single unpartitioned table; "
+                    "run `alembic upgrade head` to migrate it"
                 )
-            ''')
-            
-            # Indexes for better query performance
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_level ON logs(level)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metadata_key ON log_metadata(key)')
+            create_partition_registry(cursor)
+
+            # Message templates mined on ingest, and compression dictionaries
+            create_templates_table(cursor)
+            create_compression_dicts_table(cursor)
+
+            # Per-minute and per-hour counts, kept current on insert and caught up by compact()
+            create_rollup_tables(cursor)
             
             conn.commit()
     
     def add_source(self, name: str, source_type: str) -> int:
         """Add or get a log source."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        with self._lock, self._get_connection() as conn:
+            source_id = self._source_id(conn.cursor(), name, source_type)
+            conn.commit()
+            return source_id
+
+    def _source_id(self, cursor: sqlite3.Cursor, name: str, source_type: str) -> int:
+        """Get or create a source id on an open cursor, using the in-memory cache."""
+        key = (name, source_type)
+        source_id = self._source_ids.get(key)
+        if source_id is None:
             cursor.execute('''
                 INSERT OR IGNORE INTO sources (name, type)
                 VALUES (?, ?)
-            ''', (name, source_type))
-            
-            if cursor.rowcount == 0:  # Source already exists
-                cursor.execute('''
-                    SELECT id FROM sources
-                    WHERE name = ? AND type = ?
-                ''', (name, source_type))
-                return cursor.fetchone()[0]
-            
-            conn.commit()
-            return cursor.lastrowid
-    
-    def store_logs(self, logs: List[Dict[str, Any]]) -> None:
-        """Store multiple log entries with improved error handling."""
+            ''', key)
+            cursor.execute('''
+                SELECT id FROM sources
+                WHERE name = ? AND type = ?
+            ''', key)
+            source_id = self._source_ids[key] = cursor.fetchone()[0]
+        return source_id
+
+    def _level_id(self, cursor: sqlite3.Cursor, level: Optional[str]) -> Optional[int]:
+        """Get or create the id of a level name, using the in-memory cache."""
+        if not level:
+            return None
+        level_id = self._level_ids.get(level)
+        if level_id is None:
+            cursor.execute('INSERT OR IGNORE INTO levels (name) VALUES (?)', (level,))
+            cursor.execute('SELECT id FROM levels WHERE name = ?', (level,))
+            level_id = self._level_ids[level] = cursor.fetchone()[0]
+        return level_id
+
+    @staticmethod
+    def _prepare_log(log: Dict[str, Any]) -> Tuple[Tuple[str, str], int, str, str, List[Tuple[str, str]], int]:
+        """
+        Normalize one log entry for insertion.
+
+        Returns ((source name, source type), epoch ms, level, message, metadata items, fingerprint).
+        """
+        # Extract message from content if it's a dict
+        content = log['content']
+        if isinstance(content, dict):
+            message = content.get('message', str(content))
+        else:
+            message = str(content)
+
+        source = (log.get('log_group', log.get('file_path', 'unknown')), log['source'])
+        metadata = [(k, str(v)) for k, v in log.items() if k not in LOG_COLUMNS]
+
+        # A log without a timestamp of its own (a None 'timestamp') is stored
+        # at `collected_at` but fingerprinted on source and content alone, so
+        # collecting it again is still a duplicate
+        if log['timestamp'] is None:
+            ts = to_epoch_ms(log.get('collected_at') or datetime.now())
+            timestamp = None
+        else:
+            ts = to_epoch_ms(log['timestamp'])
+            timestamp = ts
+        # Keep unparseable timestamps as metadata rather than dropping the log
+        if ts is None:
+            ts = 0
+            timestamp = str(log['timestamp'])
+            metadata.append(('raw_timestamp', timestamp))
+
+        stream = log.get('stream')
+        fingerprint = log_fingerprint(source, str(stream) if stream is not None else None, timestamp, message)
+        level = log.get('level', 'INFO')
+        return source, ts, level.upper() if level else None, message, metadata, fingerprint
+
+    def _template_for(self, cursor: sqlite3.Cursor, message: str) -> Tuple[str, Optional[int], Optional[str]]:
+        """
+        Mine `message` and return the (message, template_id, params) to store.
+
+        Messages that get no template are stored as they are. A new or
+        generalized template is saved as a new version first.
+        """
+        if self._miner is None:
+            self._miner = TemplateMiner()
+            # The latest version of each template
+            for template_id, cluster_id, template in cursor.execute(
+                'SELECT MAX(id), cluster_id, template FROM templates GROUP BY cluster_id'
+            ):
+                self._template_tokens[template_id] = self._miner.load(template, cluster_id, template_id).tokens
+        learned = self._miner.learn(message)
+        if learned is None:
+            return message, None, None
+        cluster, changed, params = learned
+        if changed:
+            template = ' '.join(cluster.tokens)
+            cursor.execute(
+                'INSERT OR IGNORE INTO templates (cluster_id, template) VALUES (?, ?)',
+                (cluster.cluster_id, template)
+            )
+            cursor.execute('SELECT id, cluster_id FROM templates WHERE template = ?', (template,))
+            cluster.template_id, cluster.cluster_id = cursor.fetchone()
+            if cluster.cluster_id is None:
+                cursor.execute('UPDATE templates SET cluster_id = id WHERE id = ?', (cluster.template_id,))
+                cluster.cluster_id = cluster.template_id
+            self._template_tokens[cluster.template_id] = cluster.tokens
+        return '', cluster.template_id, params
+
+    def _compress_body(self, cursor: sqlite3.Cursor, source_id: int, body: str) -> Tuple[Any, Optional[int]]:
+        """
+        Compress a message body with its source's dictionary; returns (value to store, dict_id).
+
+        Bodies are stored as they are until the source has a dictionary, or
+        when compressing would not make them smaller.
+        """
+        if self._compressors is None:
+            self._compressors = {}
+            for dict_id, dict_source_id, data in cursor.execute(
+                'SELECT MAX(id), source_id, dict FROM compression_dicts GROUP BY source_id'
+            ):
+                self._dictionaries[dict_id] = data
+                self._compressors[dict_source_id] = (dict_id, zstd_compressor(data))
+        data = body.encode('utf-8')
+        current = self._compressors.get(source_id)
+        if current is None:
+            samples = self._samples.setdefault(source_id, [])
+            samples.append(data)
+            if len(samples) < COMPRESSION_TRAINING_SAMPLES:
+                return body, None
+            current = self._train_dictionary(cursor, source_id, self._samples.pop(source_id))
+            if current is None:
+                return body, None
+        dict_id, compressor = current
+        compressed = compressor.compress(data)
+        if len(compressed) >= len(data):
+            return body, None
+        return compressed, dict_id
+
+    def _train_dictionary(
+        self,
+        cursor: sqlite3.Cursor,
+        source_id: int,
+        samples: List[bytes]
+    ) -> Optional[Tuple[int, Any]]:
+        """Train and save a new dictionary version for a source; returns (dict_id, compressor)."""
+        try:
+            data = zstandard.train_dictionary(COMPRESSION_DICT_SIZE, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            print(f"Could not train a compression dictionary for source {source_id}: {e}")
+            return None
+        cursor.execute(
+            'INSERT INTO compression_dicts (source_id, created_at, dict) VALUES (?, ?, ?)',
+            (source_id, to_epoch_ms(datetime.now()), data)
+        )
+        dict_id = cursor.lastrowid
+        self._dictionaries[dict_id] = data
+        current = (dict_id, zstd_compressor(data))
+        if self._compressors is not None:
+            self._compressors[source_id] = current
+        return current
+
+    def _retrain_dictionaries(self, cursor: sqlite3.Cursor, now_ms: int) -> int:
+        """
+        Train a new dictionary version for each source whose current one is
+        older than COMPRESSION_RETRAIN_DAYS, from its most recent bodies.
+
+        Must run inside a write transaction. Returns how many were trained.
+        """
+        cursor.execute(
+            'SELECT source_id FROM compression_dicts GROUP BY source_id HAVING MAX(created_at) < ?',
+            (now_ms - COMPRESSION_RETRAIN_DAYS * 86400000,)
+        )
+        trained = 0
+        for source_id in [row[0] for row in cursor.fetchall()]:
+            samples = []
+            for partition in list_partitions(cursor):
+                cursor.execute(f'''
+                    SELECT message, template_id, params, dict_id FROM logs_{partition}
+                    WHERE source_id = ? ORDER BY ts DESC LIMIT ?
+                ''', (source_id, COMPRESSION_TRAINING_SAMPLES - len(samples)))
+                for message, template_id, params, dict_id in cursor.fetchall():
+                    body = message if template_id is None else params
+                    if dict_id is not None:
+                        body = self._decompress(body, dict_id)
+                    samples.append(body.encode('utf-8'))
+                if len(samples) >= COMPRESSION_TRAINING_SAMPLES:
+                    break
+            # Too little new data to be worth a new version
+            if len(samples) >= COMPRESSION_TRAINING_SAMPLES and self._train_dictionary(cursor, source_id, samples):
+                trained += 1
+        return trained
+
+    def _decompress(self, data: bytes, dict_id: int) -> str:
+        """Decompress a stored body with this thread's decompressor for `dict_id`."""
+        if getattr(self._local, 'generation', None) != self._generation:
+            self._local.generation = self._generation
+            self._local.decompressors = {}
+        decompressor = self._local.decompressors.get(dict_id)
+        if decompressor is None:
+            if zstandard is None:
+                raise RuntimeError('Reading compressed messages requires zstandard (pip install zstandard)')
+            dictionaries = self._dictionaries
+            dict_data = dictionaries.get(dict_id)
+            if dict_data is None:
+                # Trained by another writer; read it on a separate connection,
+                # as this runs in the middle of a query on the calling one
+                conn = sqlite3.connect(self.db_path, timeout=20.0)
+                try:
+                    dict_data = conn.execute('SELECT dict FROM compression_dicts WHERE id = ?', (dict_id,)).fetchone()[0]
+                finally:
+                    conn.close()
+                dictionaries[dict_id] = dict_data
+            decompressor = self._local.decompressors[dict_id] = zstd_decompressor(dict_data)
+        return decompressor.decompress(data).decode('utf-8')
+
+    def _render_message(
+        self,
+        message: Any,
+        template_id: Optional[int],
+        params: Any,
+        dict_id: Optional[int]
+    ) -> str:
+        """SQL log_message(): the full text of a stored message."""
+        if dict_id is not None:
+            if template_id is None:
+                message = self._decompress(message, dict_id)
+            else:
+                params = self._decompress(params, dict_id)
+        if template_id is None:
+            return message
+        # The writer may swap the cache for a new one (see _clear_caches);
+        # keep using the one this lookup started with
+        template_tokens = self._template_tokens
+        tokens = template_tokens.get(template_id)
+        if tokens is None:
+            # Mined by another writer since; read them on a separate connection,
+            # as this runs in the middle of a query on the calling one
+            conn = sqlite3.connect(self.db_path, timeout=20.0)
+            try:
+                for row_id, template in conn.execute('SELECT id, template FROM templates'):
+                    template_tokens.setdefault(row_id, template.split(' '))
+            finally:
+                conn.close()
+            tokens = template_tokens[template_id]
+        return render(tokens, params)
+
+    def _clear_caches(self) -> None:
+        """
+        Forget cached ids, e.g. after a rollback undid the rows they point to.
+
+        Called with the storage lock held. Caches read by queries are
+        replaced rather than cleared, so a lookup in progress is not affected.
+        """
+        self._source_ids.clear()
+        self._level_ids.clear()
+        self._partitions.clear()
+        self._miner = None
+        self._template_tokens = {}
+        self._compressors = None
+        self._dictionaries = {}
+        self._generation += 1
+
+    def _partition_for(self, cursor: sqlite3.Cursor, ts: int) -> str:
+        """Name of the partition holding `ts`, creating it if needed."""
+        bucket = ts // PARTITION_INTERVALS[self.partition_interval]
+        partition = self._partitions.get(bucket)
+        if partition is None or not partition[1] <= ts < partition[2]:
+            partition = self._partitions[bucket] = find_partition(cursor, ts, self.partition_interval)
+        return partition[0]
+
+    def _insert_prepared(self, cursor: sqlite3.Cursor, prepared: List[Tuple]) -> int:
+        """
+        Insert prepared logs into their partitions with multi-row INSERTs per table.
+
+        With deduplication on, logs whose fingerprint is already stored (or
+        repeated within the batch) are skipped. Must run inside a write
+        transaction: ids are reserved up front from log_sequence so metadata
+        rows can reference them. Returns how many logs were inserted.
+        """
+        by_partition: Dict[str, List[Tuple]] = {}
+        for entry in prepared:
+            by_partition.setdefault(self._partition_for(cursor, entry[1]), []).append(entry)
+        if self.deduplicate:
+            by_partition = {
+                partition: self._new_entries(cursor, partition, entries)
+                for partition, entries in by_partition.items()
+            }
+        count = sum(len(entries) for entries in by_partition.values())
+        if not count:
+            return 0
+
+        cursor.execute("SELECT name, seq FROM log_sequence WHERE name IN ('logs', 'rollups')")
+        seq = dict(cursor.fetchall())
+        log_id = seq.get('logs', 0)
+        cursor.execute(
+            "INSERT OR REPLACE INTO log_sequence (name, seq) VALUES ('logs', ?)",
+            (log_id + count,)
+        )
+        # While the rollups are caught up, count new logs into them right
+        # away; otherwise compact() catches up from the watermark
+        roll_up = seq.get('rollups', 0) == log_id
+        # (minute bucket, source_id, level_id) -> new logs
+        counts: Dict[Tuple[int, int, int], int] = {}
+        minute = ROLLUP_GRANULARITIES['minute']
+
+        # Sources and levels repeat heavily within a batch; resolve each once
+        source_ids = {source: self._source_id(cursor, *source) for source in {entry[0] for entry in prepared}}
+        level_ids = {level: self._level_id(cursor, level) for level in {entry[2] for entry in prepared}}
+
+        for partition, entries in by_partition.items():
+            log_rows, metadata_rows = [], []
+            for source, ts, level, message, metadata, fingerprint in entries:
+                log_id += 1
+                source_id = source_ids[source]
+                level_id = level_ids[level]
+                stored, template_id, params, dict_id = message, None, None, None
+                if self.mine_templates:
+                    stored, template_id, params = self._template_for(cursor, message)
+                if self.compress_messages:
+                    # The body is the parameters of a templated message, else the message itself
+                    if template_id is None:
+                        stored, dict_id = self._compress_body(cursor, source_id, stored)
+                    else:
+                        params, dict_id = self._compress_body(cursor, source_id, params)
+                log_rows.append((
+                    log_id, source_id, ts, level_id,
+                    stored, template_id, params, dict_id
+                ))
+                if roll_up:
+                    key = (ts - ts % minute, source_id, level_id or 0)
+                    counts[key] = counts.get(key, 0) + 1
+                if metadata:
+                    metadata_rows.extend((log_id, k, v) for k, v in metadata)
+            # The full-text index always gets the whole message
+            fts_rows = [(row[0], entry[3]) for row, entry in zip(log_rows, entries)]
+            fingerprints = [entry[5] for entry in entries]
+            insert_partition_rows(cursor, partition, log_rows, metadata_rows, fts_rows, fingerprints)
+
+        if roll_up:
+            for granularity, width in ROLLUP_GRANULARITIES.items():
+                buckets: Dict[Tuple[int, int, int], int] = {}
+                for (ts, source_id, level_id), n in counts.items():
+                    key = (ts - ts % width, source_id, level_id)
+                    buckets[key] = buckets.get(key, 0) + n
+                cursor.executemany(f'''
+                    INSERT INTO log_rollups_{granularity} (bucket, source_id, level_id, count)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (bucket, source_id, level_id) DO UPDATE SET count = count + excluded.count
+                ''', [key + (n,) for key, n in buckets.items()])
+            cursor.execute(
+                "INSERT OR REPLACE INTO log_sequence (name, seq) VALUES ('rollups', ?)",
+                (log_id,)
+            )
+        return count
+
+    @staticmethod
+    def _new_entries(cursor: sqlite3.Cursor, partition: str, entries: List[Tuple]) -> List[Tuple]:
+        """The entries whose fingerprint is not in the partition yet, each fingerprint once."""
+        fingerprints = [entry[5] for entry in entries]
+        seen = set()
+        for i in range(0, len(fingerprints), FINGERPRINT_LOOKUP_SIZE):
+            chunk = fingerprints[i:i + FINGERPRINT_LOOKUP_SIZE]
+            cursor.execute(f'''
+                SELECT fingerprint FROM log_fingerprints_{partition}
+                WHERE fingerprint IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            seen.update(row[0] for row in cursor)
+        fresh = []
+        for entry in entries:
+            if entry[5] not in seen:
+                seen.add(entry[5])
+                fresh.append(entry)
+        return fresh
+
+    def _check_schema(self, cursor: sqlite3.Cursor) -> None:
+        """Forget cached partitions if the schema changed since this storage last wrote."""
+        version = cursor.execute('PRAGMA schema_version').fetchone()[0]
+        if version != self._schema_version:
+            self._partitions.clear()
+
+    def _insert_batch(self, conn: sqlite3.Connection, prepared: List[Tuple]) -> int:
+        """Insert `prepared` in one write transaction and commit; returns how many were inserted."""
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        self._check_schema(cursor)
+        inserted = self._insert_prepared(cursor, prepared)
+        # Still holding the write lock, so this includes partitions created
+        # here and nothing else
+        self._schema_version = cursor.execute('PRAGMA schema_version').fetchone()[0]
+        conn.commit()
+        return inserted
+
+    def _write_batch(self, conn: sqlite3.Connection, prepared: List[Tuple]) -> Tuple[int, int]:
+        """
+        Write a batch in a single transaction.
+
+        Returns (logs stored, duplicates skipped); the rest failed. If the
+        batch is rejected as a whole, it is retried one log at a time so a
+        single bad row does not lose the rest. Holds the storage lock
+        throughout.
+        """
+        with self._lock:
+            try:
+                stored = self._insert_batch(conn, prepared)
+                return stored, len(prepared) - stored
+            except sqlite3.Error as e:
+                conn.rollback()
+                # Ids created in the rolled back transaction are gone too
+                self._clear_caches()
+                print(f"Batch of {len(prepared)} logs failed ({e}), retrying one by one")
+
+            stored = duplicates = 0
+            for entry in prepared:
+                try:
+                    inserted = self._insert_batch(conn, [entry])
+                    stored += inserted
+                    duplicates += 1 - inserted
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    self._clear_caches()
+                    print(f"Error storing log from {entry[0][0]} at {entry[1]}: {e}")
+            return stored, duplicates
+
+    def store_logs(self, logs: Iterable[Dict[str, Any]], batch_size: int = STORE_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Store log entries in batches of `batch_size`, one transaction per batch.
+
+        Logs that are already stored (same source, stream, timestamp and
+        message) are skipped, so collecting an overlapping window again is
+        safe. Returns a summary with the number of logs stored, skipped as
+        duplicates and failed, and the ingest rate.
+        """
         successful_logs = 0
+        duplicate_logs = 0
         failed_logs = 0
+        started = time.perf_counter()
 
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
+            batch = []
             for log in logs:
                 try:
-                    # Begin transaction for each log
-                    cursor.execute('BEGIN TRANSACTION')
-                    
-                    # Get or create source
-                    source_id = self.add_source(
-                        name=log.get('log_group', log.get('file_path', 'unknown')),
-                        source_type=log['source']
-                    )
-                    
-                    # Extract message from content if it's a dict
-                    content = log['content']
-                    if isinstance(content, dict):
-                        message = content.get('message', str(content))
-                    else:
-                        message = str(content)
-                    
-                    # Convert timestamp to string if it's a datetime object
-                    timestamp = log['timestamp']
-                    if isinstance(timestamp, datetime):
-                        timestamp = timestamp.isoformat()
-                    
-                    # Insert log entry
-                    cursor.execute('''
-                        INSERT INTO logs (source_id, timestamp, level, message)
-                        VALUES (?, ?, ?, ?)
-                    ''', (
-                        source_id,
-                        timestamp,
-                        log.get('level', 'INFO'),
-                        message
-                    ))
-                    
-                    log_id = cursor.lastrowid
-                    
-                    # Store additional metadata
-                    metadata = {
-                        k: str(v) for k, v in log.items()
-                        if k not in ('timestamp', 'level', 'message', 'content', 'source')
-                    }
-                    
-                    if metadata:
-                        cursor.executemany('''
-                            INSERT INTO log_metadata (log_id, key, value)
-                            VALUES (?, ?, ?)
-                        ''', [(log_id, k, v) for k, v in metadata.items()])
-                    
-                    # Commit transaction for this log
-                    conn.commit()
-                    successful_logs += 1
-                    
-                except Exception as e:
-                    conn.rollback()  # Rollback failed transaction
+                    batch.append(self._prepare_log(log))
+                except (KeyError, TypeError, AttributeError) as e:
                     failed_logs += 1
-                    print(f"Error storing log: {e}")
-                    print(f"Problematic log entry: {log}")
+                    print(f"Skipping malformed log entry (missing or invalid {e})")
                     continue
-        
+                if len(batch) >= batch_size:
+                    stored, duplicates = self._write_batch(conn, batch)
+                    successful_logs += stored
+                    duplicate_logs += duplicates
+                    failed_logs += len(batch) - stored - duplicates
+                    batch = []
+            if batch:
+                stored, duplicates = self._write_batch(conn, batch)
+                successful_logs += stored
+                duplicate_logs += duplicates
+                failed_logs += len(batch) - stored - duplicates
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            'stored': successful_logs,
+            'duplicates': duplicate_logs,
+            'failed': failed_logs,
+            'seconds': elapsed,
+            'logs_per_second': successful_logs / elapsed if elapsed else 0.0,
+        }
         print(f"\nStorage Summary:")
         print(f"Successfully stored: {successful_logs} logs")
+        print(f"Skipped duplicates: {duplicate_logs} logs")
         print(f"Failed to store: {failed_logs} logs")
+        print(f"Throughput: {summary['logs_per_second']:,.0f} logs/s in {elapsed:.2f}s")
+        return summary
     
     def query_logs(
         self,
@@ -182,51 +1493,854 @@ class LogStorage:
         end_time: Optional[datetime] = None,
         source_type: Optional[str] = None,
         level: Optional[str] = None,
-        limit: int = 1000
-    ) -> List[Dict[str, Any]]:
-        """Query logs with various filters."""
-        query = '''
+        limit: int = 1000,
+        keyword: Optional[str] = None,
+        include_metadata: bool = True,
+        fetch_size: int = QUERY_FETCH_SIZE,
+        template_id: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Query logs with various filters, yielding them newest first.
+
+        `keyword` is a full-text search: all words must appear,
+        "quoted text" matches a phrase and word* matches a prefix.
+        `template_id` keeps logs matching any version of that template
+        (templates.cluster_id); archives keep no templates, so only live
+        partitions are read then.
+        Rows are read `fetch_size` at a time, with one metadata query per
+        step; pass include_metadata=False to skip metadata altogether.
+        The database connection stays open until the iterator is
+        exhausted or closed.
+        """
+        # {partition} is filled in per partition below
+        query = f'''
             SELECT 
                 l.id,
-                l.timestamp,
-                l.level,
-                l.message,
+                {ISO_TIMESTAMP_SQL} as timestamp,
+                v.name as level,
+                {MESSAGE_SQL} as message,
                 s.name as source_name,
                 s.type as source_type
-            FROM logs l
+            FROM logs_{{partition}} l
             JOIN sources s ON l.source_id = s.id
+            LEFT JOIN levels v ON l.level_id = v.id
             WHERE 1=1
         '''
         params = []
+        start_ms = to_epoch_ms(start_time) if start_time else None
+        end_ms = to_epoch_ms(end_time) if end_time else None
         
-        if start_time:
-            query += ' AND l.timestamp >= ?'
-            params.append(start_time.isoformat())
-        if end_time:
-            query += ' AND l.timestamp <= ?'
-            params.append(end_time.isoformat())
+        # Compare raw epoch-ms and ids so the (source_id, ts) / (level_id, ts) indexes apply
+        if start_ms is not None:
+            query += ' AND l.ts >= ?'
+            params.append(start_ms)
+        if end_ms is not None:
+            query += ' AND l.ts <= ?'
+            params.append(end_ms)
+        # With a keyword, the full-text match picks the rows; the leading + keeps
+        # SQLite from driving the query off the much less selective level/source indexes
+        match = fts_match_query(keyword) if keyword else None
+        column = '+l' if match else 'l'
         if source_type:
-            query += ' AND s.type = ?'
+            query += f' AND {column}.source_id IN (SELECT id FROM sources WHERE type = ?)'
             params.append(source_type)
         if level:
-            query += ' AND l.level = ?'
-            params.append(level)
+            query += f' AND {column}.level_id = (SELECT id FROM levels WHERE name = ?)'
+            params.append(level.upper())
+        if template_id is not None:
+            query += f' AND {column}.template_id IN (SELECT id FROM templates WHERE cluster_id = ?)'
+            params.append(template_id)
+        if match:
+            query += ' AND l.id IN (SELECT rowid FROM logs_fts_{partition} WHERE logs_fts_{partition} MATCH ?)'
+            params.append(match)
         
-        query += ' ORDER BY l.timestamp DESC LIMIT ?'
-        params.append(limit)
+        query += ' ORDER BY l.ts DESC LIMIT ?'
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            logs = [dict(row) for row in cursor.fetchall()]
-            
-            # Fetch metadata for each log
-            for log in logs:
-                cursor.execute('''
-                    SELECT key, value
-                    FROM log_metadata
-                    WHERE log_id = ?
-                ''', (log['id'],))
-                log['metadata'] = {row['key']: row['value'] for row in cursor.fetchall()}
-            
-            return logs 
\ No newline at end of file
+            metadata_cursor = conn.cursor()
+            remaining = limit
+            # Only partitions overlapping the window are read, newest first,
+            # until `limit` rows have been returned
+            segments = self._segments(cursor, start_ms, end_ms)
+            for partition, archived in segments:
+                if archived and template_id is not None:
+                    continue
+                if archived:
+                    logs = self._read_archive(
+                        partition, start_ms, end_ms, source_type, level, keyword, include_metadata, remaining
+                    )
+                    remaining -= len(logs)
+                    yield from logs
+                    if remaining <= 0:
+                        return
+                    continue
+                cursor.execute(query.format(partition=partition), params + [remaining])
+                while True:
+                    logs = [dict(row) for row in cursor.fetchmany(fetch_size)]
+                    if not logs:
+                        break
+                    remaining -= len(logs)
+                    if include_metadata:
+                        by_id = {}
+                        for log in logs:
+                            log['metadata'] = by_id[log['id']] = {}
+                        metadata_cursor.execute(f'''
+                            SELECT log_id, key, value
+                            FROM log_metadata_{partition}
+                            WHERE log_id IN ({', '.join('?' * len(by_id))})
+                        ''', list(by_id))
+                        for log_id, key, value in metadata_cursor:
+                            by_id[log_id][key] = value
+                    yield from logs
+                if remaining <= 0:
+                    return
+
+    def _segments(
+        self,
+        cursor: sqlite3.Cursor,
+        start_ms: Optional[int],
+        end_ms: Optional[int]
+    ) -> List[Tuple[str, bool]]:
+        """(name, archived) of the live and archived partitions overlapping a window, newest first."""
+        segments = []
+        for registry, archived in (('log_partitions', False), ('log_archives', True)):
+            query = f'SELECT name, start_ts FROM {registry} WHERE 1=1'
+            params = []
+            if start_ms is not None:
+                query += ' AND end_ts > ?'
+                params.append(start_ms)
+            if end_ms is not None:
+                query += ' AND start_ts <= ?'
+                params.append(end_ms)
+            segments.extend((start_ts, name, archived) for name, start_ts in cursor.execute(query, params))
+        if any(archived for _, _, archived in segments) and pa is None:
+            raise RuntimeError('Reading archived logs requires pyarrow (pip install pyarrow)')
+        return [(name, archived) for _, name, archived in sorted(segments, reverse=True)]
+
+    def partitions(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[str]:
+        """Names of the partitions overlapping the given window, newest first."""
+        with self._get_connection() as conn:
+            return list_partitions(
+                conn.cursor(),
+                to_epoch_ms(start_time) if start_time else None,
+                to_epoch_ms(end_time) if end_time else None
+            )
+
+    def templates(self) -> Dict[int, str]:
+        """The current version of every mined template, by template (cluster) id."""
+        with self._get_connection() as conn:
+            return {
+                cluster_id: template
+                for _, cluster_id, template in conn.execute(
+                    'SELECT MAX(id), cluster_id, template FROM templates GROUP BY cluster_id'
+                )
+            }
+
+    def reindex(self, partitions: Optional[List[str]] = None) -> int:
+        """
+        Rebuild the full-text index of `partitions` (default: all live ones)
+        from the full message text. Returns the number of logs indexed.
+        """
+        with self._lock, self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            indexed = sum(
+                rebuild_fts_index(cursor, partition)
+                for partition in (partitions if partitions is not None else list_partitions(cursor))
+            )
+            conn.commit()
+            return indexed
+
+    def count_logs(self) -> int:
+        """Total number of stored logs across all partitions, archived ones included."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            archived = cursor.execute('SELECT COALESCE(SUM(rows), 0) FROM log_archives').fetchone()[0]
+            return archived + sum(
+                cursor.execute(f'SELECT COUNT(*) FROM logs_{partition}').fetchone()[0]
+                for partition in list_partitions(cursor)
+            )
+
+    def drop_partitions_before(self, cutoff: datetime) -> List[str]:
+        """
+        Retention: drop every partition that ends at or before `cutoff`.
+
+        Whole tables are dropped, so no rows are deleted one by one and no
+        partly emptied pages are left behind in the partitions that remain.
+        Archived partitions in that range are deleted too. Returns the names
+        of the dropped partitions.
+        """
+        with self._lock, self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            # Fold any logs not yet counted into the rollups before they go
+            self._rollup_batch(cursor, None)
+            dropped, archive_files = self._drop_partitions(cursor, to_epoch_ms(cutoff))
+            conn.commit()
+        self._remove_files(archive_files)
+        return dropped
+
+    def _drop_partitions(self, cursor: sqlite3.Cursor, cutoff_ms: int) -> Tuple[List[str], List[str]]:
+        """
+        Drop live and archived partitions ending at or before `cutoff_ms`.
+
+        Returns the dropped names and the archive files to delete once the
+        transaction has committed. Callers hold the storage lock.
+        """
+        cursor.execute('SELECT name FROM log_partitions WHERE end_ts <= ? ORDER BY start_ts', (cutoff_ms,))
+        dropped = [row[0] for row in cursor.fetchall()]
+        for name in dropped:
+            drop_partition(cursor, name)
+        self._partitions.clear()
+
+        cursor.execute('SELECT name, path FROM log_archives WHERE end_ts <= ? ORDER BY start_ts', (cutoff_ms,))
+        archives = cursor.fetchall()
+        cursor.execute('DELETE FROM log_archives WHERE end_ts <= ?', (cutoff_ms,))
+        # Archived days keep their fingerprints in SQLite until they are dropped
+        for partition in {row[0].split('-')[0] for row in archives}:
+            cursor.execute(f'DROP TABLE IF EXISTS log_fingerprints_{partition}')
+        dropped = sorted(dropped + [row[0] for row in archives])
+        if dropped:
+            print(f"Dropped {len(dropped)} partitions: {dropped[0]} to {dropped[-1]}")
+        return dropped, [os.path.join(self.archive_dir, row[1]) for row in archives]
+
+    @staticmethod
+    def _remove_files(paths: List[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def archive_partitions_before(self, cutoff: datetime) -> List[str]:
+        """
+        Move every partition that ends at or before `cutoff` to the Parquet archive.
+
+        Each partition becomes one zstd-compressed Parquet file sorted by
+        timestamp, written in row groups of ARCHIVE_ROW_GROUP_SIZE with
+        min/max statistics, so readers skip row groups outside a time range
+        or without a wanted level or source. The SQLite tables are dropped
+        once the file is in place; if logs arrive in the partition while it
+        is being exported, it is left for the next run. Late logs for a day
+        archived earlier are archived next to the earlier file, as
+        `<partition>-2.parquet` and so on. A partition's fingerprints stay
+        in SQLite, so collecting an archived day again stores nothing
+        twice; a partition left empty by such a run is dropped without
+        an archive file. Rollups are brought up to date first, so counts
+        are unaffected. Returns the names of the archived partitions.
+        """
+        if pa is None:
+            raise RuntimeError('Archiving logs requires pyarrow (pip install pyarrow)')
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = []
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT name, start_ts, end_ts FROM log_partitions WHERE end_ts <= ? ORDER BY start_ts',
+                (to_epoch_ms(cutoff),)
+            )
+            for name, start_ts, end_ts in cursor.fetchall():
+                archive_name = self._archive_name(cursor, name)
+                file_name = f'{archive_name}.parquet'
+                path = os.path.join(self.archive_dir, file_name)
+                rows, last_id = self._export_partition(conn, name, path)
+
+                with self._lock:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    cursor.execute(f'SELECT COUNT(*), COALESCE(MAX(id), 0) FROM logs_{name}')
+                    if tuple(cursor.fetchone()) != (rows, last_id):
+                        conn.rollback()
+                        os.remove(path)
+                        print(f"Partition {name} changed while archiving; will retry next run")
+                        continue
+                    self._rollup_batch(cursor, None)
+                    if rows:
+                        cursor.execute(
+                            'INSERT INTO log_archives (name, start_ts, end_ts, path, rows) VALUES (?, ?, ?, ?, ?)',
+                            (archive_name, start_ts, end_ts, file_name, rows)
+                        )
+                    drop_partition(cursor, name, keep_fingerprints=True)
+                    conn.commit()
+                    self._partitions.clear()
+                if not rows:
+                    os.remove(path)
+                    continue
+                archived.append(name)
+        if archived:
+            print(f"Archived {len(archived)} partitions to {self.archive_dir}: {archived[0]} to {archived[-1]}")
+        return archived
+
+    @staticmethod
+    def _archive_name(cursor: sqlite3.Cursor, partition: str) -> str:
+        """The partition name, or `<partition>-<n>` if that day has been archived before."""
+        cursor.execute(
+            'SELECT name FROM log_archives WHERE name = ? OR name LIKE ?',
+            (partition, f'{partition}-%')
+        )
+        taken = {row[0] for row in cursor.fetchall()}
+        name, n = partition, 1
+        while name in taken:
+            n += 1
+            name = f'{partition}-{n}'
+        return name
+
+    def _export_partition(self, conn: sqlite3.Connection, partition: str, path: str) -> Tuple[int, int]:
+        """Write a partition to `path` as Parquet; returns (rows written, highest log id)."""
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT
+                l.id,
+                l.ts,
+                v.name,
+                s.name,
+                s.type,
+                {MESSAGE_SQL},
+                (SELECT json_group_object(key, value) FROM log_metadata_{partition} m WHERE m.log_id = l.id)
+            FROM logs_{partition} l
+            JOIN sources s ON l.source_id = s.id
+            LEFT JOIN levels v ON l.level_id = v.id
+            ORDER BY l.ts, l.id
+        ''')
+        schema = archive_schema()
+        rows, last_id = 0, 0
+        # Written under a temporary name so a crash never leaves a partial file behind
+        partial_path = path + '.partial'
+        with pq.ParquetWriter(partial_path, schema, compression=ARCHIVE_COMPRESSION) as writer:
+            while True:
+                chunk = cursor.fetchmany(ARCHIVE_ROW_GROUP_SIZE)
+                if not chunk:
+                    break
+                columns = list(zip(*chunk))
+                writer.write_batch(
+                    pa.record_batch([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema),
+                    row_group_size=ARCHIVE_ROW_GROUP_SIZE
+                )
+                rows += len(chunk)
+                last_id = max(last_id, max(columns[0]))
+        os.replace(partial_path, path)
+        return rows, last_id
+
+    def _archive_table(
+        self,
+        name: str,
+        columns: List[str],
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+        source_type: Optional[str],
+        level: Optional[str],
+        keyword: Optional[str]
+    ) -> 'pa.Table':
+        """
+        Read `columns` of the logs in one archived partition that pass the filters.
+
+        The filters are pushed down, so row groups whose statistics rule
+        them out are skipped.
+        """
+        timestamp = pa.timestamp('ms', tz='UTC')
+        condition = ds.scalar(True)
+        if start_ms is not None:
+            condition &= ds.field('ts') >= pa.scalar(start_ms, timestamp)
+        if end_ms is not None:
+            condition &= ds.field('ts') <= pa.scalar(end_ms, timestamp)
+        if source_type:
+            condition &= ds.field('source_type') == source_type
+        if level:
+            condition &= ds.field('level') == level.upper()
+        terms = keyword_terms(keyword or '')
+        patterns = [pattern for pattern in (keyword_pattern(text, prefix) for text, prefix in terms) if pattern]
+        if terms and not patterns:
+            # Like the index, a search without a single word matches nothing
+            condition &= ds.scalar(False)
+        for pattern in patterns:
+            condition &= pc.match_substring_regex(ds.field('message'), pattern=pattern, ignore_case=True)
+
+        dataset = ds.dataset(os.path.join(self.archive_dir, f'{name}.parquet'), format='parquet')
+        return dataset.to_table(columns=columns, filter=condition)
+
+    def _read_archive(
+        self,
+        name: str,
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+        source_type: Optional[str],
+        level: Optional[str],
+        keyword: Optional[str],
+        include_metadata: bool,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Read the newest `limit` matching logs from one archived partition.
+
+        Keywords match as they do against the full-text index (see
+        keyword_pattern).
+        """
+        columns = ['id', 'ts', 'level', 'message', 'source_name', 'source_type']
+        if include_metadata:
+            columns.append('metadata')
+        table = self._archive_table(name, columns, start_ms, end_ms, source_type, level, keyword)
+        table = table.sort_by([('ts', 'descending'), ('id', 'descending')]).slice(0, limit)
+        table = table.set_column(1, 'ts', pc.cast(table['ts'], pa.int64()))
+
+        logs = []
+        for row in table.to_pylist():
+            log = {
+                'id': row['id'],
+                'timestamp': from_epoch_ms(row['ts']),
+                'level': row['level'],
+                'message': row['message'],
+                'source_name': row['source_name'],
+                'source_type': row['source_type'],
+            }
+            if include_metadata:
+                log['metadata'] = json.loads(row['metadata']) if row['metadata'] else {}
+            logs.append(log)
+        return logs
+
+    def _rollup_batch(self, cursor: sqlite3.Cursor, limit: Optional[int] = ROLLUP_BATCH_SIZE) -> int:
+        """
+        Add logs stored since the last rollup to the rollup tables.
+
+        Logs are taken in id order, at most `limit` ids at a time, and the
+        last id counted is kept in log_sequence under 'rollups'. Must run
+        inside a write transaction. Returns how many ids were covered.
+        """
+        cursor.execute("SELECT name, seq FROM log_sequence WHERE name IN ('logs', 'rollups')")
+        seq = dict(cursor.fetchall())
+        after_id, last_id = seq.get('rollups', 0), seq.get('logs', 0)
+        if limit:
+            last_id = min(last_id, after_id + limit)
+        if last_id <= after_id:
+            return 0
+
+        for partition in list_partitions(cursor):
+            for granularity, width in ROLLUP_GRANULARITIES.items():
+                cursor.execute(f'''
+                    INSERT INTO log_rollups_{granularity} (bucket, source_id, level_id, count)
+                    SELECT ts - ts % {width}, source_id, COALESCE(level_id, 0), COUNT(*)
+                    FROM logs_{partition}
+                    WHERE id > ? AND id <= ?
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (bucket, source_id, level_id) DO UPDATE SET count = count + excluded.count
+                ''', (after_id, last_id))
+        cursor.execute(
+            "INSERT OR REPLACE INTO log_sequence (name, seq) VALUES ('rollups', ?)",
+            (last_id,)
+        )
+        return last_id - after_id
+
+    def compact(
+        self,
+        raw_retention_days: Optional[float] = None,
+        archive_after_days: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Roll up new logs, apply retention and tidy the database file.
+
+        1. Logs not counted yet (ingest counts new logs itself only while
+           the rollups are caught up, e.g. not after a migration) are
+           added to the per-minute and per-hour rollups,
+           ROLLUP_BATCH_SIZE ids per transaction so writers are never
+           held up for long.
+        2. With `archive_after_days`, partitions older than that move to
+           the Parquet archive. With `raw_retention_days`, live and archived
+           partitions older than that are dropped; their counts stay in the
+           rollups. Rollup buckets older than ROLLUP_RETENTION_DAYS are
+           deleted.
+        3. With message compression on, sources whose dictionary is older
+           than COMPRESSION_RETRAIN_DAYS get a new version trained from
+           their recent logs; older logs keep using the version they were
+           compressed with.
+        4. Up to COMPACTION_VACUUM_PAGES free pages are released with an
+           incremental vacuum, and `PRAGMA optimize` re-analyzes tables
+           whose statistics have gone stale.
+
+        Returns a summary of what was done.
+        """
+        rolled_up = 0
+        now_ms = to_epoch_ms(datetime.now())
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute('BEGIN IMMEDIATE')
+                covered = self._rollup_batch(cursor)
+                conn.commit()
+                rolled_up += covered
+                if not covered:
+                    break
+
+        archived = []
+        if archive_after_days is not None:
+            archived = self.archive_partitions_before(datetime.now() - timedelta(days=archive_after_days))
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            with self._lock:
+                cursor.execute('BEGIN IMMEDIATE')
+                rolled_up += self._rollup_batch(cursor, None)
+                dropped, archive_files = [], []
+                if raw_retention_days is not None:
+                    dropped, archive_files = self._drop_partitions(cursor, now_ms - int(raw_retention_days * 86400000))
+                expired = 0
+                for granularity, days in ROLLUP_RETENTION_DAYS.items():
+                    cursor.execute(
+                        f'DELETE FROM log_rollups_{granularity} WHERE bucket < ?',
+                        (now_ms - days * 86400000,)
+                    )
+                    expired += cursor.rowcount
+                conn.commit()
+            self._remove_files(archive_files)
+
+            trained = 0
+            if self.compress_messages:
+                with self._lock:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    trained = self._retrain_dictionaries(cursor, now_ms)
+                    conn.commit()
+
+            vacuumed = 0
+            if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:  # INCREMENTAL
+                free_before = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+                # executescript steps the pragma to completion; execute() frees a single page
+                conn.executescript(f'PRAGMA incremental_vacuum({COMPACTION_VACUUM_PAGES})')
+                vacuumed = free_before - cursor.execute('PRAGMA freelist_count').fetchone()[0]
+            cursor.execute(f'PRAGMA analysis_limit={ANALYSIS_LIMIT}')
+            cursor.execute('PRAGMA optimize')
+
+        summary = {
+            'rolled_up': rolled_up,
+            'archived_partitions': archived,
+            'dropped_partitions': dropped,
+            'expired_rollups': expired,
+            'trained_dictionaries': trained,
+            'vacuumed_pages': vacuumed,
+        }
+        print(
+            f"Compaction: rolled up {rolled_up} new log ids, archived {len(archived)} partitions, "
+            f"dropped {len(dropped)} partitions, "
+            f"expired {expired} rollup rows, trained {trained} dictionaries, freed {vacuumed} pages"
+        )
+        return summary
+
+    def rollup_counts(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        source_type: Optional[str] = None,
+        level: Optional[str] = None,
+        granularity: str = 'hour',
+        by: Sequence[str] = ('bucket', 'source', 'level')
+    ) -> List[Dict[str, Any]]:
+        """
+        Log counts per bucket, source and level over a time window.
+
+        Reads the rollup tables, plus the few raw logs not rolled up yet, so
+        counts are current. Whole buckets are counted: the window is widened
+        to the buckets containing `start_time` and `end_time`. Counts are
+        summed over whichever of 'bucket', 'source' and 'level' are left
+        out of `by`; those fields are None in the rows.
+        """
+        width = ROLLUP_GRANULARITIES[granularity]
+        # Key columns of the rollup tables and of raw logs; NULL when summed over
+        rollup_keys = ', '.join(
+            column if name in by else 'NULL'
+            for name, column in (('bucket', 'bucket'), ('source', 'source_id'), ('level', 'level_id'))
+        )
+        raw_keys = ', '.join(
+            column if name in by else 'NULL'
+            for name, column in (
+                ('bucket', f'ts - ts % {width}'), ('source', 'source_id'), ('level', 'COALESCE(level_id, 0)')
+            )
+        )
+        first_bucket = last_bucket = None
+        # {bucket} is the bucket column for rollups and the timestamp for raw logs
+        where = ''
+        params: List[Any] = []
+        if start_time:
+            start_ms = to_epoch_ms(start_time)
+            first_bucket = start_ms - start_ms % width
+            where += ' AND {bucket} >= ?'
+            params.append(first_bucket)
+        if end_time:
+            end_ms = to_epoch_ms(end_time)
+            last_bucket = end_ms - end_ms % width
+            where += ' AND {bucket} < ?'
+            params.append(last_bucket + width)
+        if source_type:
+            where += ' AND source_id IN (SELECT id FROM sources WHERE type = ?)'
+            params.append(source_type)
+        if level:
+            where += ' AND level_id = (SELECT id FROM levels WHERE name = ?)'
+            params.append(level.upper())
+
+        counts: Dict[Tuple[Optional[int], Optional[int], Optional[int]], int] = {}
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT seq FROM log_sequence WHERE name = 'rollups'")
+            row = cursor.fetchone()
+            rolled_up_to = row[0] if row else 0
+
+            cursor.execute(f'''
+                SELECT {rollup_keys}, SUM(count)
+                FROM log_rollups_{granularity}
+                WHERE 1=1{where.format(bucket='bucket')}
+                GROUP BY 1, 2, 3
+            ''', params)
+            for bucket, source_id, level_id, count in cursor:
+                counts[(bucket, source_id, level_id)] = count
+
+            for partition in list_partitions(cursor, first_bucket, last_bucket + width - 1 if end_time else None):
+                cursor.execute(f'''
+                    SELECT {raw_keys}, COUNT(*)
+                    FROM logs_{partition}
+                    WHERE id > ?{where.format(bucket='ts')}
+                    GROUP BY 1, 2, 3
+                ''', [rolled_up_to] + params)
+                for bucket, source_id, level_id, count in cursor:
+                    key = (bucket, source_id, level_id)
+                    counts[key] = counts.get(key, 0) + count
+
+            sources = {row[0]: (row[1], row[2]) for row in cursor.execute('SELECT id, name, type FROM sources')}
+            levels = {row[0]: row[1] for row in cursor.execute('SELECT id, name FROM levels')}
+
+        return [
+            {
+                'bucket': bucket,
+                'timestamp': from_epoch_ms(bucket) if bucket is not None else None,
+                'source_name': sources.get(source_id, (None, None))[0],
+                'source_type': sources.get(source_id, (None, None))[1],
+                'level': levels.get(level_id),
+                'count': count,
+            }
+            for (bucket, source_id, level_id), count in sorted(counts.items())
+        ]
+
+class LogWriter:
+    """
+    Single writer thread that group-commits batches from many producers.
+
+    Producers call submit() from any thread; entries are normalized in the
+    producer and queued. The writer drains whatever is queued, up to
+    `group_size` logs, and writes it in one transaction, so concurrent
+    producers share commits instead of contending for the write lock.
+    The queue holds at most `max_pending` batches; submit() blocks when it
+    is full. Readers keep using their own WAL connections. Other threads
+    may keep writing through the same storage; writes take turns on its
+    lock. If the writer thread dies, submit(), flush() and close() raise
+    instead of waiting.
+
+    Throughput is bounded by SQLite rather than by the queue: every log
+    updates the logs table and its four indexes, the full-text index, the
+    fingerprint set and one metadata row per extra field, in one writer.
+    Template mining and compression add per-log work on top.
+
+        with LogWriter(LogStorage('logs.db')) as writer:
+            writer.submit(logs)
+    """
+
+    def __init__(
+        self,
+        storage: LogStorage,
+        max_pending: int = WRITER_MAX_PENDING,
+        group_size: int = STORE_BATCH_SIZE
+    ):
+        self.storage = storage
+        self.group_size = group_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self.stats = {'submitted': 0, 'stored': 0, 'duplicates': 0, 'failed': 0, 'commits': 0}
+
+    def start(self) -> 'LogWriter':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+            # Flush whatever is still queued when the interpreter exits
+            atexit.register(self.close)
+        return self
+
+    def submit(self, logs: Iterable[Dict[str, Any]], timeout: Optional[float] = None) -> int:
+        """
+        Queue logs for writing and return how many were accepted.
+
+        Blocks while the queue is full (raising queue.Full after `timeout`).
+        """
+        if self._closed:
+            raise RuntimeError('LogWriter is closed')
+        self.start()
+        prepared = []
+        for log in logs:
+            try:
+                prepared.append(self.storage._prepare_log(log))
+            except (KeyError, TypeError, AttributeError) as e:
+                self.stats['failed'] += 1
+                print(f"Skipping malformed log entry (missing or invalid {e})")
+        if prepared:
+            self._put(prepared, timeout)
+            self.stats['submitted'] += len(prepared)
+        return len(prepared)
+
+    def flush(self) -> None:
+        """Wait until everything submitted so far has been committed."""
+        if self._thread is None:
+            return
+        self._raise_error()
+        # Like queue.join(), but gives up if the writer thread dies
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                self._check_writer()
+                self._queue.all_tasks_done.wait(WRITER_POLL_SECONDS)
+
+    def close(self) -> None:
+        """Write out everything still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            atexit.unregister(self.close)
+            try:
+                self._put(_STOP)
+            finally:
+                self._thread.join()
+            self._raise_error()
+
+    def _put(self, item: Any, timeout: Optional[float] = None) -> None:
+        """queue.put() that raises instead of blocking forever when the writer thread is gone."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            self._check_writer()
+            wait = WRITER_POLL_SECONDS
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+            try:
+                self._queue.put(item, timeout=wait)
+                return
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+    def _check_writer(self) -> None:
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise RuntimeError('Log writer thread is not running')
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f'Log writer thread failed: {self._error}') from self._error
+
+    def __enter__(self) -> 'LogWriter':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        try:
+            self._write_loop()
+        except BaseException as e:
+            self._error = e
+            print(f"Log writer stopped: {e}")
+
+    def _write_loop(self) -> None:
+        with self.storage._get_connection() as conn:
+            stopping = False
+            while not stopping:
+                batch = self._queue.get()
+                group, taken = [], 0
+                # Group everything already waiting into one commit
+                while True:
+                    if batch is _STOP:
+                        stopping = True
+                    else:
+                        group.extend(batch)
+                    taken += 1
+                    if stopping or len(group) >= self.group_size:
+                        break
+                    try:
+                        batch = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                try:
+                    if group:
+                        stored, duplicates = self.storage._write_batch(conn, group)
+                        self.stats['stored'] += stored
+                        self.stats['duplicates'] += duplicates
+                        self.stats['failed'] += len(group) - stored - duplicates
+                        self.stats['commits'] += 1
+                except Exception as e:
+                    self.stats['failed'] += len(group)
+                    print(f"Log writer failed to store {len(group)} logs: {e}")
+                finally:
+                    for _ in range(taken):
+                        self._queue.task_done()
+
+
+class LogCompactor:
+    """
+    Background thread that runs LogStorage.compact() every `interval` seconds.
+
+    Keeps the minute/hour rollups current, archives partitions older than
+    `archive_after_days` and applies raw retention when those are set, and
+    reclaims space, without blocking ingest for more than one rollup batch
+    at a time.
+
+    Give it the LogStorage your LogWriter uses, so each compaction step
+    and each write batch take the storage lock in turn:
+
+        storage = LogStorage('logs.db')
+        with LogWriter(storage) as writer, LogCompactor(storage, archive_after_days=7):
+            writer.submit(logs)
+
+    A compactor with its own LogStorage on the same file is safe too:
+    SQLite serializes the transactions, and writers notice partitions it
+    dropped or archived through the schema version at their next batch.
+    """
+
+    def __init__(
+        self,
+        storage: LogStorage,
+        interval: float = COMPACTION_INTERVAL,
+        raw_retention_days: Optional[float] = None,
+        archive_after_days: Optional[float] = None
+    ):
+        self.storage = storage
+        self.interval = interval
+        self.raw_retention_days = raw_retention_days
+        self.archive_after_days = archive_after_days
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_summary: Optional[Dict[str, Any]] = None
+
+    def start(self) -> 'LogCompactor':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-compactor', daemon=True)
+            self._thread.start()
+        return self
+
+    def run_once(self) -> Dict[str, Any]:
+        self.last_summary = self.storage.compact(self.raw_retention_days, self.archive_after_days)
+        return self.last_summary
+
+    def close(self) -> None:
+        """Stop the compactor, waiting for a run in progress to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'LogCompactor':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"Log compaction failed: {e}")
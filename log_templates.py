@@ -0,0 +1,170 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Template token that stands for a parameter
+WILDCARD = '<*>'
+
+# Joins the parameters of one message; messages containing it are stored as-is
+PARAM_SEPARATOR = '\x1f'
+
+# Drain parse tree: one layer for the token count, then DRAIN_DEPTH - 2 layers
+# keyed by the leading tokens. A message joins the most similar cluster in
+# its leaf when at least DRAIN_SIMILARITY of its tokens match the template.
+DRAIN_DEPTH = 4
+DRAIN_SIMILARITY = 0.5
+DRAIN_MAX_CHILDREN = 100
+
+# Longer messages (stack traces, payload dumps) are not worth templating
+MAX_TEMPLATE_TOKENS = 100
+
+# Masked token sequences remembered with the cluster they matched, so repeats
+# skip the tree walk; the memo is cleared when it reaches this size
+MATCH_CACHE_SIZE = 100000
+
+# A whole token (run of non-spaces) containing a digit
+_DIGIT_TOKEN = re.compile(r'[^ ]*\d[^ ]*')
+
+
+def tokenize(message: str) -> List[str]:
+    """Split on single spaces, so ' '.join(tokens) always gives the message back."""
+    return message.split(' ')
+
+
+def render(template_tokens: List[str], params: Optional[str]) -> str:
+    """Rebuild a message from its template tokens and encoded parameters."""
+    values = iter(params.split(PARAM_SEPARATOR) if params is not None else ())
+    return ' '.join(next(values) if token == WILDCARD else token for token in template_tokens)
+
+
+class LogCluster:
+    """
+    One message shape.
+
+    `cluster_id` identifies the shape; `template_id` is the stored version
+    of its current template. Templates only ever gain wildcards, and each
+    change is stored as a new version, so logs encoded against an older
+    version still render exactly.
+    """
+
+    __slots__ = ('cluster_id', 'template_id', 'tokens')
+
+    def __init__(self, tokens: List[str], cluster_id: Optional[int] = None, template_id: Optional[int] = None):
+        self.tokens = tokens
+        self.cluster_id = cluster_id
+        self.template_id = template_id
+
+
+class _Node:
+    __slots__ = ('children', 'clusters')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.clusters: List[LogCluster] = []
+
+
+class TemplateMiner:
+    """
+    Online template miner following Drain (He et al., ICWS 2017).
+
+    learn() finds or creates the cluster of a message, generalizing its
+    template where the message differs, and returns the message's
+    parameters. Tokens containing digits are always parameters.
+    """
+
+    def __init__(
+        self,
+        depth: int = DRAIN_DEPTH,
+        similarity: float = DRAIN_SIMILARITY,
+        max_children: int = DRAIN_MAX_CHILDREN,
+        max_tokens: int = MAX_TEMPLATE_TOKENS
+    ):
+        self.prefix_length = max(depth - 2, 1)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_tokens = max_tokens
+        self._root: Dict[int, _Node] = {}
+        # A template only ever generalizes, so a masked message that matched
+        # a cluster without changing it will keep doing so
+        self._matches: Dict[str, LogCluster] = {}
+
+    def load(self, template: str, cluster_id: int, template_id: int) -> LogCluster:
+        """Add a stored template, e.g. when a storage is reopened."""
+        cluster = LogCluster(tokenize(template), cluster_id, template_id)
+        self._leaf(cluster.tokens).clusters.append(cluster)
+        return cluster
+
+    def learn(self, message: str) -> Optional[Tuple[LogCluster, bool, str]]:
+        """
+        Match `message` to a cluster, creating or generalizing it as needed.
+
+        Returns (cluster, template changed, encoded parameters), or None if
+        the message is not templated.
+        """
+        if PARAM_SEPARATOR in message:
+            return None
+        tokens = tokenize(message)
+        if len(tokens) > self.max_tokens:
+            return None
+
+        # Tokens with digits are matched as parameters, like Drain's masking
+        # step; masking the whole message at once keeps repeats cheap
+        key = _DIGIT_TOKEN.sub(WILDCARD, message)
+        cluster = self._matches.get(key)
+        if cluster is not None:
+            return cluster, False, self._params(cluster, tokens)
+
+        masked = tokenize(key)
+        leaf = self._leaf(masked)
+        cluster = self._best_match(leaf.clusters, masked)
+        changed = False
+        if cluster is None:
+            cluster = LogCluster(masked)
+            leaf.clusters.append(cluster)
+            changed = True
+        else:
+            merged = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(cluster.tokens, masked)
+            ]
+            if merged != cluster.tokens:
+                cluster.tokens = merged
+                changed = True
+
+        if len(self._matches) >= MATCH_CACHE_SIZE:
+            self._matches.clear()
+        self._matches[key] = cluster
+        return cluster, changed, self._params(cluster, tokens)
+
+    @staticmethod
+    def _params(cluster: LogCluster, tokens: List[str]) -> str:
+        return PARAM_SEPARATOR.join(
+            token for template_token, token in zip(cluster.tokens, tokens) if template_token == WILDCARD
+        )
+
+    def _leaf(self, masked: List[str]) -> _Node:
+        """Walk (and grow) the tree to the leaf for this token count and prefix."""
+        node = self._root.get(len(masked))
+        if node is None:
+            node = self._root[len(masked)] = _Node()
+        for key in masked[:self.prefix_length]:
+            child = node.children.get(key)
+            if child is None:
+                if key != WILDCARD and len(node.children) >= self.max_children:
+                    key = WILDCARD
+                child = node.children.get(key)
+                if child is None:
+                    child = node.children[key] = _Node()
+            node = child
+        return node
+
+    def _best_match(self, clusters: List[LogCluster], masked: List[str]) -> Optional[LogCluster]:
+        """The cluster sharing the most tokens with `masked`, preferring the more general one on ties."""
+        best, best_score = None, (-1, -1)
+        for cluster in clusters:
+            same = sum(1 for template_token, token in zip(cluster.tokens, masked) if template_token == token)
+            score = (same, cluster.tokens.count(WILDCARD))
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is not None and best_score[0] >= self.similarity * len(masked):
+            return best
+        return None
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# The app opens its auth database when imported; keep it out of the working tree
+os.environ.setdefault('AUTH_DB_PATH', os.path.join(tempfile.mkdtemp(), 'auth.db'))
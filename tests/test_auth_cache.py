@@ -0,0 +1,110 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import auth
+from app.models.credentials import Credential, cipher_suite
+from app.schemas import CredentialCreate
+from app.services import credential_service
+from app.services.cache_service import credential_cache, token_cache
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+
+    def expunge(self, obj):
+        pass
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        obj.id = 1
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    token_cache.clear()
+    credential_cache.clear()
+    yield
+    token_cache.clear()
+    credential_cache.clear()
+
+
+def test_credentials_are_stored_as_json():
+    credential = Credential(user_id=1, platform="aws")
+    credential.set_credentials({"access_key": "AKIA", "region": "eu-west-1"})
+    assert cipher_suite.decrypt(credential.encrypted_data.encode()) == b'{"access_key": "AKIA", "region": "eu-west-1"}'
+    assert credential.get_credentials() == {"access_key": "AKIA", "region": "eu-west-1"}
+
+
+def test_legacy_repr_credentials_are_read_without_eval():
+    credential = Credential(user_id=1, platform="aws")
+    credential.encrypted_data = cipher_suite.encrypt(b"{'access_key': 'AKIA'}").decode()
+    assert credential.get_credentials() == {"access_key": "AKIA"}
+
+    credential.encrypted_data = cipher_suite.encrypt(b"__import__('os').getcwd()").decode()
+    with pytest.raises(ValueError):
+        credential.get_credentials()
+
+
+def test_decrypted_credentials_are_cached_until_invalidated(monkeypatch):
+    stored = Credential(user_id=1, platform="aws")
+    stored.set_credentials({"access_key": "old"})
+    lookups = []
+
+    async def find_credential(db, platform, user_id):
+        lookups.append((platform, user_id))
+        return stored
+
+    monkeypatch.setattr(credential_service, "_find_credential", find_credential)
+
+    async def run():
+        db = FakeSession()
+        first = await credential_service.get_credentials(db, "aws", 1)
+        first["access_key"] = "mutated by caller"
+        second = await credential_service.get_credentials(db, "aws", 1)
+        assert second == {"access_key": "old"}
+        assert len(lookups) == 1
+
+        await credential_service.create_credential(db, "aws", CredentialCreate(access_key="new"), 1)
+        assert await credential_service.get_credentials(db, "aws", 1) == {"access_key": "new"}
+
+    asyncio.run(run())
+    # One lookup for the first read, one for the update, one after invalidation
+    assert len(lookups) == 3
+
+
+def test_verified_tokens_skip_decode_and_user_lookup(monkeypatch):
+    user = object()
+    lookups = []
+
+    async def get_user_by_username(db, username):
+        lookups.append(username)
+        return user
+
+    monkeypatch.setattr(auth, "get_user_by_username", get_user_by_username)
+    token = auth.create_access_token({"sub": "alice"}, timedelta(minutes=5))
+
+    async def run():
+        assert await auth.get_current_user(token, FakeSession()) is user
+        monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: pytest.fail("token decoded twice"))
+        assert await auth.get_current_user(token, FakeSession()) is user
+
+    asyncio.run(run())
+    assert lookups == ["alice"]
+
+
+def test_invalid_tokens_are_rejected_and_not_cached():
+    async def run():
+        with pytest.raises(HTTPException):
+            await auth.get_current_user("not-a-token", FakeSession())
+
+    asyncio.run(run())
+    assert token_cache.stats()["entries"] == 0
@@ -0,0 +1,38 @@
+import os
+import sqlite3
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+def test_startup_creates_auth_tables_in_auth_database():
+    with TestClient(app):
+        pass
+    assert {"users", "credentials"} <= tables(database.AUTH_DB_PATH)
+
+
+def test_auth_migrations_target_their_own_database(tmp_path):
+    db = tmp_path / "auth.db"
+    config = Config(os.path.join(ROOT, "alembic.ini"), ini_section="auth")
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic_auth"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{db}")
+
+    command.upgrade(config, "head")
+    assert {"users", "credentials", "alembic_version"} <= tables(db)
+
+    command.downgrade(config, "base")
+    assert tables(db) == {"alembic_version"}
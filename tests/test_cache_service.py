@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from app.services import cache_service
+from app.services.cache_service import ResultCache, estimate_size, snap_window, trim_logs
+
+
+def at(second):
+    return datetime(2024, 1, 1, 12, 0, second, tzinfo=timezone.utc)
+
+
+def test_snap_window_widens_to_bucket_boundaries():
+    start, end = snap_window(at(3), at(27), bucket_seconds=10)
+    assert (start, end) == (at(0), at(30))
+
+
+def test_trim_logs_keeps_requested_window_and_unparseable_timestamps():
+    logs = [
+        {"timestamp": at(1).isoformat(), "message": "before"},
+        {"timestamp": at(5).isoformat(), "message": "inside"},
+        {"timestamp": at(29).isoformat(), "message": "after"},
+        {"timestamp": "not a time", "message": "unplaced"},
+    ]
+    kept = trim_logs(logs, at(3), at(27))
+    assert [log["message"] for log in kept] == ["inside", "unplaced"]
+
+
+def test_cache_evicts_least_recently_used_over_byte_budget():
+    value = "x" * 100
+    cache = ResultCache(max_bytes=estimate_size(value) * 2)
+    cache.set("a", value, ttl=60)
+    cache.set("b", value, ttl=60)
+    assert cache.get("a") == value
+    cache.set("c", value, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert cache.stats()["evictions"] == 1
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_cache_skips_values_larger_than_budget():
+    cache = ResultCache(max_bytes=10)
+    cache.set("a", "x" * 100, ttl=60)
+    assert cache.get("a") is None
+    assert cache.current_bytes == 0
+
+
+def test_cache_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    cache = ResultCache()
+    cache.set("a", "value", ttl=15)
+
+    now[0] += 14
+    assert cache.get("a") == "value"
+    now[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.current_bytes == 0
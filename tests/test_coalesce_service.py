@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app.services.coalesce_service import SingleFlight, TailHub, flight_key
+
+
+def test_flight_key_shares_calls_by_credentials_not_user():
+    key_a = flight_key(("logs", 1, "aws", "group"), {"access_key": "A"})
+    key_b = flight_key(("logs", 2, "aws", "group"), {"access_key": "A"})
+    key_c = flight_key(("logs", 2, "aws", "group"), {"access_key": "B"})
+    assert key_a == key_b
+    assert key_a != key_c
+
+
+def test_concurrent_identical_calls_run_once():
+    flights = SingleFlight()
+    started = []
+
+    async def fetch():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return {"logs": [1, 2, 3]}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert results == [{"logs": [1, 2, 3]}] * 5
+    assert len(started) == 1
+    assert flights.stats()["coalesced"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_one_caller_leaving_does_not_cancel_the_call():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leaver = asyncio.create_task(flights.do("key", fetch))
+        stayer = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        return await stayer
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_call_is_cancelled_when_every_caller_leaves():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def fetch():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        callers = [asyncio.create_task(flights.do("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled == [True]
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_tail_hub_shares_one_upstream_between_subscribers():
+    hub = TailHub()
+    opened = []
+
+    async def source():
+        opened.append(1)
+        await asyncio.sleep(0.01)
+        for i in range(3):
+            yield i
+            await asyncio.sleep(0)
+
+    async def collect():
+        return [event async for event in hub.subscribe("key", source)]
+
+    async def run():
+        return await asyncio.gather(collect(), collect())
+
+    assert asyncio.run(run()) == [[0, 1, 2], [0, 1, 2]]
+    assert len(opened) == 1
+    assert hub.stats()["tails"] == 0
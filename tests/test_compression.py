@@ -0,0 +1,77 @@
+import asyncio
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, _CompressionResponder, negotiate_encoding
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    def small():
+        return JSONResponse({"ok": True})
+
+    @app.get("/large")
+    def large():
+        return JSONResponse({"logs": ["repeated log line"] * 200})
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, br") is None
+    assert negotiate_encoding("") is None
+
+
+def test_small_responses_are_not_compressed():
+    response = make_client().get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+
+def test_large_responses_are_gzipped():
+    response = make_client().get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.json() == {"logs": ["repeated log line"] * 200}
+
+
+def test_uncompressed_when_not_accepted():
+    response = make_client().get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_event_stream_is_flushed_per_chunk():
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        responder = _CompressionResponder(send, "gzip", 6, minimum_size=1024)
+        await responder.send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream")],
+        })
+        # Headers go out before any event so idle tails are not held back
+        assert len(sent) == 1
+        await responder.send({"type": "http.response.body", "body": b"data: [1]\n\n", "more_body": True})
+        await responder.send({"type": "http.response.body", "body": b"data: [2]\n\n", "more_body": True})
+        await responder.send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    asyncio.run(run())
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Every chunk decodes to its whole event as soon as it arrives
+    assert decoder.decompress(sent[1]["body"]) == b"data: [1]\n\n"
+    assert decoder.decompress(sent[2]["body"]) == b"data: [2]\n\n"
+    assert decoder.decompress(sent[3]["body"]) == b""
+    assert decoder.eof
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.cursor_service import InvalidCursor, decode_cursor, encode_cursor, query_fingerprint
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+END = START + timedelta(hours=1)
+FINGERPRINT = query_fingerprint("aws", "group", {"level": "ERROR"})
+
+
+def test_cursor_round_trip():
+    window = (START + timedelta(seconds=3), END - timedelta(seconds=3))
+    token = encode_cursor("aws", {"token": "abc", "offset": 2}, FINGERPRINT, START, END, window)
+    assert decode_cursor(token, "aws", FINGERPRINT) == ({"token": "abc", "offset": 2}, START, END, window)
+
+
+def test_cursor_without_window_returns_fetched_window():
+    token = encode_cursor("aws", 5, FINGERPRINT, START, END)
+    assert decode_cursor(token, "aws", FINGERPRINT)[3] == (START, END)
+
+
+def test_tampered_cursor_is_rejected():
+    token = encode_cursor("aws", 5, FINGERPRINT, START, END)
+    body, signature = token.split(".")
+    forged = encode_cursor("aws", 500, FINGERPRINT, START, END).split(".")[0]
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(f"{forged}.{signature}", "aws", FINGERPRINT)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(body, "aws", FINGERPRINT)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("garbage", "aws", FINGERPRINT)
+
+
+def test_cursor_from_another_query_is_rejected():
+    token = encode_cursor("aws", 5, FINGERPRINT, START, END)
+    with pytest.raises(InvalidCursor, match="does not match"):
+        decode_cursor(token, "gcp", FINGERPRINT)
+    with pytest.raises(InvalidCursor, match="does not match"):
+        decode_cursor(token, "aws", query_fingerprint("aws", "other", {}))
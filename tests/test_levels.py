@@ -0,0 +1,44 @@
+import pytest
+
+from app.reader.levels import parse_log_level, parse_log_levels
+
+
+@pytest.mark.parametrize('message, level', [
+    ('ERROR: disk full', 'ERROR'),
+    ('2024-01-01 12:00:00 WARN app started late', 'WARN'),
+    ('2024-01-01T12:00:00.123Z ERROR request failed', 'ERROR'),
+    ('Jan  1 12:00:00 DEBUG cache warmed', 'DEBUG'),
+    ('[main] INFO listening on :8080', 'INFO'),
+    ('[ERROR] connection refused', 'ERROR'),
+    ('[main] (warn) pool exhausted', 'WARN'),
+    ('Jan  1 12:00:00 host prog[1]: ERROR disk failure', 'ERROR'),
+    ('Oct 19 08:00:01 web-1 nginx: [warn] upstream slow', 'WARN'),
+    ('{"level": 30, "msg": "pino info"}', 'INFO'),
+    ('{"level": 40, "msg": "pino warn"}', 'WARN'),
+    ('{"level": 50, "msg": "pino error"}', 'ERROR'),
+    ('{"level": 20, "msg": "pino debug"}', 'DEBUG'),
+    ('{"severity": 3, "msg": "syslog err"}', 'ERROR'),
+    ('level=warning msg="slow query"', 'WARN'),
+    ('{"severity": "CRITICAL", "message": "out of memory"}', 'ERROR'),
+])
+def test_level_tokens(message, level):
+    assert parse_log_level(message) == level
+
+
+@pytest.mark.parametrize('message', [
+    'Using DEFAULT profile',
+    'Disk ALERT threshold raised to 90%',
+    'Retrying after ERROR from upstream',
+    '2024-01-01 12:00:00 app reported FATAL condition',
+    'no error found',
+    'request finished (error) after retry',
+    'user typed [warn] into the form',
+    'Jan  1 12:00:00 host sshd[1]: Connection closed, reason [error]',
+])
+def test_level_words_inside_message_are_ignored(message):
+    assert parse_log_level(message, default='NONE') == 'NONE'
+
+
+def test_batch_matches_single_messages():
+    messages = ['ERROR: a', 'Using DEFAULT profile', 'ERROR: a', 'WARN b']
+    assert parse_log_levels(messages) == [parse_log_level(m) for m in messages]
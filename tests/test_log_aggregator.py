@@ -0,0 +1,24 @@
+from log_aggregator import LogAggregator
+from log_storage import LogStorage
+
+SYSLOG = """\
+Oct 19 08:00:01 host CRON[123]: (root) CMD (run-parts /etc/cron.hourly)
+Oct 19 08:00:02 host sshd[456]: Accepted publickey for deploy
+Oct  9 23:59:59 host kernel: [  0.000000] Linux version 6.1
+a continuation line without a timestamp
+"""
+
+
+def test_collecting_a_plain_text_file_twice_stores_it_once(tmp_path):
+    log_file = tmp_path / 'syslog'
+    log_file.write_text(SYSLOG)
+    aggregator = LogAggregator()
+    storage = LogStorage(str(tmp_path / 'logs.db'))
+
+    first = aggregator.collect_local_logs([str(log_file)])
+    assert [log['timestamp'] for log in first] == ['Oct 19 08:00:01', 'Oct 19 08:00:02', 'Oct  9 23:59:59', None]
+    assert storage.store_logs(first)['stored'] == 4
+
+    second = aggregator.collect_local_logs([str(log_file)])
+    assert storage.store_logs(second)['duplicates'] == 4
+    assert storage.count_logs() == 4
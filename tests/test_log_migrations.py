@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from alembic import command
+from alembic.config import Config
+
+from log_storage import LogStorage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs alembic with the storage scripts unimportable, so a revision that
+# still reached into them would fail
+UPGRADE = '''
+import sys
+sys.modules['log_storage'] = None
+sys.modules['log_templates'] = None
+from alembic.config import main
+main(['-c', sys.argv[1], 'upgrade', sys.argv[2]])
+'''
+
+
+def legacy_database(path):
+    """A logs.db at revision 14e4f0fc695f: text timestamps and level names."""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE sources (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, type VARCHAR NOT NULL, configuration VARCHAR);
+        CREATE TABLE logs (
+            id INTEGER PRIMARY KEY, source_id INTEGER, timestamp DATETIME NOT NULL,
+            level VARCHAR, message VARCHAR NOT NULL
+        );
+        CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY);
+        INSERT INTO alembic_version VALUES ('14e4f0fc695f');
+        INSERT INTO sources (id, name, type) VALUES (1, '/var/log/app.log', 'file');
+        INSERT INTO logs VALUES (1, 1, '2024-01-01 10:00:00', 'info', 'service started');
+        INSERT INTO logs VALUES (2, 1, '2024-01-02 11:30:00', 'ERROR', 'disk full on /dev/sda1');
+        INSERT INTO logs VALUES (3, 1, 'not a time', NULL, 'unparseable timestamp');
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def alembic_config(tmp_path, db):
+    ini = tmp_path / 'alembic.ini'
+    with open(os.path.join(ROOT, 'alembic.ini')) as f:
+        text = f.read()
+    ini.write_text(
+        text.replace('script_location = alembic\n', f"script_location = {os.path.join(ROOT, 'alembic')}\n", 1)
+            .replace('sqlite:///./logs.db', f'sqlite:///{db}')
+    )
+    return ini
+
+
+def upgrade(ini, revision):
+    result = subprocess.run(
+        [sys.executable, '-c', UPGRADE, str(ini), revision],
+        cwd=ini.parent, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_log_revisions_migrate_without_the_storage_scripts(tmp_path):
+    db = tmp_path / 'logs.db'
+    legacy_database(db)
+    ini = alembic_config(tmp_path, db)
+
+    upgrade(ini, 'head')
+
+    storage = LogStorage(str(db))
+    logs = {log['id']: log for log in storage.query_logs()}
+    assert sorted(logs) == [1, 2, 3]
+    assert logs[2]['level'] == 'ERROR' and logs[2]['message'] == 'disk full on /dev/sda1'
+    assert logs[1]['level'] == 'INFO'
+    assert logs[3]['metadata'] == {'raw_timestamp': 'not a time'}
+    assert [log['id'] for log in storage.query_logs(keyword='disk')] == [2]
+    assert storage.store_logs([
+        {'source': 'file', 'file_path': '/var/log/app.log', 'timestamp': '2024-01-02T12:00:00', 'content': 'later'}
+    ])['stored'] == 1
+
+    config = Config(str(ini))
+    command.downgrade(config, '14e4f0fc695f')
+    conn = sqlite3.connect(db)
+    rows = conn.execute('SELECT id, level, message FROM logs ORDER BY id').fetchall()
+    conn.close()
+    assert rows[:3] == [
+        (1, 'INFO', 'service started'),
+        (2, 'ERROR', 'disk full on /dev/sda1'),
+        (3, None, 'unparseable timestamp'),
+    ]
+    assert rows[3][1:] == ('INFO', 'later')
+
+
+def test_full_text_indexes_are_rebuilt_from_full_messages(tmp_path):
+    db = tmp_path / 'logs.db'
+    legacy_database(db)
+    ini = alembic_config(tmp_path, db)
+    upgrade(ini, 'd3a95c7e18b2')
+
+    # Compressed and templated logs written before the index became contentless
+    def logs(count, message):
+        return [
+            {
+                'source': 'file',
+                'file_path': '/var/log/app.log',
+                'timestamp': f'2024-01-02T12:{i // 60 % 60:02d}:{i % 60:02d}',
+                'content': message(i),
+            }
+            for i in range(count)
+        ]
+
+    LogStorage(str(db), compress_messages=True, mine_templates=False).store_logs(
+        logs(2500, lambda i: f'GET /api/orders/{i} page {i % 13} answered 200 in {i % 97} ms for client c{i % 31}')
+    )
+    LogStorage(str(db)).store_logs(logs(700, lambda i: f'user u{i} logged in from host{i % 7}'))
+    upgrade(ini, 'head')
+
+    conn = sqlite3.connect(db)
+    assert conn.execute('SELECT COUNT(*) FROM logs_p20240102 WHERE dict_id IS NOT NULL').fetchone()[0]
+    assert conn.execute('SELECT COUNT(*) FROM logs_p20240102 WHERE template_id IS NOT NULL').fetchone()[0]
+    for (name,) in conn.execute('SELECT name FROM log_partitions').fetchall():
+        conn.execute(f"INSERT INTO logs_fts_{name} (logs_fts_{name}) VALUES ('integrity-check')")
+        assert "content=''" in conn.execute('SELECT sql FROM sqlite_master WHERE name = ?', (f'logs_fts_{name}',)).fetchone()[0]
+    conn.close()
+    storage = LogStorage(str(db))
+    assert [log['message'] for log in storage.query_logs(keyword='u699')] == ['user u699 logged in from host6']
+    assert len(list(storage.query_logs(keyword='host3', limit=5000))) == 100
+    assert [log['message'] for log in storage.query_logs(keyword='orders/2499')] == [
+        'GET /api/orders/2499 page 3 answered 200 in 74 ms for client c19'
+    ]
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from log_query import LogQuery, QueryParams
+
+
+@pytest.fixture
+def query(tmp_path, monkeypatch):
+    # AuthManager keeps its config in the working directory
+    monkeypatch.chdir(tmp_path)
+    return LogQuery(str(tmp_path / 'logs.db'))
+
+
+def store(query, count, timestamp=None):
+    now = datetime.now().replace(microsecond=0)
+    query.storage.store_logs([
+        {
+            'source': 'file',
+            'file_path': '/var/log/app.log',
+            'timestamp': timestamp or (now - timedelta(minutes=7 * i)).isoformat(),
+            'level': ('INFO', 'ERROR')[i % 2],
+            'content': {'message': f'request {i} served'},
+        }
+        for i in range(count)
+    ])
+
+
+def scan(query, params):
+    original = query.count_from_rollups
+    query.count_from_rollups = lambda params: None
+    try:
+        return query.run_query(params)
+    finally:
+        query.count_from_rollups = original
+
+
+def test_aggregates_come_from_rollups_and_match_a_scan(query):
+    store(query, 500)
+    params = QueryParams(aggregate='COUNT', group_by='level')
+    assert query.count_from_rollups(params) is not None
+    assert query.run_query(params) == scan(query, params) == [
+        {'level': 'ERROR', 'count': 250}, {'level': 'INFO', 'count': 250}
+    ]
+
+
+def test_unparseable_timestamp_does_not_disable_rollups(query):
+    store(query, 500)
+    store(query, 1, timestamp='not a timestamp')
+    assert query.storage.partitions()[-1] == 'p19700101'
+
+    params = QueryParams(aggregate='COUNT', group_by='level')
+    assert query.count_from_rollups(params) is not None
+    assert query.run_query(params) == scan(query, params) == [
+        {'level': 'ERROR', 'count': 250}, {'level': 'INFO', 'count': 251}
+    ]
+
+
+def test_scans_read_archived_partitions(query):
+    store(query, 200, timestamp=None)
+    query.storage.store_logs([
+        {
+            'source': 'file',
+            'file_path': '/var/log/app.log',
+            'timestamp': f'2024-01-01T{i // 60:02d}:{i % 60:02d}:00',
+            'level': ('INFO', 'ERROR')[i % 2],
+            'content': {'message': f'disk{"less" if i % 3 else ""} node {i} full'},
+        }
+        for i in range(300)
+    ])
+    searches = [
+        QueryParams(keyword='disk', limit=0),
+        QueryParams(keyword='disk*', level='ERROR', limit=0),
+        QueryParams(keyword='"node 7"', limit=0),
+        QueryParams(limit=250),
+    ]
+    aggregates = [
+        QueryParams(aggregate=aggregate, group_by=field)
+        for aggregate in ('COUNT', 'MAX')
+        for field in ('level', 'source_type', 'date', 'hour')
+    ]
+    before = [scan(query, params) for params in searches + aggregates]
+
+    assert query.storage.archive_partitions_before(datetime(2024, 1, 2)) == ['p20240101']
+    assert [scan(query, params) for params in searches + aggregates] == before
+    assert len(before[0]) == 100 and len(before[1]) == 150 and len(before[3]) == 250
+
+
+def test_template_queries_refuse_archived_partitions(query):
+    store(query, 10, timestamp='2024-01-01T12:00:00')
+    query.storage.archive_partitions_before(datetime(2024, 1, 2))
+    for params in (QueryParams(template=1), QueryParams(aggregate='COUNT', group_by='template')):
+        with pytest.raises(ValueError, match='p20240101'):
+            scan(query, params)
+    assert len(scan(query, QueryParams(end_time='2024-01-01T23:00:00'))) == 10
+
+
+def test_late_logs_for_an_archived_day_keep_rollup_counts_exact(query):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def day(offset, count):
+        query.storage.store_logs([
+            {
+                'source': 'file',
+                'file_path': '/var/log/app.log',
+                'timestamp': (today - timedelta(days=offset, minutes=-5 * i)).isoformat(),
+                'level': ('INFO', 'ERROR')[i % 2],
+                'content': {'message': f'request {i} served'},
+            }
+            for i in range(count)
+        ])
+
+    for offset in (5, 4, 3):
+        day(offset, 200)
+    # Day -5 leaves only its rollups behind and day -4 moves to the archive;
+    # a late log then re-creates day -5 as a live partition
+    query.storage.drop_partitions_before(today - timedelta(days=4))
+    query.storage.archive_partitions_before(today - timedelta(days=3))
+    day(5, 1)
+
+    params = QueryParams(aggregate='COUNT', group_by='level')
+    assert query.count_from_rollups(params) is not None
+    assert query.run_query(params) == scan(query, params) == [
+        {'level': 'ERROR', 'count': 200}, {'level': 'INFO', 'count': 201}
+    ]
+
+
+def test_filter_and_group_by_template(query):
+    store(query, 40)
+    query.storage.store_logs([
+        {
+            'source': 'file',
+            'file_path': '/var/log/app.log',
+            'timestamp': (datetime.now() - timedelta(minutes=i)).isoformat(),
+            'content': {'message': f'disk sda{i} is {i}% full'},
+        }
+        for i in range(10)
+    ])
+    templates = query.storage.templates()
+    requests, disks = (
+        next(cid for cid, template in templates.items() if template.startswith(prefix))
+        for prefix in ('request', 'disk')
+    )
+
+    rows = query.run_query(QueryParams(aggregate='COUNT', group_by='template'))
+    assert {row['template']: (row['count'], row['template_text']) for row in rows} == {
+        requests: (40, 'request <*> served'),
+        disks: (10, 'disk <*> is <*> full'),
+    }
+    logs = query.run_query(QueryParams(template=disks, limit=0))
+    assert sorted(log['message'] for log in logs) == sorted(f'disk sda{i} is {i}% full' for i in range(10))
@@ -0,0 +1,277 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from contextlib import contextmanager
+
+import pytest
+
+from log_storage import COMPRESSION_RETRAIN_DAYS, INSERT_CHUNK_ROWS, LogCompactor, LogStorage, LogWriter
+
+
+def make_logs(count, day='2024-01-01', source='file', path='/var/log/app.log'):
+    return [
+        {
+            'source': source,
+            'file_path': path,
+            'timestamp': f'{day}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}',
+            'level': 'INFO',
+            'content': {'message': f'request {i} served'},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LogStorage(str(tmp_path / 'logs.db'), archive_dir=str(tmp_path / 'archive'))
+
+
+@pytest.fixture
+def statements(storage, monkeypatch):
+    """SQL run on the storage's connections, recorded through the trace callback."""
+    run = []
+    get_connection = storage._get_connection
+
+    @contextmanager
+    def traced(*args, **kwargs):
+        with get_connection(*args, **kwargs) as conn:
+            conn.set_trace_callback(run.append)
+            yield conn
+
+    monkeypatch.setattr(storage, '_get_connection', traced)
+    return run
+
+
+def test_writer_raises_when_its_thread_dies(storage, monkeypatch):
+    @contextmanager
+    def broken_connection():
+        raise sqlite3.OperationalError('unable to open database file')
+        yield
+
+    writer = LogWriter(storage)
+    monkeypatch.setattr(storage, '_get_connection', broken_connection)
+    writer.start()
+    writer._thread.join(5)
+    with pytest.raises(RuntimeError, match='unable to open database file'):
+        writer.submit(make_logs(1))
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
+def test_writer_stores_and_flushes(storage):
+    with LogWriter(storage) as writer:
+        writer.submit(make_logs(10))
+        writer.flush()
+        assert writer.stats['stored'] == 10
+    assert storage.count_logs() == 10
+
+
+def test_archiving_a_day_twice_keeps_both_exports(storage):
+    storage.store_logs(make_logs(100))
+    assert storage.archive_partitions_before(datetime(2024, 6, 1)) == ['p20240101']
+
+    late = make_logs(5)
+    for log in late:
+        log['content']['message'] += ' late'
+    storage.store_logs(late)
+    assert storage.archive_partitions_before(datetime(2024, 6, 1)) == ['p20240101']
+
+    assert storage.count_logs() == 105
+    logs = list(storage.query_logs(
+        start_time=datetime(2024, 1, 1), end_time=datetime(2024, 1, 2), limit=1000, include_metadata=False
+    ))
+    assert len(logs) == 105
+    assert sum(log['message'].endswith(' late') for log in logs) == 5
+
+
+def test_reingesting_an_archived_day_stores_nothing_twice(storage):
+    logs = make_logs(300)
+    storage.store_logs(logs)
+    storage.archive_partitions_before(datetime(2024, 6, 1))
+
+    summary = storage.store_logs(logs)
+    assert summary['duplicates'] == 300
+    assert storage.count_logs() == 300
+    # The empty partition left by the rerun is not archived as a second file
+    assert storage.archive_partitions_before(datetime(2024, 6, 1)) == []
+    assert storage.count_logs() == 300
+
+
+def test_writer_waits_for_the_storage_lock(storage):
+    with LogWriter(storage) as writer:
+        with storage._lock:
+            writer.submit(make_logs(10))
+            time.sleep(0.2)
+            # The writer cannot touch the shared caches while another thread writes
+            assert writer.stats['stored'] == 0
+        writer.flush()
+        assert writer.stats['stored'] == 10
+
+
+def test_writer_and_caller_share_one_storage(storage):
+    days = ['2024-01-%02d' % day for day in range(1, 9)]
+    with LogWriter(storage) as writer:
+        def produce():
+            for day in days[:4]:
+                writer.submit(make_logs(500, day=day, path='/var/log/writer.log'))
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        for day in days[4:]:
+            storage.store_logs(make_logs(500, day=day, path='/var/log/caller.log'))
+            storage.drop_partitions_before(datetime(2023, 1, 1))
+        producer.join()
+        writer.flush()
+        assert writer.stats['failed'] == 0
+
+    assert storage.count_logs() == 4000
+    assert sorted(storage.partitions()) == ['p202401%02d' % day for day in range(1, 9)]
+
+
+def test_batches_spanning_several_insert_chunks(storage):
+    count = 2 * INSERT_CHUNK_ROWS + 7
+    logs = make_logs(count)
+    for i, log in enumerate(logs):
+        log['level'] = 'ERROR' if i % 3 == 0 else 'INFO'
+        log['stream'] = f'stream-{i % 2}'
+    assert storage.store_logs(logs)['stored'] == count
+
+    stored = list(storage.query_logs(
+        start_time=datetime(2024, 1, 1), end_time=datetime(2024, 1, 2), limit=count + 1
+    ))
+    assert sorted(log['message'] for log in stored) == sorted(f'request {i} served' for i in range(count))
+    assert all(log['metadata']['stream'] in ('stream-0', 'stream-1') for log in stored)
+
+    rollups = storage.rollup_counts(granularity='minute', by=('level',))
+    assert {row['level']: row['count'] for row in rollups} == {'ERROR': (count + 2) // 3, 'INFO': count - (count + 2) // 3}
+    hours = storage.rollup_counts(granularity='hour', by=('bucket',))
+    assert sum(row['count'] for row in hours) == count
+
+
+def test_reindex_uses_full_text_of_templated_logs(storage):
+    storage.store_logs(make_logs(200))
+    with sqlite3.connect(storage.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM logs_p20240101 WHERE message = ''").fetchone()[0] > 0
+
+    assert storage.reindex() == 200
+    with sqlite3.connect(storage.db_path) as conn:
+        conn.execute("INSERT INTO logs_fts_p20240101 (logs_fts_p20240101) VALUES ('integrity-check')")
+    assert [log['message'] for log in storage.query_logs(keyword='"request 137"')] == ['request 137 served']
+    assert len(list(storage.query_logs(keyword='served'))) == 200
+
+
+def test_query_logs_streams_and_fetches_metadata_per_page(storage, statements):
+    logs = make_logs(1200)
+    for i, log in enumerate(logs):
+        log['stream'] = f'stream-{i % 3}'
+    storage.store_logs(logs)
+
+    statements.clear()
+    results = storage.query_logs(limit=1200, fetch_size=500)
+    assert iter(results) is results
+    results = list(results)
+    assert len(results) == 1200
+    assert all(log['metadata']['stream'] == f"stream-{int(log['message'].split()[1]) % 3}" for log in results)
+    # One metadata query per page of 500 rows, not one per row
+    assert len([sql for sql in statements if 'FROM log_metadata_' in sql]) == 3
+
+    statements.clear()
+    assert all(not log.get('metadata') for log in storage.query_logs(limit=1200, include_metadata=False))
+    assert not any('log_metadata_' in sql for sql in statements)
+
+
+def test_queries_only_read_partitions_in_the_window(storage, statements):
+    for day in ('2024-01-01', '2024-01-02', '2024-01-03'):
+        storage.store_logs(make_logs(50, day=day))
+
+    statements.clear()
+    logs = list(storage.query_logs(start_time=datetime(2024, 1, 2), end_time=datetime(2024, 1, 2, 23, 59, 59)))
+    assert len(logs) == 50
+    assert {name for sql in statements for name in re.findall(r'logs_(p\d{8})', sql)} == {'p20240102'}
+
+
+def test_retention_drops_whole_partitions(storage, statements):
+    for day in ('2024-01-01', '2024-01-02', '2024-01-03'):
+        storage.store_logs(make_logs(50, day=day))
+
+    statements.clear()
+    assert sorted(storage.drop_partitions_before(datetime(2024, 1, 3))) == ['p20240101', 'p20240102']
+    assert any(sql.startswith('DROP TABLE IF EXISTS logs_p20240101') for sql in statements)
+    assert not any(re.match(r'\s*DELETE FROM logs_p', sql) for sql in statements)
+    assert storage.partitions() == ['p20240103']
+    assert storage.count_logs() == 50
+
+
+def test_writes_notice_partitions_archived_by_another_storage(storage, capsys):
+    storage.store_logs(make_logs(10))
+    other = LogStorage(storage.db_path, archive_dir=storage.archive_dir)
+    with LogWriter(storage) as writer, LogCompactor(other, archive_after_days=1) as compactor:
+        compactor.run_once()
+        assert compactor.last_summary['archived_partitions'] == ['p20240101']
+        late = make_logs(5)
+        for log in late:
+            log['content']['message'] += ' late'
+        writer.submit(late)
+        writer.flush()
+        assert writer.stats['stored'] == 5
+    assert 'retrying one by one' not in capsys.readouterr().out
+    assert storage.count_logs() == 15
+
+
+def test_templated_messages_read_back_exactly(storage):
+    messages = [f'user u{i} logged in from host{i % 7}' for i in range(50)]
+    messages += [f'user alice logged in from {place}' for place in ('gateway', 'vpn', 'office')]
+    messages += [
+        'double  spaced  message 1',
+        'trailing space 2 ',
+        ' leading space 3',
+        '',
+        'field\x1fseparated 4',
+        ' '.join(f'token{i}' for i in range(150)),
+    ]
+    logs = make_logs(len(messages))
+    for log, message in zip(logs, messages):
+        log['content'] = {'message': message}
+    storage.store_logs(logs)
+
+    with sqlite3.connect(storage.db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM logs_p20240101 WHERE template_id IS NOT NULL').fetchone()[0] >= 50
+        # 'user alice logged in from <*>' generalized after its first log was stored
+        assert conn.execute("SELECT COUNT(*) FROM templates WHERE template LIKE 'user alice %'").fetchone()[0] == 2
+    assert sorted(log['message'] for log in storage.query_logs()) == sorted(messages)
+
+    templates = storage.templates()
+    cluster = next(cid for cid, template in templates.items() if template.startswith('user alice'))
+    assert templates[cluster] == 'user alice logged in from <*>'
+    assert sorted(log['message'] for log in storage.query_logs(template_id=cluster)) == sorted(messages[50:53])
+
+
+def test_compressed_messages_survive_dictionary_retraining(tmp_path):
+    def logs(count, day, method):
+        logs = make_logs(count, day=day)
+        for i, log in enumerate(logs):
+            log['content'] = {'message': f'{method} /api/orders/{i} page {i % 13} answered 200 in {i % 97} ms for client c{i % 31}'}
+        return logs
+
+    storage = LogStorage(str(tmp_path / 'logs.db'), mine_templates=False, compress_messages=True)
+    first, second = logs(2500, '2024-01-01', 'GET'), logs(500, '2024-01-02', 'POST')
+    storage.store_logs(first)
+    with sqlite3.connect(storage.db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM logs_p20240101 WHERE dict_id = 1').fetchone()[0] > 0
+        conn.execute('UPDATE compression_dicts SET created_at = created_at - ?', ((COMPRESSION_RETRAIN_DAYS + 1) * 86400000,))
+
+    assert storage.compact()['trained_dictionaries'] == 1
+    storage.store_logs(second)
+    with sqlite3.connect(storage.db_path) as conn:
+        assert conn.execute('SELECT DISTINCT dict_id FROM logs_p20240102').fetchall() == [(2,)]
+
+    # A fresh storage decompresses both versions on read, searches included
+    reader = LogStorage(str(tmp_path / 'logs.db'))
+    expected = [log['content']['message'] for log in first + second]
+    assert sorted(log['message'] for log in reader.query_logs(limit=5000)) == sorted(expected)
+    assert [log['message'] for log in reader.query_logs(keyword='"orders/2499"')] == [expected[2499]]
+    assert len(list(reader.query_logs(keyword='POST', limit=5000))) == 500
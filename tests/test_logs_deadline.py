@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.database import get_async_db
+from app.platforms.base import LogPlatform
+from app.services.cache_service import result_cache
+from app.services.deadline_service import QueryBudget
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+PAGES = 50
+
+
+class SlowPlatform(LogPlatform):
+    """One log per page, each page taking a while to arrive."""
+    native_paging = True
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.positions = []
+
+    async def get_logs(self, credentials, start_time, end_time, filters):
+        raise NotImplementedError
+
+    async def get_logs_page(self, credentials, start_time, end_time, filters, limit, position=None, budget=None):
+        position = int(position or 0)
+        self.positions.append(position)
+        await asyncio.sleep(self.delay)
+        log = {"timestamp": (START + timedelta(seconds=position)).isoformat(), "message": f"log {position}"}
+        return [log], position + 1 if position + 1 < PAGES else None
+
+    def validate_credentials(self, credentials):
+        return True
+
+
+def test_collect_logs_stops_at_budget_with_resume_position():
+    platform = SlowPlatform()
+    logs, position = asyncio.run(
+        platform.collect_logs({}, START, START, {}, QueryBudget(0.1))
+    )
+    assert 0 < len(logs) < PAGES
+    assert position == len(logs)
+
+
+def test_collect_logs_completes_within_budget():
+    logs, position = asyncio.run(
+        SlowPlatform(delay=0).collect_logs({}, START, START, {}, QueryBudget(5))
+    )
+    assert len(logs) == PAGES
+    assert position is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    platform = SlowPlatform()
+
+    async def get_user_platform(name):
+        return platform
+
+    async def get_credentials(db, name, user_id):
+        return {"key": "value"}
+
+    async def current_user():
+        return type("User", (), {"id": 1})()
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(main.platform_service, "get_user_platform", get_user_platform)
+    monkeypatch.setattr(main.credential_service, "get_credentials", get_credentials)
+    main.app.dependency_overrides[main.get_current_user] = current_user
+    main.app.dependency_overrides[get_async_db] = no_db
+    result_cache.clear()
+    yield TestClient(main.app), platform
+    main.app.dependency_overrides.clear()
+    result_cache.clear()
+
+
+def test_logs_returns_partial_result_and_resumes(client):
+    client, platform = client
+    params = {
+        "platform": "aws",
+        "log_group": "group",
+        "start_time": START.isoformat(),
+        "end_time": (START + timedelta(minutes=5)).isoformat(),
+    }
+
+    first = client.get("/logs", params={**params, "timeout": 0.1}).json()
+    assert first["truncated"] is True
+    assert first["resume_cursor"]
+    assert 0 < len(first["logs"]) < PAGES
+
+    rest = client.get("/logs", params={**params, "cursor": first["resume_cursor"], "timeout": 10}).json()
+    assert rest["truncated"] is False
+    assert rest["resume_cursor"] is None
+    messages = [log["message"] for log in first["logs"] + rest["logs"]]
+    assert messages == [f"log {i}" for i in range(PAGES)]
+
+
+def test_truncated_results_are_not_cached(client):
+    client, platform = client
+    params = {
+        "platform": "aws",
+        "log_group": "group",
+        "start_time": START.isoformat(),
+        "end_time": (START + timedelta(minutes=5)).isoformat(),
+        "timeout": 0.1,
+    }
+    client.get("/logs", params=params)
+    calls = len(platform.positions)
+    assert client.get("/logs", params=params).json()["truncated"] is True
+    assert len(platform.positions) > calls
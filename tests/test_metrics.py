@@ -0,0 +1,59 @@
+import asyncio
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.main import app
+from app.metrics import UPSTREAM_CALLS, upstream_call
+from app.services.cache_service import result_cache
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {family.name: family for family in text_string_to_metric_families(response.text)}
+
+
+def sample(family, name, **labels):
+    for s in family.samples:
+        if s.name == name and all(s.labels.get(k) == v for k, v in labels.items()):
+            return s.value
+    raise AssertionError(f"{name} {labels} not found")
+
+
+def test_cumulative_stats_are_counters_and_levels_are_gauges():
+    with TestClient(app) as client:
+        result_cache.get(("metrics-test",))
+        families = scrape(client)
+
+    for name in ("logs_cache_hits", "logs_cache_misses", "logs_cache_evictions", "logs_coalesced_requests"):
+        assert families[name].type == "counter"
+    for name in ("logs_cache_entries", "logs_cache_bytes", "logs_upstream_in_flight", "logs_tail_subscribers"):
+        assert families[name].type == "gauge"
+    assert sample(families["logs_cache_misses"], "logs_cache_misses_total", cache="results") >= 1
+
+
+def test_requests_are_timed_by_route_template():
+    with TestClient(app) as client:
+        client.get("/metrics")
+        text = client.get("/metrics").text
+    assert re.search(r'logs_http_request_duration_seconds_count\{method="GET",route="/metrics",status="200"\} [1-9]', text)
+
+
+def test_upstream_call_records_outcome():
+    before = UPSTREAM_CALLS.labels("test", "op", "error")._value.get()
+    with pytest.raises(RuntimeError):
+        with upstream_call("test", "op"):
+            raise RuntimeError("boom")
+    assert UPSTREAM_CALLS.labels("test", "op", "error")._value.get() == before + 1
+
+
+def test_startup_and_shutdown_run_through_lifespan():
+    assert not app.router.on_startup and not app.router.on_shutdown
+    with TestClient(app) as client:
+        # Give the loop lag probe a chance to run at least once
+        client.portal.call(asyncio.sleep, 0.6)
+        families = scrape(client)
+    assert sample(families["logs_event_loop_lag_distribution_seconds"], "logs_event_loop_lag_distribution_seconds_count") >= 1
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.platforms import PLATFORM_REGISTRY, get_platform_class
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SDK_PACKAGES = ('google', 'azure', 'elasticsearch', 'boto3', 'botocore')
+
+# Run in a fresh interpreter so modules imported by other tests don't leak in
+PROBE = '''
+import json, sys
+import app.main
+from app.services.platform_service import PlatformService
+
+def sdks():
+    return sorted({m.split('.')[0] for m in sys.modules} & set(%r))
+
+before = sdks()
+scanned = PlatformService._local_logs is not None
+from app.platforms import get_platform_class
+get_platform_class('aws')
+print(json.dumps({'before': before, 'scanned': scanned, 'after': sdks()}))
+''' % (SDK_PACKAGES,)
+
+
+def test_importing_the_app_loads_no_cloud_sdk():
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result['before'] == []
+    assert result['scanned'] is False
+    assert 'boto3' in result['after']
+
+
+def test_registry_resolves_every_platform_lazily():
+    assert get_platform_class('unknown') is None
+    assert get_platform_class('local').__name__ == 'LocalPlatform'
+    assert set(PLATFORM_REGISTRY) >= {'aws', 'local', 'file', 'els', 'gcp', 'azure'}
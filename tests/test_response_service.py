@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.services.response_service import FastJSONResponse, dumps, parse_fields, shape_logs
+
+LOGS = [
+    {"timestamp": "2024-01-01T12:00:00", "message": "started", "source": "api", "level": "INFO"},
+    {"timestamp": "2024-01-01T12:00:01", "message": "failed", "source": "worker", "level": "ERROR"},
+    {"timestamp": "2024-01-01T12:00:02", "message": "retrying", "source": "api", "level": "INFO"},
+]
+
+
+def test_parse_fields_defaults_and_rejects_unknown():
+    assert parse_fields(None) == ("timestamp", "message", "source", "level")
+    assert parse_fields("message, level") == ["message", "level"]
+    with pytest.raises(ValueError, match="host"):
+        parse_fields("message,host")
+
+
+def test_rows_layout_projects_fields():
+    shaped = shape_logs({"logs": LOGS, "next": None}, ["message"])
+    assert shaped == {"logs": [{"message": "started"}, {"message": "failed"}, {"message": "retrying"}], "next": None}
+
+
+def test_columnar_layout_dictionary_encodes_level_and_source():
+    shaped = shape_logs({"logs": LOGS, "next": None}, ["message", "source", "level"], "columnar")
+    assert shaped["format"] == "columnar"
+    assert shaped["count"] == 3
+    assert "logs" not in shaped
+    columns = shaped["columns"]
+    assert columns["message"] == ["started", "failed", "retrying"]
+    assert columns["source"] == {"values": ["api", "worker"], "codes": [0, 1, 0]}
+    assert columns["level"] == {"values": ["INFO", "ERROR"], "codes": [0, 1, 0]}
+
+
+def test_columnar_layout_round_trips_to_rows():
+    columns = shape_logs({"logs": LOGS}, ["timestamp", "message", "source", "level"], "columnar")["columns"]
+    decoded = [
+        {
+            field: column["values"][column["codes"][i]] if isinstance(column, dict) else column[i]
+            for field, column in columns.items()
+        }
+        for i in range(len(LOGS))
+    ]
+    assert decoded == LOGS
+
+
+def test_fast_json_response_serializes_datetimes():
+    body = FastJSONResponse({"at": datetime(2024, 1, 1, 12, 0)}).body
+    assert json.loads(body) == {"at": "2024-01-01T12:00:00"}
+    assert json.loads(dumps({"a": [1, "b"]})) == {"a": [1, "b"]}
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.platforms import aws
+from app.services.stream_service import TailMultiplexer, batch_events, sse_batches
+
+
+async def failing_source(count, error=RuntimeError("upstream failed")):
+    for i in range(count):
+        yield {"message": f"event {i}"}
+    raise error
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+def test_batch_events_raises_source_error_after_draining():
+    async def run():
+        events = []
+        with pytest.raises(RuntimeError, match="upstream failed"):
+            async for batch, _ in batch_events(failing_source(3), max_delay=0.01):
+                events.extend(batch)
+        return events
+
+    assert len(asyncio.run(run())) == 3
+
+
+def test_sse_batches_ends_with_error_frame():
+    frames = asyncio.run(collect(sse_batches(failing_source(2), max_delay=0.01)))
+    assert frames[0].startswith(b"data: ")
+    assert frames[-1].startswith(b"event: tail_error\n")
+    assert b"upstream failed" in frames[-1]
+
+
+def test_platform_tail_errors_reach_the_stream(monkeypatch):
+    class Reader:
+        def __init__(self, **kwargs):
+            pass
+
+        def tail_logs(self, *args):
+            return failing_source(1, PermissionError("access denied"))
+
+    monkeypatch.setattr(aws, "CloudWatchLogsReader", Reader)
+    credentials = {"region": "eu-west-1", "access_key": "A", "secret_key": "S"}
+    source = aws.AWSPlatform().tail_logs(credentials, "group", 1)
+    frames = asyncio.run(collect(sse_batches(source, max_delay=0.01)))
+    assert frames[-1].startswith(b"event: tail_error\n")
+    assert b"access denied" in frames[-1]
+
+
+def test_multiplexer_reports_source_error():
+    async def run():
+        frames = []
+
+        async def send(frame):
+            frames.append(frame)
+
+        multiplexer = TailMultiplexer(send)
+        writer = asyncio.create_task(multiplexer.run_writer())
+        multiplexer.subscribe("s1", failing_source(1))
+        await asyncio.gather(*multiplexer.subscriptions.values())
+        while not multiplexer.outbox.empty():
+            await asyncio.sleep(0)
+        writer.cancel()
+        return frames
+
+    frames = asyncio.run(run())
+    assert frames[0]["events"] == [{"message": "event 0"}]
+    assert frames[-1] == {"id": "s1", "error": "upstream failed"}
@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.database import get_async_db
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def current_user(token, db):
+        return object()
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(main, "get_current_user", current_user)
+    main.app.dependency_overrides[get_async_db] = no_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def test_malformed_messages_keep_the_connection_open(client):
+    with client.websocket_connect("/ws/tail?token=t") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"error": "Messages must be JSON objects"}
+        ws.send_text("[1, 2]")
+        assert ws.receive_json() == {"error": "Messages must be JSON objects"}
+        ws.send_json({"op": "unsubscribe", "id": "s1"})
+        assert ws.receive_json() == {"id": "s1", "error": "Unknown subscription s1"}